@@ -13,56 +13,106 @@ CREATE TABLE reviews (
     review_id SERIAL PRIMARY KEY,
     movie_id INT REFERENCES movies(movie_id),
     stars INT,
-    comment TEXT
+    comment TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
-CREATE OR REPLACE FUNCTION update_avg_rating()
-RETURNS TRIGGER AS $$
-BEGIN
-    UPDATE rentings
-    SET avg_rating = (
-        SELECT COALESCE(AVG(stars), 0)
-        FROM reviews
-        WHERE movie_id = NEW.movie_id
-    )
-    WHERE movie_id = NEW.movie_id;
 
-    RETURN NEW;
+-- Reviews are only appended, so created_at follows the physical row order
+-- and a BRIN index (one min/max per block range, a few KB for millions of
+-- rows) lets period reports skip every block outside the range. Filter
+-- with half-open ranges (created_at >= start AND created_at < end), never
+-- EXTRACT(... FROM created_at), which cannot use an index.
+CREATE INDEX idx_reviews_created_at_brin ON reviews USING BRIN (created_at);
+
+-- Running totals of review stars per movie: avg_rating = stars_sum / stars_count,
+-- so a new, changed or deleted review is an O(1) update of its movie instead
+-- of re-reading every review of that movie.
+ALTER TABLE movies
+    ADD COLUMN stars_sum BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN stars_count INT NOT NULL DEFAULT 0;
+
+-- Applies the net change of a statement: old_* are the removed (movie_id, stars)
+-- pairs, new_* the added ones. NULL stars are ignored, like AVG(stars).
+CREATE OR REPLACE FUNCTION apply_review_stars(
+    old_movie_ids INT[], old_stars INT[], new_movie_ids INT[], new_stars INT[]
+)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE movies m SET
+        stars_sum = m.stars_sum + d.stars_sum,
+        stars_count = m.stars_count + d.stars_count,
+        avg_rating = COALESCE((m.stars_sum + d.stars_sum)::NUMERIC / NULLIF(m.stars_count + d.stars_count, 0), 0)
+    FROM (
+        SELECT movie_id, SUM(sign * stars) AS stars_sum, SUM(sign) AS stars_count
+        FROM (
+            SELECT o.movie_id, o.stars, -1 AS sign FROM unnest(old_movie_ids, old_stars) AS o(movie_id, stars)
+            UNION ALL
+            SELECT n.movie_id, n.stars, 1 FROM unnest(new_movie_ids, new_stars) AS n(movie_id, stars)
+        ) x
+        WHERE movie_id IS NOT NULL AND stars IS NOT NULL
+        GROUP BY movie_id
+        HAVING SUM(sign * stars) <> 0 OR SUM(sign) <> 0
+    ) d
+    WHERE m.movie_id = d.movie_id;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Statement-level: one UPDATE per statement, however many reviews it touched
+-- (bulk loads read the transition tables once).
 CREATE OR REPLACE FUNCTION update_avg_rating()
 RETURNS TRIGGER AS $$
 BEGIN
-    UPDATE rentings
-    SET avg_rating = (
-        SELECT COALESCE(AVG(stars), 0)
-        FROM reviews
-        WHERE movie_id = NEW.movie_id
-    )
-    WHERE movie_id = NEW.movie_id;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_review_stars('{}', '{}',
+            ARRAY(SELECT movie_id FROM new_rows), ARRAY(SELECT stars FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM apply_review_stars(
+            ARRAY(SELECT movie_id FROM old_rows), ARRAY(SELECT stars FROM old_rows),
+            ARRAY(SELECT movie_id FROM new_rows), ARRAY(SELECT stars FROM new_rows));
+    ELSE
+        PERFORM apply_review_stars(
+            ARRAY(SELECT movie_id FROM old_rows), ARRAY(SELECT stars FROM old_rows), '{}', '{}');
+    END IF;
 
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE OR REPLACE FUNCTION update_avg_rating()
+-- Row-level variant with the same O(1) update, for setups that prefer
+-- per-row triggers (used by the benchmark in "Part 2b Rating Benchmark.sql").
+CREATE OR REPLACE FUNCTION update_avg_rating_row()
 RETURNS TRIGGER AS $$
 BEGIN
-    UPDATE rentings
-    SET avg_rating = (
-        SELECT COALESCE(AVG(stars), 0)
-        FROM reviews
-        WHERE movie_id = NEW.movie_id
-    )
-    WHERE movie_id = NEW.movie_id;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_review_stars('{}', '{}', ARRAY[NEW.movie_id], ARRAY[NEW.stars]);
+        RETURN NEW;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM apply_review_stars(ARRAY[OLD.movie_id], ARRAY[OLD.stars], ARRAY[NEW.movie_id], ARRAY[NEW.stars]);
+        RETURN NEW;
+    END IF;
 
-    RETURN NEW;
+    PERFORM apply_review_stars(ARRAY[OLD.movie_id], ARRAY[OLD.stars], '{}', '{}');
+    RETURN OLD;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Transition tables need one trigger per event.
 CREATE TRIGGER trg_update_avg_rating
 AFTER INSERT ON reviews
-FOR EACH ROW
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_avg_rating();
+
+CREATE TRIGGER trg_update_avg_rating_update
+AFTER UPDATE ON reviews
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_avg_rating();
+
+CREATE TRIGGER trg_update_avg_rating_delete
+AFTER DELETE ON reviews
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
 EXECUTE FUNCTION update_avg_rating();
 
 CREATE FUNCTION validate_review()
@@ -103,41 +153,180 @@ BEFORE DELETE ON movies
 FOR EACH ROW
 EXECUTE FUNCTION prevent_movie_delete();
 
+-- log_activity is partitioned by month on action_time: old months are
+-- dropped as whole partitions (no DELETE, no bloat) and reads of recent
+-- activity only touch recent partitions. The primary key must contain the
+-- partition key, so it is (action_time, log_id) -- also the order used by
+-- the keyset-paginated reader in server.py.
 CREATE TABLE log_activity (
-    log_id SERIAL PRIMARY KEY,
+    log_id SERIAL,
     table_name VARCHAR(50),
     action_type VARCHAR(20),
     record_id INT,
-    action_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    old_row JSONB,  -- row before UPDATE / DELETE
+    new_row JSONB,  -- row after INSERT / UPDATE
+    action_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (action_time, log_id)
+) PARTITION BY RANGE (action_time);
 
-CREATE FUNCTION log_movie_activity()
-RETURNS TRIGGER AS $$
+-- Catches rows outside the created months (e.g. if partition creation lags).
+CREATE TABLE log_activity_default PARTITION OF log_activity DEFAULT;
+
+-- incremental.py reads "log_id > last seen" for one table.
+CREATE INDEX idx_log_activity_table_log_id ON log_activity (table_name, log_id);
+
+-- Creates the monthly partitions log_activity_pYYYYMM from the current month
+-- up to months_ahead months ahead (idempotent). Run it regularly, e.g. from
+-- cron / pg_cron: SELECT log_activity_ensure_partitions();
+-- If it ran late and rows for a month already sit in the DEFAULT partition,
+-- that month cannot simply be created (the default would then hold rows
+-- belonging to it): the default is detached, the month created, its rows
+-- moved over, and the default attached again, all in this transaction.
+CREATE OR REPLACE FUNCTION log_activity_ensure_partitions(months_ahead INT DEFAULT 2)
+RETURNS VOID AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    part_name TEXT;
+    lagging BOOLEAN;
 BEGIN
-    INSERT INTO log_activity (table_name, action_type, record_id)
-    VALUES ('movies', 'INSERT', NEW.movie_id);
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        part_name := 'log_activity_p' || to_char(month_start, 'YYYYMM');
 
-    RETURN NEW;
+        CONTINUE WHEN to_regclass(part_name) IS NOT NULL;
+
+        SELECT EXISTS (
+            SELECT 1 FROM log_activity_default
+            WHERE action_time >= month_start AND action_time < month_end
+        ) INTO lagging;
+
+        IF lagging THEN
+            ALTER TABLE log_activity DETACH PARTITION log_activity_default;
+        END IF;
+
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF log_activity FOR VALUES FROM (%L) TO (%L)',
+            part_name, month_start, month_end
+        );
+
+        IF lagging THEN
+            EXECUTE format(
+                'WITH moved AS (
+                     DELETE FROM log_activity_default
+                     WHERE action_time >= %L AND action_time < %L
+                     RETURNING *
+                 )
+                 INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, part_name
+            );
+            ALTER TABLE log_activity ATTACH PARTITION log_activity_default DEFAULT;
+        END IF;
+    END LOOP;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER trg_log_movie_activity
-AFTER INSERT ON movies
-FOR EACH ROW
-EXECUTE FUNCTION log_movie_activity();
+-- Retention: drops every monthly partition whose whole month is older than
+-- `keep` and returns how many were dropped. Rows of those months that
+-- ended up in the DEFAULT partition are deleted from it as well.
+-- e.g. SELECT log_activity_drop_older_than(INTERVAL '12 months');
+CREATE OR REPLACE FUNCTION log_activity_drop_older_than(keep INTERVAL)
+RETURNS INT AS $$
+DECLARE
+    part RECORD;
+    dropped INT := 0;
+    deleted INT;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'log_activity'::REGCLASS
+          AND c.relname ~ '^log_activity_p[0-9]{6}$'
+    LOOP
+        IF to_date(right(part.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= CURRENT_TIMESTAMP - keep THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+
+    -- Same month granularity as the partitions above.
+    DELETE FROM log_activity_default
+    WHERE action_time < date_trunc('month', CURRENT_TIMESTAMP - keep);
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    IF deleted > 0 THEN
+        RAISE NOTICE 'log_activity_drop_older_than: % old rows deleted from log_activity_default', deleted;
+    END IF;
 
-CREATE FUNCTION log_review_activity()
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT log_activity_ensure_partitions();
+
+-- Statement-level logging: one INSERT ... SELECT per statement from the
+-- transition tables, so a bulk insert/delete writes its log rows in one go
+-- instead of firing a trigger per row. TG_ARGV[0] is the id column; the
+-- old / new row images are kept so readers can undo / redo a change
+-- without reading the table back (UPDATE pairs them by that id).
+CREATE OR REPLACE FUNCTION log_statement_activity()
 RETURNS TRIGGER AS $$
 BEGIN
-    INSERT INTO log_activity (table_name, action_type, record_id)
-    VALUES ('reviews', 'DELETE', OLD.review_id);
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'INSERT INTO log_activity (table_name, action_type, record_id, new_row)
+             SELECT %L, %L, n.%I, to_jsonb(n) FROM new_rows n',
+            TG_TABLE_NAME, TG_OP, TG_ARGV[0]
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        EXECUTE format(
+            'INSERT INTO log_activity (table_name, action_type, record_id, old_row, new_row)
+             SELECT %L, %L, o.%I, to_jsonb(o), to_jsonb(n)
+             FROM old_rows o JOIN new_rows n ON n.%I = o.%I',
+            TG_TABLE_NAME, TG_OP, TG_ARGV[0], TG_ARGV[0], TG_ARGV[0]
+        );
+    ELSE
+        EXECUTE format(
+            'INSERT INTO log_activity (table_name, action_type, record_id, old_row)
+             SELECT %L, %L, o.%I, to_jsonb(o) FROM old_rows o',
+            TG_TABLE_NAME, TG_OP, TG_ARGV[0]
+        );
+    END IF;
 
-    RETURN OLD;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+CREATE TRIGGER trg_log_movie_activity
+AFTER INSERT ON movies
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_statement_activity('movie_id');
+
 CREATE TRIGGER trg_log_review_activity
 AFTER DELETE ON reviews
-FOR EACH ROW
-EXECUTE FUNCTION log_review_activity();
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_statement_activity('review_id');
+
+--Every change to rentings is logged with its row images, so incremental
+--reports (incremental.py / person7) can add and subtract it from their
+--saved sums without reading rentings.
+CREATE TRIGGER trg_log_renting_insert
+AFTER INSERT ON rentings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_statement_activity('renting_id');
+
+CREATE TRIGGER trg_log_renting_update
+AFTER UPDATE ON rentings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_statement_activity('renting_id');
 
+CREATE TRIGGER trg_log_renting_delete
+AFTER DELETE ON rentings
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION log_statement_activity('renting_id');
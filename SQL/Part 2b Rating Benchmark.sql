@@ -0,0 +1,96 @@
+-- ================================================
+-- Benchmark: update_avg_rating before / after
+-- ================================================
+-- Run with psql after Part 2 (and Part 3): everything happens inside one
+-- transaction that is rolled back, so no data is changed.
+--
+--   psql -f "SQL/Part 2b Rating Benchmark.sql"
+--
+-- Compared:
+--   legacy      row trigger recomputing AVG(stars) over all reviews of the
+--               movie on every insert (the old update_avg_rating)
+--   row         update_avg_rating_row(): O(1) running sum/count per row
+--   statement   update_avg_rating(): one UPDATE per statement from the
+--               transition table (installed by Part 2)
+-- The legacy trigger is quadratic in reviews per movie, so it runs on a
+-- smaller load; compare the rows/s columns. The row variant is also run
+-- smaller: inside one bulk statement every per-row UPDATE of the same
+-- movie adds to a chain of row versions the next UPDATE has to walk, so
+-- it degrades with load size too. Only the statement trigger touches each
+-- movie once per statement. Other triggers on reviews (validation, Part 3
+-- summaries) stay enabled for all three runs.
+--
+-- Sample run (200 movies, PostgreSQL 16, laptop-class machine):
+--   legacy   :   20000 reviews in 219.83 s (91 rows/s)
+--   row      :   50000 reviews in 116.57 s (429 rows/s)
+--   statement: 1000000 reviews in  11.59 s (86284 rows/s)
+-- all with 0 movies disagreeing with a full AVG(stars) recomputation.
+
+\set n_reviews 1000000
+\set n_row 50000
+\set n_legacy 20000
+
+BEGIN;
+
+CREATE FUNCTION pg_temp.update_avg_rating_legacy()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE movies
+    SET avg_rating = (
+        SELECT COALESCE(AVG(stars), 0)
+        FROM reviews
+        WHERE movie_id = NEW.movie_id
+    )
+    WHERE movie_id = NEW.movie_id;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Inserts n reviews spread over all movies (1 statement) and reports
+-- throughput plus how many movies disagree with a full AVG recomputation.
+CREATE FUNCTION pg_temp.bench_reviews(label TEXT, n INT)
+RETURNS VOID AS $$
+DECLARE
+    ids INT[] := ARRAY(SELECT movie_id FROM movies ORDER BY movie_id);
+    t0 TIMESTAMPTZ;
+    secs NUMERIC;
+    wrong INT;
+BEGIN
+    t0 := clock_timestamp();
+    INSERT INTO reviews (movie_id, stars, comment)
+    SELECT ids[1 + g % cardinality(ids)], 1 + (g * 7) % 5, NULL
+    FROM generate_series(1, n) g;
+    secs := EXTRACT(EPOCH FROM clock_timestamp() - t0);
+
+    SELECT COUNT(*) INTO wrong
+    FROM movies m
+    JOIN (SELECT movie_id, AVG(stars)::NUMERIC(4,2) AS avg_stars FROM reviews GROUP BY movie_id) r
+        ON r.movie_id = m.movie_id
+    WHERE m.avg_rating IS DISTINCT FROM r.avg_stars;
+
+    RAISE NOTICE '%: % reviews in % s (% rows/s), movies with wrong avg_rating: %',
+        rpad(label, 9), n, round(secs, 2), round(n / GREATEST(secs, 0.001)), wrong;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE reviews DISABLE TRIGGER trg_update_avg_rating;
+
+-- Legacy
+SAVEPOINT bench;
+CREATE TRIGGER trg_bench_legacy AFTER INSERT ON reviews
+FOR EACH ROW EXECUTE FUNCTION pg_temp.update_avg_rating_legacy();
+SELECT pg_temp.bench_reviews('legacy', :n_legacy);
+ROLLBACK TO SAVEPOINT bench;
+
+-- Row-level O(1)
+CREATE TRIGGER trg_bench_row AFTER INSERT ON reviews
+FOR EACH ROW EXECUTE FUNCTION update_avg_rating_row();
+SELECT pg_temp.bench_reviews('row', :n_row);
+ROLLBACK TO SAVEPOINT bench;
+
+-- Statement-level O(1) per statement
+ALTER TABLE reviews ENABLE TRIGGER trg_update_avg_rating;
+SELECT pg_temp.bench_reviews('statement', :n_reviews);
+
+ROLLBACK;
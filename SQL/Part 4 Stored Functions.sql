@@ -35,3 +35,48 @@ ORDER BY m.rating DESC
 LIMIT 1;
 END;
 $$ LANGUAGE plpgsql;
+
+
+
+--3. get_actor_avg_ratings() → average movie rating of every actor at once.
+--Calling get_actor_avg_rating(actor_id) per actor runs one join per call
+--(twice per actor when it is also used in WHERE). The per-actor running
+--sum / count is already kept by the Part 3 triggers in actor_summary (the
+--same figure view_actor_summary shows), so this reads it: O(actors), no
+--join. Plain SQL and STABLE, so it is inlined into the calling query and
+--outer filters (WHERE avg_rating > 7) apply directly to actor_summary.
+--Averages are taken over actsin rows, like the per-actor function.
+CREATE OR REPLACE FUNCTION get_actor_avg_ratings()
+RETURNS TABLE (actor_id INT, actor_name TEXT, avg_rating NUMERIC) AS $$
+    SELECT s.actor_id, s.actor_name, s.rating_sum / NULLIF(s.rating_count, 0)
+    FROM actor_summary s
+    WHERE s.appearances > 0;
+$$ LANGUAGE sql STABLE;
+
+
+--4. get_genre_top_movies() → the highest-rated movie of every genre at once
+--(one pass with DISTINCT ON instead of one get_genre_top_movie call per
+--genre). Ties go to the lowest movie_id; unrated movies come last.
+CREATE OR REPLACE FUNCTION get_genre_top_movies()
+RETURNS TABLE (genre TEXT, movie_title TEXT, rating NUMERIC) AS $$
+    SELECT DISTINCT ON (m.genre) m.genre::TEXT, m.title::TEXT, m.avg_rating
+    FROM movies m
+    WHERE m.genre IS NOT NULL
+    ORDER BY m.genre, m.avg_rating DESC NULLS LAST, m.movie_id;
+$$ LANGUAGE sql STABLE;
+
+
+--5. reviews_in_period(p_from, p_to) → reviews per movie with created_at in
+--the half-open range [p_from, p_to), e.g. a year is
+--reviews_in_period('2024-01-01', '2025-01-01'). p_to NULL means "up to now".
+--Inlined like the functions above, so the range reaches the BRIN index
+--on reviews.created_at (Part 2) as a plain column comparison.
+CREATE OR REPLACE FUNCTION reviews_in_period(p_from TIMESTAMP, p_to TIMESTAMP DEFAULT NULL)
+RETURNS TABLE (movie_id INT, title TEXT, num_reviews BIGINT, avg_stars NUMERIC) AS $$
+    SELECT m.movie_id, m.title::TEXT, COUNT(*), ROUND(AVG(r.stars), 2)
+    FROM reviews r
+    JOIN movies m ON m.movie_id = r.movie_id
+    WHERE r.created_at >= p_from
+      AND (p_to IS NULL OR r.created_at < p_to)
+    GROUP BY m.movie_id, m.title;
+$$ LANGUAGE sql STABLE;
@@ -9,36 +9,31 @@ FROM view_movie_summary
 ORDER BY avg_rating DESC NULLS LAST, review_count DESC
 LIMIT 5;
 
--- Query 2: Number of movies per actor
+-- Query 2: Number of movies per actor (precomputed in actor_summary)
 SELECT
-  a.actor_id,
-  a.name AS actor_name,
-  COUNT(DISTINCT ai.movie_id) AS movie_count
-FROM actors a
-LEFT JOIN actsin ai
-  ON ai.actor_id = a.actor_id
-GROUP BY a.actor_id, a.name
+  actor_id,
+  actor_name,
+  number_of_movies AS movie_count
+FROM actor_summary
 ORDER BY movie_count DESC, actor_name;
 
 -- Query 3: Actors whose average movie rating is greater than 7
+-- (precomputed in actor_summary, see get_actor_avg_ratings in Part 4)
 SELECT
-  a.actor_id,
-  a.name AS actor_name,
-  get_actor_avg_rating(a.actor_id) AS avg_rating
-FROM actors a
-WHERE get_actor_avg_rating(a.actor_id) > 7
+  actor_id,
+  actor_name,
+  avg_rating
+FROM get_actor_avg_ratings()
+WHERE avg_rating > 7
 ORDER BY avg_rating DESC;
 
 -- Query 4: Actors who appeared in more than 3 movies
 SELECT
-  a.actor_id,
-  a.name AS actor_name,
-  COUNT(DISTINCT ai.movie_id) AS movie_count
-FROM actors a
-JOIN actsin ai
-  ON ai.actor_id = a.actor_id
-GROUP BY a.actor_id, a.name
-HAVING COUNT(DISTINCT ai.movie_id) > 3
+  actor_id,
+  actor_name,
+  number_of_movies AS movie_count
+FROM actor_summary
+WHERE number_of_movies > 3
 ORDER BY movie_count DESC, actor_name;
 
 -- Query 5: Movies that have no reviews (no rows in rentings)
@@ -143,13 +138,12 @@ GROUP BY c.customer_id, c.name
 ORDER BY review_count DESC
 LIMIT 1;
 
--- Query 11: Average runtime and total movies per genre
+-- Query 11: Average runtime and total movies per genre (from genre_summary)
 SELECT
   genre,
-  COUNT(*) AS total_movies,
-  AVG(runtime) AS avg_runtime
-FROM movies
-GROUP BY genre
+  total_movies,
+  runtime_sum::NUMERIC / NULLIF(runtime_count, 0) AS avg_runtime
+FROM genre_summary
 ORDER BY avg_runtime DESC;
 
 -- Query 12: Average number of movies rented per active customer
@@ -1,48 +1,385 @@
 -- ===========================
---  VIEW: view_movie_summary
+--  PRECOMPUTED SUMMARY TABLES
 -- ===========================
-CREATE OR REPLACE VIEW view_movie_summary AS
-SELECT 
-    m.movie_id,
-    m.title,
-    g.genre_name,
-    d.director_name,
-    m.rating AS avg_rating,
-    (SELECT COUNT(*) FROM reviews r WHERE r.movie_id = m.movie_id) AS review_count
+-- The views below used to re-aggregate the base tables on every read
+-- (and view_movie_summary ran one COUNT(*) over reviews per movie).
+-- Instead, movie / actor / genre totals are kept in small tables that
+-- statement-level triggers update with only the rows a statement
+-- changed (transition tables), so reading a summary costs O(result).
+-- Averages are stored as running sum + count.
+
+CREATE TABLE movie_summary (
+    movie_id INT PRIMARY KEY,
+    title TEXT,
+    genre TEXT,
+    avg_rating NUMERIC(4,2),
+    review_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE genre_summary (
+    genre TEXT PRIMARY KEY,
+    total_movies INT NOT NULL DEFAULT 0,
+    rating_sum NUMERIC NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
+    runtime_sum BIGINT NOT NULL DEFAULT 0,
+    runtime_count INT NOT NULL DEFAULT 0,
+    total_reviews INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE actor_summary (
+    actor_id INT PRIMARY KEY,
+    actor_name TEXT,
+    number_of_movies INT NOT NULL DEFAULT 0,  -- distinct movies
+    appearances INT NOT NULL DEFAULT 0,       -- actsin rows
+    rating_sum NUMERIC NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0
+);
+
+-- Lookups done by the triggers for each changed row.
+CREATE INDEX IF NOT EXISTS idx_actsin_actor_movie ON actsin (actor_id, movie_id);
+CREATE INDEX IF NOT EXISTS idx_actsin_movie ON actsin (movie_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_movie ON reviews (movie_id);
+
+-- Initial load from the existing data.
+INSERT INTO movie_summary (movie_id, title, genre, avg_rating, review_count)
+SELECT m.movie_id, m.title, m.genre, m.avg_rating, COALESCE(r.n, 0)
+FROM movies m
+LEFT JOIN (SELECT movie_id, COUNT(*) AS n FROM reviews GROUP BY movie_id) r
+    ON r.movie_id = m.movie_id;
+
+INSERT INTO genre_summary (genre, total_movies, rating_sum, rating_count, runtime_sum, runtime_count, total_reviews)
+SELECT m.genre, COUNT(*), COALESCE(SUM(m.avg_rating), 0), COUNT(m.avg_rating),
+       COALESCE(SUM(m.runtime), 0), COUNT(m.runtime), SUM(ms.review_count)
 FROM movies m
-LEFT JOIN genres g ON m.genre_id = g.genre_id
-LEFT JOIN directors d ON m.director_id = d.director_id;
+JOIN movie_summary ms ON ms.movie_id = m.movie_id
+WHERE m.genre IS NOT NULL
+GROUP BY m.genre;
+
+INSERT INTO actor_summary (actor_id, actor_name, number_of_movies, appearances, rating_sum, rating_count)
+SELECT a.actor_id, a.name, COUNT(DISTINCT ac.movie_id), COUNT(ac.movie_id),
+       COALESCE(SUM(m.avg_rating), 0), COUNT(m.avg_rating)
+FROM actors a
+LEFT JOIN actsin ac ON ac.actor_id = a.actor_id
+LEFT JOIN movies m ON m.movie_id = ac.movie_id
+GROUP BY a.actor_id, a.name;
+
+-- ---------------------------
+-- movies → movie / genre / actor summaries
+-- ---------------------------
+-- old_movies are the rows before the statement, new_movies after it
+-- (empty for INSERT / DELETE respectively).
+CREATE OR REPLACE FUNCTION summary_apply_movies(old_movies movies[], new_movies movies[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO genre_summary AS g
+        (genre, total_movies, rating_sum, rating_count, runtime_sum, runtime_count, total_reviews)
+    SELECT d.genre,
+           SUM(d.sign),
+           SUM(d.sign * COALESCE(d.avg_rating, 0)),
+           SUM(d.sign * (d.avg_rating IS NOT NULL)::INT),
+           SUM(d.sign * COALESCE(d.runtime, 0)),
+           SUM(d.sign * (d.runtime IS NOT NULL)::INT),
+           SUM(d.sign * COALESCE(ms.review_count, 0))
+    FROM (
+        SELECT o.movie_id, o.genre, o.avg_rating, o.runtime, -1 AS sign FROM unnest(old_movies) o
+        UNION ALL
+        SELECT n.movie_id, n.genre, n.avg_rating, n.runtime, 1 FROM unnest(new_movies) n
+    ) d
+    LEFT JOIN movie_summary ms ON ms.movie_id = d.movie_id
+    WHERE d.genre IS NOT NULL
+    GROUP BY d.genre
+    ON CONFLICT (genre) DO UPDATE SET
+        total_movies = g.total_movies + EXCLUDED.total_movies,
+        rating_sum = g.rating_sum + EXCLUDED.rating_sum,
+        rating_count = g.rating_count + EXCLUDED.rating_count,
+        runtime_sum = g.runtime_sum + EXCLUDED.runtime_sum,
+        runtime_count = g.runtime_count + EXCLUDED.runtime_count,
+        total_reviews = g.total_reviews + EXCLUDED.total_reviews;
+
+    DELETE FROM genre_summary WHERE total_movies = 0;
+
+    -- A changed movie rating moves every actor of that movie. (Deleted
+    -- movies are handled by the actsin trigger when their rows go.)
+    UPDATE actor_summary a SET
+        rating_sum = a.rating_sum + d.rating_sum,
+        rating_count = a.rating_count + d.rating_count
+    FROM (
+        SELECT ac.actor_id,
+               SUM(COALESCE(n.avg_rating, 0) - COALESCE(o.avg_rating, 0)) AS rating_sum,
+               SUM((n.avg_rating IS NOT NULL)::INT - (o.avg_rating IS NOT NULL)::INT) AS rating_count
+        FROM unnest(old_movies) o
+        JOIN unnest(new_movies) n ON n.movie_id = o.movie_id
+        JOIN actsin ac ON ac.movie_id = n.movie_id
+        WHERE n.avg_rating IS DISTINCT FROM o.avg_rating
+        GROUP BY ac.actor_id
+    ) d
+    WHERE a.actor_id = d.actor_id;
+
+    DELETE FROM movie_summary ms
+    USING unnest(old_movies) o
+    WHERE ms.movie_id = o.movie_id
+      AND o.movie_id NOT IN (SELECT n.movie_id FROM unnest(new_movies) n);
+
+    INSERT INTO movie_summary (movie_id, title, genre, avg_rating)
+    SELECT n.movie_id, n.title, n.genre, n.avg_rating FROM unnest(new_movies) n
+    ON CONFLICT (movie_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        genre = EXCLUDED.genre,
+        avg_rating = EXCLUDED.avg_rating;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION summary_movies_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM summary_apply_movies('{}', ARRAY(SELECT n::movies FROM new_rows n));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM summary_apply_movies(ARRAY(SELECT o::movies FROM old_rows o), ARRAY(SELECT n::movies FROM new_rows n));
+    ELSE
+        PERFORM summary_apply_movies(ARRAY(SELECT o::movies FROM old_rows o), '{}');
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event.
+CREATE TRIGGER trg_summary_movies_insert
+AFTER INSERT ON movies
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_movies_changed();
+
+CREATE TRIGGER trg_summary_movies_update
+AFTER UPDATE ON movies
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_movies_changed();
+
+CREATE TRIGGER trg_summary_movies_delete
+AFTER DELETE ON movies
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_movies_changed();
+
+-- ---------------------------
+-- reviews → review counts per movie and genre
+-- ---------------------------
+CREATE OR REPLACE FUNCTION summary_apply_reviews(old_movie_ids INT[], new_movie_ids INT[])
+RETURNS VOID AS $$
+BEGIN
+    WITH delta AS (
+        SELECT movie_id, SUM(sign) AS n
+        FROM (
+            SELECT unnest(old_movie_ids) AS movie_id, -1 AS sign
+            UNION ALL
+            SELECT unnest(new_movie_ids), 1
+        ) x
+        WHERE movie_id IS NOT NULL
+        GROUP BY movie_id
+        HAVING SUM(sign) <> 0
+    ),
+    per_movie AS (
+        UPDATE movie_summary ms
+        SET review_count = ms.review_count + delta.n
+        FROM delta
+        WHERE ms.movie_id = delta.movie_id
+        RETURNING ms.genre, delta.n
+    )
+    UPDATE genre_summary g
+    SET total_reviews = g.total_reviews + t.n
+    FROM (SELECT genre, SUM(n) AS n FROM per_movie GROUP BY genre) t
+    WHERE g.genre = t.genre;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION summary_reviews_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM summary_apply_reviews('{}', ARRAY(SELECT movie_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM summary_apply_reviews(ARRAY(SELECT movie_id FROM old_rows), ARRAY(SELECT movie_id FROM new_rows));
+    ELSE
+        PERFORM summary_apply_reviews(ARRAY(SELECT movie_id FROM old_rows), '{}');
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_summary_reviews_insert
+AFTER INSERT ON reviews
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_reviews_changed();
+
+CREATE TRIGGER trg_summary_reviews_update
+AFTER UPDATE ON reviews
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_reviews_changed();
+
+CREATE TRIGGER trg_summary_reviews_delete
+AFTER DELETE ON reviews
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_reviews_changed();
+
+-- ---------------------------
+-- actsin / actors → actor summary
+-- ---------------------------
+CREATE OR REPLACE FUNCTION summary_apply_actsin(old_links actsin[], new_links actsin[])
+RETURNS VOID AS $$
+BEGIN
+    -- Net change per (actor, movie) pair. The pair's current row count in
+    -- actsin tells whether the actor gained or lost a distinct movie.
+    UPDATE actor_summary a SET
+        number_of_movies = a.number_of_movies + d.movies,
+        appearances = a.appearances + d.links,
+        rating_sum = a.rating_sum + d.rating_sum,
+        rating_count = a.rating_count + d.rating_count
+    FROM (
+        SELECT p.actor_id,
+               SUM((cur.n > 0)::INT - (cur.n - p.links > 0)::INT) AS movies,
+               SUM(p.links) AS links,
+               SUM(p.links * COALESCE(ms.avg_rating, 0)) AS rating_sum,
+               SUM(p.links * (ms.avg_rating IS NOT NULL)::INT) AS rating_count
+        FROM (
+            SELECT actor_id, movie_id, SUM(sign) AS links
+            FROM (
+                SELECT o.actor_id, o.movie_id, -1 AS sign FROM unnest(old_links) o
+                UNION ALL
+                SELECT n.actor_id, n.movie_id, 1 FROM unnest(new_links) n
+            ) x
+            WHERE actor_id IS NOT NULL AND movie_id IS NOT NULL
+            GROUP BY actor_id, movie_id
+            HAVING SUM(sign) <> 0
+        ) p
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS n FROM actsin ac
+            WHERE ac.actor_id = p.actor_id AND ac.movie_id = p.movie_id
+        ) cur
+        LEFT JOIN movie_summary ms ON ms.movie_id = p.movie_id
+        GROUP BY p.actor_id
+    ) d
+    WHERE a.actor_id = d.actor_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION summary_actsin_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM summary_apply_actsin('{}', ARRAY(SELECT n::actsin FROM new_rows n));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM summary_apply_actsin(ARRAY(SELECT o::actsin FROM old_rows o), ARRAY(SELECT n::actsin FROM new_rows n));
+    ELSE
+        PERFORM summary_apply_actsin(ARRAY(SELECT o::actsin FROM old_rows o), '{}');
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_summary_actsin_insert
+AFTER INSERT ON actsin
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actsin_changed();
+
+CREATE TRIGGER trg_summary_actsin_update
+AFTER UPDATE ON actsin
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actsin_changed();
+
+CREATE TRIGGER trg_summary_actsin_delete
+AFTER DELETE ON actsin
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actsin_changed();
+
+CREATE OR REPLACE FUNCTION summary_actors_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO actor_summary (actor_id, actor_name)
+        SELECT actor_id, name FROM new_rows
+        ON CONFLICT (actor_id) DO NOTHING;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE actor_summary a SET actor_name = n.name
+        FROM new_rows n
+        WHERE a.actor_id = n.actor_id;
+    ELSE
+        DELETE FROM actor_summary a
+        USING old_rows o
+        WHERE a.actor_id = o.actor_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_summary_actors_insert
+AFTER INSERT ON actors
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actors_changed();
+
+CREATE TRIGGER trg_summary_actors_update
+AFTER UPDATE ON actors
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actors_changed();
+
+CREATE TRIGGER trg_summary_actors_delete
+AFTER DELETE ON actors
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION summary_actors_changed();
+
+-- ===========================
+--  VIEW: view_movie_summary
+-- ===========================
+DROP VIEW IF EXISTS view_movie_summary;
+CREATE VIEW view_movie_summary AS
+SELECT
+    movie_id,
+    title,
+    genre,
+    avg_rating,
+    review_count
+FROM movie_summary;
 
 -- ===========================
 --  VIEW: view_actor_summary
 -- ===========================
-CREATE OR REPLACE VIEW view_actor_summary AS
-SELECT 
-    a.actor_name,
-    COUNT(DISTINCT ac.movie_id) AS number_of_movies,
-    AVG(m.rating) AS avg_movie_rating
-FROM actors a
-LEFT JOIN actsin ac ON a.actor_id = ac.actor_id
-LEFT JOIN movies m ON ac.movie_id = m.movie_id
-GROUP BY a.actor_id;
+DROP VIEW IF EXISTS view_actor_summary;
+CREATE VIEW view_actor_summary AS
+SELECT
+    actor_name,
+    number_of_movies,
+    rating_sum / NULLIF(rating_count, 0) AS avg_movie_rating
+FROM actor_summary;
 
 -- ===========================
 --  VIEW: view_genre_stats
 -- ===========================
-CREATE OR REPLACE VIEW view_genre_stats AS
-SELECT 
-    g.genre_name,
-    COUNT(m.movie_id) AS total_movies,
-    AVG(m.rating) AS avg_genre_rating
-FROM genres g
-LEFT JOIN movies m ON g.genre_id = m.genre_id
-GROUP BY g.genre_id;
+DROP VIEW IF EXISTS view_genre_stats;
+CREATE VIEW view_genre_stats AS
+SELECT
+    genre AS genre_name,
+    total_movies,
+    rating_sum / NULLIF(rating_count, 0) AS avg_genre_rating
+FROM genre_summary;
 
 -- ======================================
 --  VIEW: view_director_performance
 -- ======================================
 CREATE OR REPLACE VIEW view_director_performance AS
-SELECT 
+SELECT
     d.director_name,
     COUNT(m.movie_id) AS number_of_movies,
     AVG(m.rating) AS average_rating
@@ -50,4 +387,3 @@ FROM directors d
 LEFT JOIN movies m ON d.director_id = m.director_id
 GROUP BY d.director_id;
 ---
-
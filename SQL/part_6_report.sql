@@ -1,18 +1,14 @@
 Report 1: Top 3 Genres by Total Reviews
 
-SELECT g.genre_name, SUM(m.review_count) AS total_reviews
-FROM genres g
-JOIN movies m ON g.genre_id = m.genre_id
-GROUP BY g.genre_name
+SELECT genre AS genre_name, total_reviews
+FROM genre_summary
 ORDER BY total_reviews DESC
 LIMIT 3;
 
 Report 2: Top 5 Actors by Total Appearances
 
-SELECT a.actor_name, COUNT(actsin.movie_id) AS total_appearances
-FROM actors a
-JOIN actsin ON a.actor_id = actsin.actor_id
-GROUP BY a.actor_name
+SELECT actor_name, appearances AS total_appearances
+FROM actor_summary
 ORDER BY total_appearances DESC
 LIMIT 5;
 
@@ -28,18 +24,22 @@ ORDER BY avg_director_rating DESC;
 
 Report 4: Movies with Reviews After 2020
 
-SELECT DISTINCT m.title, m.release_year, m.avg_rating,
+SELECT m.title, m.year_of_release, m.avg_rating,
        COUNT(r.review_id) AS num_reviews_after_2020
 FROM movies m
 JOIN reviews r ON m.movie_id = r.movie_id
-WHERE EXTRACT(YEAR FROM r.created_at) > 2020
-GROUP BY m.movie_id, m.title, m.release_year, m.avg_rating
+WHERE r.created_at >= DATE '2021-01-01'
+GROUP BY m.movie_id, m.title, m.year_of_release, m.avg_rating
 ORDER BY num_reviews_after_2020 DESC;
 
 Report 5: Genres by Average Duration
 
-SELECT g.genre_name, ROUND(AVG(m.duration), 2) AS avg_duration_minutes
-FROM genres g
-JOIN movies m ON g.genre_id = m.genre_id
-GROUP BY g.genre_name
+SELECT genre AS genre_name, ROUND(runtime_sum::NUMERIC / NULLIF(runtime_count, 0), 2) AS avg_duration_minutes
+FROM genre_summary
 ORDER BY avg_duration_minutes DESC;
+
+Report 6: Reviews per Movie in a Period (half-open range, e.g. March 2024)
+
+SELECT title, num_reviews, avg_stars
+FROM reviews_in_period(DATE '2024-03-01', DATE '2024-04-01')
+ORDER BY num_reviews DESC, title;
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+# -------------------------------------------------------------------
+# Frequency counts pushed down to SQL
+# -------------------------------------------------------------------
+# Instead of pulling whole tables and counting in Python, each table is
+# scanned once with `GROUP BY GROUPING SETS ((col1), (col2), ())` and every
+# threshold becomes a `COUNT(*) FILTER (WHERE ...)` column on the grand
+# total row. All tables are combined with UNION ALL so the whole result
+# (a few dozen rows) comes back in a single round trip.
+
+
+class TableCounts(NamedTuple):
+    """What to count for one table.
+
+    group_by: columns that get one count per distinct value.
+    filters: label -> SQL predicate, each counted over the whole table.
+             Predicates are trusted SQL written in the scripts, never user input.
+    """
+    table: str
+    group_by: Sequence[str] = ()
+    filters: Optional[Dict[str, str]] = None
+    schema: str = "public"
+
+
+class CountResult:
+    """Lookup helpers over the long (source, dimension, key, n) result."""
+
+    def __init__(self, rows: Sequence[Tuple[str, str, Optional[str], int]]):
+        self.totals: Dict[str, int] = {}
+        self.filtered: Dict[Tuple[str, str], int] = {}
+        self.grouped: Dict[Tuple[str, str], Dict[Optional[str], int]] = {}
+
+        for source, dimension, key, n in rows:
+            n = int(n or 0)
+            if dimension == "*":
+                self.totals[source] = n
+            elif dimension == "filter":
+                self.filtered[(source, key)] = n
+            else:
+                self.grouped.setdefault((source, dimension), {})[key] = n
+
+    def total(self, table: str) -> int:
+        return self.totals.get(table, 0)
+
+    def count(self, table: str, label: str) -> int:
+        return self.filtered.get((table, label), 0)
+
+    def groups(self, table: str, column: str, skip_null: bool = True) -> Dict[Optional[str], int]:
+        """{value (as text): count}, NULL group dropped unless skip_null=False."""
+        counts = dict(self.grouped.get((table, column), {}))
+        if skip_null:
+            counts.pop(None, None)
+        return counts
+
+
+def _table_query(spec: TableCounts) -> sql.Composed:
+    cols = list(spec.group_by)
+    filters = spec.filters or {}
+    labels = list(filters)
+    filter_cols = [
+        sql.SQL("COUNT(*) FILTER (WHERE {}) AS {}").format(sql.SQL(filters[label]), sql.Identifier(f"f{i}"))
+        for i, label in enumerate(labels)
+    ]
+    source = sql.Literal(spec.table)
+
+    if cols:
+        # GROUPING(c1, ..., ck): bit (k-1-i) is 1 when column i is NOT grouped.
+        all_bits = (1 << len(cols)) - 1
+        select = [sql.SQL("GROUPING({}) AS grp").format(sql.SQL(", ").join(map(sql.Identifier, cols)))]
+        select += [sql.SQL("{}::text AS {}").format(sql.Identifier(c), sql.Identifier(f"k{i}")) for i, c in enumerate(cols)]
+        group_clause = sql.SQL(" GROUP BY GROUPING SETS ({}, ())").format(
+            sql.SQL(", ").join(sql.SQL("({})").format(sql.Identifier(c)) for c in cols)
+        )
+    else:
+        all_bits = 0
+        select = [sql.SQL("0 AS grp")]
+        group_clause = sql.SQL("")
+
+    select += [sql.SQL("COUNT(*) AS n")] + filter_cols
+    agg = sql.SQL("SELECT {} FROM {}{}").format(
+        sql.SQL(", ").join(select), sql.Identifier(spec.schema, spec.table), group_clause
+    )
+
+    parts: List[sql.Composable] = []
+    for i, col in enumerate(cols):
+        mask = all_bits & ~(1 << (len(cols) - 1 - i))
+        parts.append(sql.SQL("SELECT {}, {}, {}, n FROM agg WHERE grp = {}").format(
+            source, sql.Literal(col), sql.Identifier(f"k{i}"), sql.Literal(mask)
+        ))
+    parts.append(sql.SQL("SELECT {}, '*', NULL::text, n FROM agg WHERE grp = {}").format(source, sql.Literal(all_bits)))
+    for i, label in enumerate(labels):
+        parts.append(sql.SQL("SELECT {}, 'filter', {}, {} FROM agg WHERE grp = {}").format(
+            source, sql.Literal(label), sql.Identifier(f"f{i}"), sql.Literal(all_bits)
+        ))
+
+    return sql.SQL("(WITH agg AS ({}) {})").format(agg, sql.SQL(" UNION ALL ").join(parts))
+
+
+def build_counts_query(specs: Sequence[TableCounts]) -> sql.Composed:
+    """One statement returning (source, dimension, key, n) rows for all specs."""
+    if not specs:
+        raise ValueError("At least one TableCounts spec is required.")
+    body = sql.SQL(" UNION ALL ").join(_table_query(spec) for spec in specs)
+    return sql.SQL("SELECT * FROM ({}) counts (source, dimension, key, n);").format(body)
+
+
+def fetch_counts(cursor, specs: Sequence[TableCounts]) -> CountResult:
+    cursor.execute(build_counts_query(specs))
+    return CountResult(cursor.fetchall())
+
+
+def as_number_keys(groups: Dict[Any, int]) -> Dict[float, int]:
+    """Turn text keys of a numeric column back into numbers for lookups."""
+    return {float(k): n for k, n in groups.items() if k is not None}
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from psycopg2 import sql
+
+from nullable import NullableArray
+
+# -------------------------------------------------------------------
+# Single-pass binning
+# -------------------------------------------------------------------
+# All rows are assigned to bins with one `np.searchsorted` over the edges
+# and counted with one `np.bincount`; every threshold probability
+# (P(X >= e), P(X < e), ...) is then a cumulative sum over k bins instead
+# of another scan over n rows. The same bins can be computed in
+# PostgreSQL with `width_bucket(x, ARRAY[edges])`, so only k + 1 rows
+# come back for large tables.
+#
+# With edges e1 < ... < ek there are k + 1 bins:
+#     right=False (default): (-inf, e1), [e1, e2), ..., [ek, inf)
+#     right=True:            (-inf, e1], (e1, e2], ..., (ek, inf)
+
+
+class BinCounts(NamedTuple):
+    labels: List[str]
+    counts: np.ndarray   # one per bin, NULLs excluded
+    edges: np.ndarray
+    right: bool
+    missing: int         # NULL / NaN rows
+
+    @property
+    def valid(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def total(self) -> int:
+        return self.valid + self.missing
+
+    def _share(self, counts: Any) -> np.ndarray:
+        counts = np.asarray(counts, dtype=np.float64)
+        return counts / self.valid if self.valid else np.zeros_like(counts)
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """Share of each bin among non-NULL rows."""
+        return self._share(self.counts)
+
+    @property
+    def percentages(self) -> np.ndarray:
+        return self.probabilities * 100.0
+
+    def above(self) -> np.ndarray:
+        """Per edge: P(X >= e) if right=False, P(X > e) if right=True."""
+        upper = np.cumsum(self.counts[::-1])[::-1]
+        return self._share(upper[1:])
+
+    def below(self) -> np.ndarray:
+        """Per edge: P(X < e) if right=False, P(X <= e) if right=True."""
+        return self._share(np.cumsum(self.counts)[:-1])
+
+    def count_of(self, label: str) -> int:
+        return int(self.counts[self.labels.index(label)])
+
+
+def default_labels(edges: Sequence[float], right: bool = False) -> List[str]:
+    fmt = "{:g}".format
+    if right:
+        first, middle, last = "<= {}", "{} < x <= {}", "> {}"
+    else:
+        first, middle, last = "< {}", "{}-{}", ">= {}"
+    labels = [first.format(fmt(edges[0]))]
+    labels += [middle.format(fmt(a), fmt(b)) for a, b in zip(edges[:-1], edges[1:])]
+    labels.append(last.format(fmt(edges[-1])))
+    return labels
+
+
+class Binning:
+    """Fixed edges + labels, applied to arrays or pushed down to SQL."""
+
+    def __init__(self, edges: Sequence[float], labels: Optional[Sequence[str]] = None, right: bool = False):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or self.edges.size == 0 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError("edges must be a non-empty, strictly increasing sequence.")
+        self.right = right
+        self.labels = list(labels) if labels is not None else default_labels(self.edges, right)
+        if len(self.labels) != self.edges.size + 1:
+            raise ValueError(f"Expected {self.edges.size + 1} labels, got {len(self.labels)}.")
+
+    @property
+    def n_bins(self) -> int:
+        return self.edges.size + 1
+
+    # ---------------------------------------------------------------
+    # In memory
+    # ---------------------------------------------------------------
+    def assign(self, values: Any) -> np.ndarray:
+        """Bin index per row, -1 for NULL / NaN."""
+        if isinstance(values, NullableArray):
+            arr, valid = values.values, values.valid
+        else:
+            arr = np.asarray(values, dtype=np.float64)
+            valid = ~np.isnan(arr)
+        side = "left" if self.right else "right"
+        idx = np.searchsorted(self.edges, arr, side=side)
+        return np.where(valid, idx, -1)
+
+    def count(self, values: Any) -> BinCounts:
+        idx = self.assign(values)
+        present = idx[idx >= 0]
+        counts = np.bincount(present, minlength=self.n_bins)
+        return BinCounts(self.labels, counts, self.edges, self.right, int(idx.size - present.size))
+
+    # ---------------------------------------------------------------
+    # SQL pushdown
+    # ---------------------------------------------------------------
+    def query(self, column: str, source: str) -> sql.Composed:
+        """
+        `(bucket, n)` rows computed by PostgreSQL (bucket NULL = missing).
+
+        `column` and `source` are trusted SQL written in the scripts,
+        e.g. ("m.runtime", "public.rentings r JOIN public.movies m USING (movie_id)").
+        width_bucket(x, thresholds) is left-closed; for right=True the value
+        and edges are negated, which turns [e, ...) into (..., e].
+        """
+        if self.right:
+            edges = sql.SQL(", ").join(sql.Literal(float(-e)) for e in self.edges[::-1])
+            bucket = sql.SQL("{k} - width_bucket(-({col})::float8, ARRAY[{edges}]::float8[])").format(
+                k=sql.Literal(self.edges.size), col=sql.SQL(column), edges=edges
+            )
+        else:
+            edges = sql.SQL(", ").join(sql.Literal(float(e)) for e in self.edges)
+            bucket = sql.SQL("width_bucket(({col})::float8, ARRAY[{edges}]::float8[])").format(
+                col=sql.SQL(column), edges=edges
+            )
+        return sql.SQL("SELECT {bucket} AS bucket, COUNT(*) AS n FROM {source} GROUP BY 1 ORDER BY 1;").format(
+            bucket=bucket, source=sql.SQL(source)
+        )
+
+    def fetch(self, cursor, column: str, source: str) -> BinCounts:
+        cursor.execute(self.query(column, source))
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        missing = 0
+        for bucket, n in cursor.fetchall():
+            if bucket is None:
+                missing += int(n)
+            else:
+                counts[int(bucket)] += int(n)
+        return BinCounts(self.labels, counts, self.edges, self.right, missing)
+
+
+def print_bins(result: BinCounts) -> None:
+    for label, pct in zip(result.labels, result.percentages):
+        print(f"{label}: {pct:.2f}%")
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from contingency import encode
+from nullable import NullableArray
+
+# -------------------------------------------------------------------
+# Packed-bitmap index over categorical predicates
+# -------------------------------------------------------------------
+# Every (column, value) pair gets one `np.packbits` bitmap: 1 bit per row,
+# 1/8 of the memory of a bool mask. Numeric columns are range-encoded:
+# one bitmap per threshold e meaning "column >= e" (or "column > e" for
+# strict thresholds), so <, <=, >, >= and ranges are a single AND / NOT
+# away. Combining predicates works on the packed
+# bytes and counts use a popcount, so a P(A | B) never touches the rows.
+# The index is built in memory from arrays the caller already loaded, so
+# it always matches this run's data.
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(packed: np.ndarray) -> int:
+        return int(np.bitwise_count(packed).sum(dtype=np.int64))
+else:  # NumPy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(packed: np.ndarray) -> int:
+        return int(_POPCOUNT_TABLE[packed].sum(dtype=np.int64))
+
+
+def _label(value: Any) -> str:
+    """Text form of a value used in keys; 4, 4.0 and np.float64(4) all give '4'."""
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return f"{float(value):g}"
+    return str(value)
+
+
+class Bitmap:
+    """A packed row set of length n supporting &, |, ~ and popcount."""
+
+    __slots__ = ("bits", "n")
+
+    def __init__(self, bits: np.ndarray, n: int):
+        self.bits = bits
+        self.n = n
+
+    @classmethod
+    def from_mask(cls, mask: Any) -> "Bitmap":
+        mask = np.asarray(mask, dtype=bool)
+        return cls(np.packbits(mask), mask.size)
+
+    @classmethod
+    def empty(cls, n: int) -> "Bitmap":
+        return cls(np.zeros((n + 7) // 8, dtype=np.uint8), n)
+
+    def to_mask(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=self.n).astype(bool)
+
+    def _check(self, other: "Bitmap") -> None:
+        if other.n != self.n:
+            raise ValueError(f"Bitmaps cover different row counts ({self.n} vs {other.n}).")
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        self._check(other)
+        return Bitmap(self.bits & other.bits, self.n)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        self._check(other)
+        return Bitmap(self.bits | other.bits, self.n)
+
+    def __invert__(self) -> "Bitmap":
+        bits = ~self.bits
+        tail = self.n % 8
+        if tail:
+            # Keep the padding bits of the last byte at 0 so counts stay exact.
+            bits[-1] &= np.uint8((0xFF << (8 - tail)) & 0xFF)
+        return Bitmap(bits, self.n)
+
+    def count(self) -> int:
+        return _popcount(self.bits)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+    def __repr__(self) -> str:
+        return f"Bitmap(n={self.n}, count={self.count()})"
+
+
+def conditional(event: Bitmap, given: Optional[Bitmap] = None) -> float:
+    """P(event | given) from popcounts (NaN when `given` is empty)."""
+    if given is None:
+        return event.count() / event.n if event.n else float("nan")
+    denom = given.count()
+    return (event & given).count() / denom if denom else float("nan")
+
+
+class BitmapIndex:
+    """
+    Bitmaps for equality predicates (`eq`) and range-encoded thresholds (`at_least`).
+
+    Keys are stored as text: "col=value" for categorical columns,
+    "col>=edge" / "col>edge" for thresholds and "col!null" for the
+    non-missing rows.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.bitmaps: Dict[str, Bitmap] = {}
+
+    # ---------------------------------------------------------------
+    # Building
+    # ---------------------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        categorical: Dict[str, Any],
+        thresholds: Optional[Dict[str, Tuple[Any, Sequence[float]]]] = None,
+        strict_thresholds: Optional[Dict[str, Tuple[Any, Sequence[float]]]] = None,
+    ) -> "BitmapIndex":
+        """
+        categorical:       column -> values (one bitmap per distinct value).
+        thresholds:        column -> (numeric values, edges) (one "column >= edge" bitmap per edge).
+        strict_thresholds: column -> (numeric values, edges) (one "column > edge" bitmap per edge).
+        """
+        sizes = {len(v) for v in categorical.values()}
+        sizes |= {len(v) for v, _ in (thresholds or {}).values()}
+        sizes |= {len(v) for v, _ in (strict_thresholds or {}).values()}
+        if len(sizes) != 1:
+            raise ValueError("All indexed columns must have the same, non-zero number of rows.")
+        index = cls(sizes.pop())
+
+        for name, values in categorical.items():
+            codes, labels = encode(values)
+            index.bitmaps[f"{name}!null"] = Bitmap.from_mask(codes >= 0)
+            for code, label in enumerate(labels):
+                index.bitmaps[f"{name}={_label(label)}"] = Bitmap.from_mask(codes == code)
+
+        for op, specs in ((">=", thresholds), (">", strict_thresholds)):
+            for name, (values, edges) in (specs or {}).items():
+                arr = values.to_float() if isinstance(values, NullableArray) else np.asarray(values, dtype=np.float64)
+                present = ~np.isnan(arr)
+                index.bitmaps[f"{name}!null"] = Bitmap.from_mask(present)
+                with np.errstate(invalid="ignore"):
+                    for edge in edges:
+                        mask = arr >= edge if op == ">=" else arr > edge
+                        index.bitmaps[f"{name}{op}{edge:g}"] = Bitmap.from_mask(present & mask)
+
+        return index
+
+    # ---------------------------------------------------------------
+    # Predicates
+    # ---------------------------------------------------------------
+    def _get(self, key: str) -> Bitmap:
+        try:
+            return self.bitmaps[key]
+        except KeyError:
+            raise KeyError(f"No bitmap for '{key}'. Build the index with that value/edge.") from None
+
+    def present(self, column: str) -> Bitmap:
+        return self._get(f"{column}!null")
+
+    def eq(self, column: str, value: Any) -> Bitmap:
+        """column == value (an unseen value is an empty row set)."""
+        key = f"{column}={_label(value)}"
+        if key not in self.bitmaps:
+            self.present(column)
+            return Bitmap.empty(self.n)
+        return self.bitmaps[key]
+
+    def any_of(self, column: str, values: Iterable[Any]) -> Bitmap:
+        result = Bitmap.empty(self.n)
+        for value in values:
+            result = result | self.eq(column, value)
+        return result
+
+    def at_least(self, column: str, edge: float) -> Bitmap:
+        return self._get(f"{column}>={edge:g}")
+
+    def greater_than(self, column: str, edge: float) -> Bitmap:
+        """column > edge (needs a strict threshold at `edge`)."""
+        return self._get(f"{column}>{edge:g}")
+
+    def at_most(self, column: str, edge: float) -> Bitmap:
+        """column <= edge, missing values excluded."""
+        return self.present(column) & ~self.greater_than(column, edge)
+
+    def below(self, column: str, edge: float) -> Bitmap:
+        """column < edge, missing values excluded."""
+        return self.present(column) & ~self.at_least(column, edge)
+
+    def between(self, column: str, low: float, high: float) -> Bitmap:
+        """low <= column < high"""
+        return self.at_least(column, low) & ~self.at_least(column, high)
+
+    def values(self, column: str) -> list:
+        prefix = f"{column}="
+        return [key[len(prefix):] for key in self.bitmaps if key.startswith(prefix)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self.bitmaps.values())
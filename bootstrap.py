@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# Vectorized bootstrap over cell counts
+# -------------------------------------------------------------------
+# Every probability in the homework scripts is a function of a few cell
+# counts (A∧B, A∧¬B, ...). Resampling N rows with replacement is the same
+# as drawing the cell counts from Multinomial(N, observed shares), so one
+# replicate is a K-vector instead of a copy of the data. B replicates are
+# a (B, K) matrix and every statistic is evaluated on it in one NumPy call.
+
+Statistic = Callable[[np.ndarray], np.ndarray]
+
+
+class Interval(NamedTuple):
+    estimate: float
+    lower: float
+    upper: float
+
+
+def event_cells(*masks: Any) -> np.ndarray:
+    """
+    Counts for the 2**m cells formed by m boolean masks.
+
+    Cell index uses bit i for mask i, e.g. with (A, B):
+    0 = ¬A∧¬B, 1 = A∧¬B, 2 = ¬A∧B, 3 = A∧B.
+    """
+    if not masks:
+        raise ValueError("At least one mask is required.")
+    codes = np.zeros(np.asarray(masks[0]).shape, dtype=np.int64)
+    for bit, mask in enumerate(masks):
+        codes |= np.asarray(mask, dtype=bool).astype(np.int64) << bit
+    return np.bincount(codes.ravel(), minlength=2 ** len(masks))
+
+
+def two_event_cells(n_a: int, n_b: int, n_ab: int, n_total: int) -> np.ndarray:
+    """Cells in the `event_cells(A, B)` layout, built from plain counts."""
+    return np.array([n_total - n_a - n_b + n_ab, n_a - n_ab, n_b - n_ab, n_ab], dtype=np.int64)
+
+
+def ratio(numerator_cells: Sequence[int], denominator_cells: Optional[Sequence[int]] = None) -> Statistic:
+    """
+    Statistic = sum(counts[numerator]) / sum(counts[denominator]).
+
+    Without a denominator the share of all rows is returned, i.e. P(A).
+    Replicates with an empty denominator give NaN and are ignored.
+    """
+    num = list(numerator_cells)
+    den = None if denominator_cells is None else list(denominator_cells)
+
+    def _stat(counts: np.ndarray) -> np.ndarray:
+        top = counts[:, num].sum(axis=1).astype(np.float64)
+        bottom = counts.sum(axis=1) if den is None else counts[:, den].sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(bottom > 0, top / np.where(bottom > 0, bottom, 1), np.nan)
+
+    return _stat
+
+
+def independence_gap(counts: np.ndarray) -> np.ndarray:
+    """P(A∧B) − P(A)·P(B) for counts in the `event_cells(A, B)` layout."""
+    n = counts.sum(axis=1).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_a = (counts[:, 1] + counts[:, 3]) / n
+        p_b = (counts[:, 2] + counts[:, 3]) / n
+        p_ab = counts[:, 3] / n
+    return p_ab - p_a * p_b
+
+
+class Bootstrap:
+    """Batched multinomial bootstrap for statistics of cell counts."""
+
+    def __init__(self, counts: Any, n_boot: int = 2000, seed: Optional[int] = 42, n_jobs: int = 1):
+        self.counts = np.asarray(counts, dtype=np.int64).ravel()
+        if self.counts.size == 0 or np.any(self.counts < 0):
+            raise ValueError("counts must be a non-empty vector of non-negative integers.")
+        self.n = int(self.counts.sum())
+        self.n_boot = int(n_boot)
+        self.seed = seed
+        self.n_jobs = max(1, int(n_jobs))
+        self._replicates: Optional[np.ndarray] = None
+
+    @property
+    def replicates(self) -> np.ndarray:
+        """(n_boot, K) matrix of resampled cell counts, drawn once and cached."""
+        if self._replicates is None:
+            self._replicates = self._draw()
+        return self._replicates
+
+    def _draw(self) -> np.ndarray:
+        k = self.counts.size
+        if self.n == 0:
+            return np.zeros((self.n_boot, k), dtype=np.int64)
+
+        pvals = self.counts / self.n
+        chunks = np.array_split(np.arange(self.n_boot), self.n_jobs)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(chunks))
+
+        def _chunk(i: int) -> np.ndarray:
+            rng = np.random.default_rng(seeds[i])
+            return rng.multinomial(self.n, pvals, size=chunks[i].size)
+
+        if self.n_jobs == 1:
+            return _chunk(0)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            parts: List[np.ndarray] = list(pool.map(_chunk, range(len(chunks))))
+        return np.vstack(parts)
+
+    def interval(self, statistic: Statistic, alpha: float = 0.05) -> Interval:
+        """Point estimate on the observed counts + percentile interval."""
+        estimate = float(statistic(self.counts[np.newaxis, :])[0])
+        values = statistic(self.replicates)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return Interval(estimate, float("nan"), float("nan"))
+        lower, upper = np.quantile(values, [alpha / 2, 1 - alpha / 2])
+        return Interval(estimate, float(lower), float(upper))
+
+    def intervals(self, statistics: Dict[str, Statistic], alpha: float = 0.05) -> Dict[str, Interval]:
+        return {name: self.interval(stat, alpha) for name, stat in statistics.items()}
+
+
+def format_interval(interval: Interval, decimals: int = 2, level: float = 0.95) -> str:
+    """'12.34% (95% CI 10.00% – 14.50%)' style text for probabilities."""
+    est, lo, hi = interval
+    if est != est:
+        return "N/A"
+    if lo != lo or hi != hi:
+        return f"{est * 100:.{decimals}f}% (CI N/A)"
+    return f"{est * 100:.{decimals}f}% ({level * 100:.0f}% CI {lo * 100:.{decimals}f}% – {hi * 100:.{decimals}f}%)"
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# Dictionary-encoded categorical columns
+# -------------------------------------------------------------------
+# `.astype(str)` turns a text column into a fixed-width Unicode array
+# (4 bytes per character of the longest value, per row) and `np.unique`
+# then sorts it just to count. A Categorical keeps one small integer code
+# per row (int8 for up to 127 categories) plus the sorted dictionary of
+# distinct values. Counting is `np.bincount(codes)`, equality is a code
+# comparison, and any normalisation (lower/strip) runs once per distinct
+# value instead of once per row.
+
+MISSING = -1
+
+
+def _code_dtype(n_categories: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class Categorical:
+    """Integer codes (-1 = missing) + sorted dictionary of categories."""
+
+    def __init__(self, codes: Any, categories: Any):
+        self.categories = np.asarray(categories, dtype=object)
+        self.codes = np.asarray(codes).astype(_code_dtype(self.categories.size), copy=False)
+        self._lookup: Dict[Any, int] = {v: i for i, v in enumerate(self.categories)}
+
+    @classmethod
+    def from_values(
+        cls,
+        values: Iterable[Any],
+        normalize: Optional[Callable[[Any], Any]] = None,
+        categories: Optional[Iterable[Any]] = None,
+    ) -> "Categorical":
+        """
+        Encode values in one pass.
+
+        normalize:  applied to each *distinct* raw value (e.g. str.lower).
+        categories: a shared dictionary; values outside it become missing.
+        """
+        raw_index: Dict[Any, int] = {}
+        raw_codes = np.fromiter(
+            (MISSING if _is_missing(v) else raw_index.setdefault(v, len(raw_index)) for v in values),
+            dtype=np.int64,
+        )
+
+        raw_values = list(raw_index)
+        if normalize is not None:
+            raw_values = [normalize(v) for v in raw_values]
+
+        if categories is None:
+            categories = sorted({v for v in raw_values if not _is_missing(v)}, key=str)
+        categories = list(categories)
+        position = {v: i for i, v in enumerate(categories)}
+
+        # Map each raw code to its final code (extra last slot for MISSING).
+        remap = np.array([position.get(v, MISSING) for v in raw_values] + [MISSING], dtype=np.int64)
+        return cls(remap[raw_codes], categories)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Any, ...]], column: int, **kwargs: Any) -> "Categorical":
+        """Encode one column straight from DB row tuples (no object array in between)."""
+        return cls.from_values((row[column] for row in rows), **kwargs)
+
+    # ---------------------------------------------------------------
+    # Array-like information
+    # ---------------------------------------------------------------
+    def __len__(self) -> int:
+        return int(self.codes.size)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.codes.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.codes.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+    @property
+    def missing(self) -> np.ndarray:
+        return self.codes == MISSING
+
+    def to_objects(self) -> np.ndarray:
+        """Decode back to an object array (None for missing)."""
+        return np.append(self.categories, None)[self.codes]
+
+    # ---------------------------------------------------------------
+    # Counting and comparisons on codes
+    # ---------------------------------------------------------------
+    def counts(self) -> np.ndarray:
+        """Count per category, aligned with `categories` (missing excluded)."""
+        present = self.codes[self.codes != MISSING]
+        return np.bincount(present, minlength=self.categories.size)
+
+    @property
+    def missing_count(self) -> int:
+        return int(np.count_nonzero(self.missing))
+
+    def value_counts(self) -> List[Tuple[Any, int]]:
+        return list(zip(self.categories.tolist(), self.counts().tolist()))
+
+    def code_of(self, value: Any) -> int:
+        return self._lookup.get(value, MISSING)
+
+    def eq(self, value: Any) -> np.ndarray:
+        code = self.code_of(value)
+        if code == MISSING:
+            return np.zeros(self.codes.shape, dtype=bool)
+        return self.codes == code
+
+    def isin(self, values: Iterable[Any]) -> np.ndarray:
+        return self.where(np.isin(np.arange(self.categories.size), [self.code_of(v) for v in values]))
+
+    def where(self, category_mask: Any) -> np.ndarray:
+        """Row mask from a per-category mask (missing rows are False)."""
+        hit = np.append(np.asarray(category_mask, dtype=bool), False)
+        return hit[self.codes]
+
+    def __repr__(self) -> str:
+        return f"Categorical(n={len(self)}, categories={self.categories.size}, dtype={self.dtype})"
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from psycopg2 import sql
+
+# -------------------------------------------------------------------
+# Conditional probabilities compiled to one SQL statement
+# -------------------------------------------------------------------
+# Callers declare events A and B as SQL predicates over a named sample
+# space (a FROM clause). Every P(A | B) becomes two aggregate columns,
+#     COUNT(*) FILTER (WHERE (A) AND (B))   and   COUNT(*) FILTER (WHERE (B)),
+# each sample space is scanned once, and all sample spaces are combined
+# with UNION ALL, so a whole batch of conditionals costs one round trip.
+
+
+class Event:
+    """A SQL predicate that can be combined with &, | and ~."""
+
+    def __init__(self, predicate: str, label: Optional[str] = None):
+        self.predicate = predicate
+        self.label = label or predicate
+
+    def __and__(self, other: "Event") -> "Event":
+        return Event(f"({self.predicate}) AND ({other.predicate})", f"{self.label} ∧ {other.label}")
+
+    def __or__(self, other: "Event") -> "Event":
+        return Event(f"({self.predicate}) OR ({other.predicate})", f"{self.label} ∨ {other.label}")
+
+    def __invert__(self) -> "Event":
+        # NULL predicates count as "not happened", like the Python versions.
+        return Event(f"NOT COALESCE(({self.predicate}), FALSE)", f"¬{self.label}")
+
+    def __repr__(self) -> str:
+        return f"Event({self.predicate!r})"
+
+
+ALWAYS = Event("TRUE", "Ω")
+
+
+class Conditional(NamedTuple):
+    name: str
+    source: str
+    event: Event
+    given: Event = ALWAYS
+
+
+class ConditionalResult(NamedTuple):
+    name: str
+    favorable: int    # |A ∩ B|
+    condition: int    # |B|
+    total: int        # |Ω| of the sample space
+
+    @property
+    def probability(self) -> float:
+        """P(A | B) = |A ∩ B| / |B| (0 when B is empty)."""
+        return self.favorable / self.condition if self.condition else 0.0
+
+
+class ConditionalEngine:
+    """
+    Collects conditional probabilities and evaluates them together.
+
+    `sources` maps a sample-space name to anything valid after FROM,
+    e.g. "public.movies m" or "(SELECT DISTINCT ...) rc". Sources and
+    predicates are trusted SQL written in the scripts, never user input.
+    """
+
+    def __init__(self, sources: Dict[str, str]):
+        self.sources = dict(sources)
+        self.conditionals: List[Conditional] = []
+
+    def add(self, name: str, source: str, event: Event, given: Event = ALWAYS) -> "ConditionalEngine":
+        if source not in self.sources:
+            raise KeyError(f"Unknown sample space '{source}'.")
+        if any(c.name == name for c in self.conditionals):
+            raise ValueError(f"Duplicate conditional name '{name}'.")
+        self.conditionals.append(Conditional(name, source, event, given))
+        return self
+
+    def build_query(self) -> sql.Composed:
+        if not self.conditionals:
+            raise ValueError("No conditionals were added.")
+
+        parts: List[sql.Composable] = []
+        for source, from_clause in self.sources.items():
+            items = [c for c in self.conditionals if c.source == source]
+            if items:
+                parts.append(self._source_query(from_clause, items))
+
+        return sql.SQL("{};").format(sql.SQL(" UNION ALL ").join(parts))
+
+    @staticmethod
+    def _source_query(from_clause: str, items: Sequence[Conditional]) -> sql.Composed:
+        columns = [sql.SQL("COUNT(*) AS total")]
+        rows = []
+        for i, c in enumerate(items):
+            columns.append(sql.SQL("COUNT(*) FILTER (WHERE ({}) AND ({})) AS {}").format(
+                sql.SQL(c.event.predicate), sql.SQL(c.given.predicate), sql.Identifier(f"ab{i}")
+            ))
+            columns.append(sql.SQL("COUNT(*) FILTER (WHERE ({})) AS {}").format(
+                sql.SQL(c.given.predicate), sql.Identifier(f"b{i}")
+            ))
+            rows.append(sql.SQL("({}, s.{}, s.{}, s.total)").format(
+                sql.Literal(c.name), sql.Identifier(f"ab{i}"), sql.Identifier(f"b{i}")
+            ))
+
+        return sql.SQL(
+            "(SELECT v.name, v.favorable, v.condition, v.total "
+            "FROM (SELECT {} FROM {}) s "
+            "CROSS JOIN LATERAL (VALUES {}) v (name, favorable, condition, total))"
+        ).format(sql.SQL(", ").join(columns), sql.SQL(from_clause), sql.SQL(", ").join(rows))
+
+    def run(self, cursor) -> Dict[str, ConditionalResult]:
+        """Execute the batch on an open cursor; results keyed by name, in declaration order."""
+        cursor.execute(self.build_query())
+        found = {
+            name: ConditionalResult(name, int(ab), int(b), int(total))
+            for name, ab, b, total in cursor.fetchall()
+        }
+        return {c.name: found[c.name] for c in self.conditionals}
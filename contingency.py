@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import math
+from itertools import combinations
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from categorical import Categorical
+from nullable import NullableArray
+
+# -------------------------------------------------------------------
+# Contingency tables and independence tests
+# -------------------------------------------------------------------
+# Categorical columns are turned into integer codes once. A k×m table is
+# then a single `np.bincount(a * m + b)`, and the chi-square / G-test
+# statistics are computed on the table, never on the rows again.
+# P-values use the regularized incomplete gamma function, so no SciPy.
+
+
+class Crosstab(NamedTuple):
+    table: np.ndarray          # (k, m) observed counts
+    row_labels: np.ndarray
+    col_labels: np.ndarray
+
+
+class IndependenceTest(NamedTuple):
+    row_name: str
+    col_name: str
+    n: int
+    chi2: float
+    g: float
+    dof: int
+    p_chi2: float
+    p_g: float
+    cramers_v: float
+
+    @property
+    def independent(self) -> bool:
+        """Kept at the 5% level by the chi-square test."""
+        return self.p_chi2 >= 0.05
+
+
+def encode(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes + sorted labels for a categorical column.
+
+    Missing entries (None / NaN) get code -1 and are dropped from every
+    table built from these codes. A Categorical is already encoded.
+    """
+    if isinstance(values, Categorical):
+        return values.codes.astype(np.int64), values.categories
+    if isinstance(values, NullableArray):
+        labels, inverse = np.unique(values.present(), return_inverse=True)
+        codes = np.full(values.shape, -1, dtype=np.int64)
+        codes[values.valid] = inverse
+        return codes, labels
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        is_missing = np.asarray((arr == None) | (arr != arr), dtype=bool)  # noqa: E711
+        present = arr[~is_missing].astype(str)
+    elif arr.dtype.kind == "f":
+        is_missing = np.isnan(arr)
+        present = arr[~is_missing]
+    else:
+        is_missing = np.zeros(arr.shape, dtype=bool)
+        present = arr
+
+    labels, inverse = np.unique(present, return_inverse=True)
+    codes = np.full(arr.shape, -1, dtype=np.int64)
+    codes[~is_missing] = inverse
+    return codes, labels
+
+
+def crosstab(row_codes: Any, n_rows: int, col_codes: Any, n_cols: int) -> np.ndarray:
+    """k×m table of counts; rows with a -1 code on either side are skipped."""
+    a = np.asarray(row_codes, dtype=np.int64)
+    b = np.asarray(col_codes, dtype=np.int64)
+    keep = (a >= 0) & (b >= 0)
+    flat = np.bincount(a[keep] * n_cols + b[keep], minlength=n_rows * n_cols)
+    return flat.reshape(n_rows, n_cols)
+
+
+def crosstab_columns(rows: Any, cols: Any) -> Crosstab:
+    row_codes, row_labels = encode(rows)
+    col_codes, col_labels = encode(cols)
+    table = crosstab(row_codes, row_labels.size, col_codes, col_labels.size)
+    return Crosstab(table, row_labels, col_labels)
+
+
+# -------------------------------------------------------------------
+# Multi-way joint counts (one pass over the rows)
+# -------------------------------------------------------------------
+
+class JointCounts:
+    """
+    Full joint count table of several categorical columns.
+
+    Built with one `np.bincount` over mixed-radix codes. Every axis has an
+    extra last slot for missing values, so each 2-way table can still use
+    exactly the rows where *its* two columns are present.
+    """
+
+    def __init__(self, columns: Dict[str, Any]):
+        if not columns:
+            raise ValueError("At least one column is required.")
+        self.names = list(columns)
+        self.labels: Dict[str, np.ndarray] = {}
+
+        flat: Optional[np.ndarray] = None
+        shape: List[int] = []
+        for name, values in columns.items():
+            codes, labels = encode(values)
+            size = labels.size + 1
+            codes = np.where(codes < 0, labels.size, codes)
+            flat = codes if flat is None else flat * size + codes
+            self.labels[name] = labels
+            shape.append(size)
+
+        self.counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+    def marginal(self, *names: str) -> Crosstab:
+        """Counts over `names` (rows missing any of them are excluded)."""
+        axes = [self.names.index(n) for n in names]
+        other = tuple(i for i in range(len(self.names)) if i not in axes)
+        table = self.counts.sum(axis=other) if other else self.counts
+        # Sum keeps the original axis order; reorder to the requested one.
+        table = np.moveaxis(table, np.argsort(np.argsort(axes)), range(len(axes)))
+        table = table[tuple(slice(0, -1) for _ in axes)]
+        if len(names) == 2:
+            return Crosstab(table, self.labels[names[0]], self.labels[names[1]])
+        return Crosstab(table, self.labels[names[0]], np.array([]))
+
+    @classmethod
+    def from_rentings(cls, cursor, high_rating: float = 4) -> Optional["JointCounts"]:
+        """
+        gender × genre × rating bucket ('high' = rating >= high_rating,
+        'low' otherwise, NULL when unrated) over every renting of a known
+        movie; None when there are no rentings.
+        """
+        cursor.execute(
+            """
+            SELECT
+                LOWER(TRIM(c.gender)) AS gender,
+                LOWER(TRIM(m.genre)) AS genre,
+                CASE
+                    WHEN r.rating IS NULL THEN NULL
+                    WHEN r.rating >= %s THEN 'high'
+                    ELSE 'low'
+                END AS rating_bucket
+            FROM rentings r
+            JOIN movies m
+                ON m.movie_id = r.movie_id
+            LEFT JOIN customers c
+                ON c.customer_id = r.customer_id
+            """,
+            (high_rating,),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        data = np.array(rows, dtype=object)
+        return cls({"gender": data[:, 0], "genre": data[:, 1], "rating": data[:, 2]})
+
+
+def label_index(labels: Sequence[Any], counts: Any, preferred: Any = None) -> int:
+    """Position of `preferred` if it has counts, otherwise of the most common label."""
+    labels = list(labels)
+    if preferred in labels and counts[labels.index(preferred)] > 0:
+        return labels.index(preferred)
+    return int(np.argmax(counts))
+
+
+class BayesTable(NamedTuple):
+    """All Bayes quantities for a rows × cols table (row = hypothesis, col = evidence)."""
+    prior: np.ndarray        # P(row)
+    evidence: np.ndarray     # P(col)
+    likelihood: np.ndarray   # P(col | row), shape (k, m)
+    posterior: np.ndarray    # P(row | col) via Bayes, shape (k, m)
+    direct: np.ndarray       # P(row | col) = joint / col total, shape (k, m)
+
+
+def bayes_table(table: Any) -> BayesTable:
+    """Priors, likelihoods and posteriors for every (row, col) pair at once."""
+    joint = np.asarray(table, dtype=np.float64)
+    n = joint.sum()
+    row_tot = joint.sum(axis=1)
+    col_tot = joint.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prior = row_tot / n if n else np.zeros_like(row_tot)
+        evidence = col_tot / n if n else np.zeros_like(col_tot)
+        likelihood = np.where(row_tot[:, None] > 0, joint / row_tot[:, None], 0.0)
+        posterior = np.where(evidence[None, :] > 0, prior[:, None] * likelihood / evidence[None, :], 0.0)
+        direct = np.where(col_tot[None, :] > 0, joint / col_tot[None, :], 0.0)
+
+    return BayesTable(prior, evidence, likelihood, posterior, direct)
+
+
+# -------------------------------------------------------------------
+# Chi-square tail probability
+# -------------------------------------------------------------------
+
+def _regularized_gamma_q(a: float, x: float) -> float:
+    """Q(a, x) = Γ(a, x) / Γ(a), series for x < a + 1, continued fraction otherwise."""
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+
+    if x < a + 1:
+        term = total = 1.0 / a
+        ap = a
+        for _ in range(1000):
+            ap += 1
+            term *= x / ap
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def chi2_sf(stat: float, dof: int) -> float:
+    """P(χ²_dof ≥ stat)."""
+    if dof <= 0 or stat != stat:
+        return float("nan")
+    return _regularized_gamma_q(dof / 2.0, stat / 2.0)
+
+
+# -------------------------------------------------------------------
+# Tests on a table
+# -------------------------------------------------------------------
+
+def independence_test(table: Any, row_name: str = "A", col_name: str = "B") -> IndependenceTest:
+    observed = np.asarray(table, dtype=np.float64)
+
+    # Empty rows/columns carry no information and would give E = 0.
+    observed = observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+    n = float(observed.sum())
+    r, c = observed.shape if observed.ndim == 2 else (0, 0)
+    dof = (r - 1) * (c - 1)
+
+    if n == 0 or dof <= 0:
+        nan = float("nan")
+        return IndependenceTest(row_name, col_name, int(n), nan, nan, max(dof, 0), nan, nan, nan)
+
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / n
+    chi2 = float(((observed - expected) ** 2 / expected).sum())
+
+    nonzero = observed > 0
+    g = float(2.0 * (observed[nonzero] * np.log(observed[nonzero] / expected[nonzero])).sum())
+
+    cramers_v = math.sqrt(chi2 / (n * (min(r, c) - 1)))
+
+    return IndependenceTest(
+        row_name, col_name, int(n), chi2, g, dof, chi2_sf(chi2, dof), chi2_sf(g, dof), cramers_v
+    )
+
+
+def test_all_pairs(columns: Dict[str, Any], pairs: Optional[Sequence[Tuple[str, str]]] = None) -> List[IndependenceTest]:
+    """
+    Encode each column once and test every pair (or only `pairs`).
+    Returns results sorted by Cramér's V, strongest association first.
+    """
+    encoded = {name: encode(values) for name, values in columns.items()}
+    if pairs is None:
+        pairs = list(combinations(encoded, 2))
+
+    results = []
+    for a, b in pairs:
+        codes_a, labels_a = encoded[a]
+        codes_b, labels_b = encoded[b]
+        table = crosstab(codes_a, labels_a.size, codes_b, labels_b.size)
+        results.append(independence_test(table, a, b))
+
+    return sorted(results, key=lambda t: -1.0 if t.cramers_v != t.cramers_v else t.cramers_v, reverse=True)
+
+
+def print_independence_table(results: Sequence[IndependenceTest]) -> None:
+    headers = ["A", "B", "n", "chi2", "G", "dof", "p(chi2)", "p(G)", "Cramér V", "Independent?"]
+    print("{:<14} {:<14} {:>7} {:>10} {:>10} {:>5} {:>9} {:>9} {:>9} {:>13}".format(*headers))
+    for t in results:
+        verdict = "N/A" if t.p_chi2 != t.p_chi2 else ("yes" if t.independent else "no")
+        print("{:<14} {:<14} {:>7} {:>10.2f} {:>10.2f} {:>5} {:>9.4f} {:>9.4f} {:>9.3f} {:>13}".format(
+            t.row_name, t.col_name, t.n, t.chi2, t.g, t.dof, t.p_chi2, t.p_g, t.cramers_v, verdict
+        ))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+from psycopg2 import sql
+
+# -------------------------------------------------------------------
+# Aggregate cube over GROUPING SETS
+# -------------------------------------------------------------------
+# Several `df.groupby(dim).agg(...)` passes with the same measures are
+# one `GROUP BY GROUPING SETS ((dim1), (dim2), ..., ())` in PostgreSQL.
+# Only the aggregate rows are transferred; the result is cached on the
+# Cube object and each groupby becomes a slice of it.
+
+_FUNCTIONS = {"count": "COUNT", "sum": "SUM", "mean": "AVG", "min": "MIN", "max": "MAX"}
+
+
+class Measure(NamedTuple):
+    name: str
+    func: str        # count, sum, mean, min, max (pandas names)
+    expression: str  # trusted SQL written in the scripts, e.g. "r.rating"
+
+
+class Cube:
+    """
+    One query computing every measure for each dimension on its own
+    plus the grand total. `source` is trusted SQL used after FROM.
+    """
+
+    def __init__(self, source: str, dimensions: Sequence[str], measures: Sequence[Measure]):
+        for m in measures:
+            if m.func not in _FUNCTIONS:
+                raise ValueError(f"Unknown aggregate '{m.func}' for measure '{m.name}'.")
+        self.source = source
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self._frames: Optional[Dict[str, pd.DataFrame]] = None
+        self._total: Optional[pd.Series] = None
+
+    def build_query(self) -> sql.Composed:
+        dims = [sql.SQL(d) for d in self.dimensions]
+        select: List[sql.Composable] = [sql.SQL("GROUPING({}) AS grp").format(sql.SQL(", ").join(dims))]
+        select += [sql.SQL("({})::text AS {}").format(d, sql.Identifier(f"k{i}")) for i, d in enumerate(dims)]
+        select += [
+            sql.SQL("{}({}) AS {}").format(sql.SQL(_FUNCTIONS[m.func]), sql.SQL(m.expression), sql.Identifier(m.name))
+            for m in self.measures
+        ]
+        sets = sql.SQL(", ").join(sql.SQL("({})").format(d) for d in dims)
+        return sql.SQL("SELECT {} FROM {} GROUP BY GROUPING SETS ({}, ());").format(
+            sql.SQL(", ").join(select), sql.SQL(self.source), sets
+        )
+
+    def fetch(self, cursor) -> "Cube":
+        cursor.execute(self.build_query())
+        rows = cursor.fetchall()
+
+        k = len(self.dimensions)
+        all_bits = (1 << k) - 1
+        names = [m.name for m in self.measures]
+        per_dim: Dict[str, List[tuple]] = {d: [] for d in self.dimensions}
+        total: Optional[tuple] = None
+
+        for row in rows:
+            grp, keys, values = row[0], row[1:1 + k], row[1 + k:]
+            values = tuple(None if v is None else float(v) for v in values)
+            if grp == all_bits:
+                total = values
+                continue
+            for i, dim in enumerate(self.dimensions):
+                if grp == all_bits & ~(1 << (k - 1 - i)):
+                    # Like pandas groupby, the NULL group is left out.
+                    if keys[i] is not None:
+                        per_dim[dim].append((keys[i],) + values)
+                    break
+
+        self._frames = {}
+        for i, dim in enumerate(self.dimensions):
+            frame = pd.DataFrame(per_dim[dim], columns=[self.label(dim)] + names).set_index(self.label(dim))
+            for m in self.measures:
+                if m.func == "count":
+                    frame[m.name] = frame[m.name].astype("int64")
+            self._frames[dim] = frame
+        self._total = pd.Series(total if total is not None else [0.0] * len(names), index=names)
+        return self
+
+    @staticmethod
+    def label(dimension: str) -> str:
+        """Index name for a dimension expression ("c.country" -> "country")."""
+        return dimension.rsplit(".", 1)[-1]
+
+    def _require(self) -> None:
+        if self._frames is None:
+            raise RuntimeError("Call fetch(cursor) before reading the cube.")
+
+    def by(self, dimension: str, measures: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        The groupby for one dimension. `measures` selects and renames
+        columns ({output name: measure name}); default is all measures.
+        """
+        self._require()
+        key = dimension if dimension in self._frames else next(
+            (d for d in self.dimensions if self.label(d) == dimension), None
+        )
+        if key is None:
+            raise KeyError(f"Dimension '{dimension}' is not part of the cube.")
+        frame = self._frames[key]
+        if measures is None:
+            return frame.copy()
+        return frame[list(measures.values())].set_axis(list(measures), axis=1)
+
+    @property
+    def total(self) -> pd.Series:
+        self._require()
+        return self._total
+
+
+RENTAL_SOURCE = """
+    public.movies m
+    LEFT JOIN public.rentings r ON r.movie_id = m.movie_id
+    LEFT JOIN public.customers c ON c.customer_id = r.customer_id
+"""
+
+
+def rental_cube() -> Cube:
+    """Genre / country / gender cube shared by the person5 and person7 reports."""
+    return Cube(
+        RENTAL_SOURCE,
+        ["m.genre", "c.country", "c.gender"],
+        [
+            Measure("rows", "count", "*"),
+            Measure("total_rentals", "count", "r.rating"),
+            Measure("avg_movie_rating", "mean", "m.avg_rating"),
+            Measure("avg_customer_rating", "mean", "r.rating"),
+            Measure("total_revenue", "sum", "m.renting_price"),
+        ],
+    )
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from functools import cached_property
+from typing import Any, Iterable, Tuple
+
+import numpy as np
+from psycopg2 import sql
+
+from server import get_connection
+from sampling import AliasSampler
+from nullable import NullableArray
+
+# -------------------------------------------------------------------
+# Discrete distributions built from GROUP BY counts
+# -------------------------------------------------------------------
+# The database does the counting (`GROUP BY value, COUNT(*)`), so only the
+# distinct values cross the wire no matter how large the table is. All
+# probabilities and moments are then computed on the K-sized support.
+# Built from raw observations instead, the same object is the empirical
+# CDF: one counting pass, then every P(X <= x), P(X >= x) or quantile
+# for a whole vector of thresholds is a single `searchsorted`.
+
+# Integer data with a range up to this many times the sample size is
+# counted with bincount (O(N + range)) instead of sorted (O(N log N)).
+_BINCOUNT_RANGE_FACTOR = 4
+
+RENTALS_PER_CUSTOMER_QUERY = """
+    SELECT rentals AS value, COUNT(*) AS n
+    FROM (
+        SELECT customer_id, COUNT(*) AS rentals
+        FROM public.rentings
+        GROUP BY customer_id
+    ) per_customer
+    GROUP BY rentals
+    ORDER BY rentals;
+"""
+
+
+def column_counts_query(table: str, column: str, schema: str = "public") -> sql.Composed:
+    """`SELECT column, COUNT(*) ... GROUP BY column` for any table/column (NULLs skipped)."""
+    return sql.SQL(
+        "SELECT {col} AS value, COUNT(*) AS n "
+        "FROM {tbl} "
+        "WHERE {col} IS NOT NULL "
+        "GROUP BY {col} "
+        "ORDER BY {col};"
+    ).format(col=sql.Identifier(column), tbl=sql.Identifier(schema, table))
+
+
+class DiscreteDistribution:
+    """
+    Finite discrete distribution given by (value, count) pairs.
+
+    Values are kept sorted so CDF / quantile lookups are a single
+    `searchsorted` for any vector of points.
+    """
+
+    def __init__(self, values: Any, counts: Any):
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.int64)
+        if values.ndim != 1 or values.shape != counts.shape:
+            raise ValueError("values and counts must be 1-D arrays of the same length.")
+        if np.any(counts < 0):
+            raise ValueError("counts must be non-negative.")
+
+        # Sort and merge duplicates so the support is strictly increasing.
+        support, inverse = np.unique(values, return_inverse=True)
+        self.values = support
+        self.counts = np.bincount(inverse, weights=counts, minlength=support.size).astype(np.int64)
+        self.total = int(self.counts.sum())
+
+    # ---------------------------------------------------------------
+    # Constructors
+    # ---------------------------------------------------------------
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Any, Any]]) -> "DiscreteDistribution":
+        """Rows of (value, count), as returned by a GROUP BY query."""
+        rows = [(v, n) for v, n in rows if v is not None]
+        if not rows:
+            return cls(np.empty(0), np.empty(0, dtype=np.int64))
+        values = np.fromiter((float(v) for v, _ in rows), dtype=np.float64, count=len(rows))
+        counts = np.fromiter((int(n) for _, n in rows), dtype=np.int64, count=len(rows))
+        return cls(values, counts)
+
+    @classmethod
+    def from_query(cls, cursor, query: Any) -> "DiscreteDistribution":
+        """Run a query returning (value, count) rows and build the distribution."""
+        cursor.execute(query)
+        return cls.from_rows(cursor.fetchall())
+
+    @classmethod
+    def from_column(cls, cursor, table: str, column: str, schema: str = "public") -> "DiscreteDistribution":
+        return cls.from_query(cursor, column_counts_query(table, column, schema))
+
+    @classmethod
+    def from_observations(cls, observations: Any) -> "DiscreteDistribution":
+        """Empirical distribution of data already in memory (NaN / None are dropped)."""
+        if isinstance(observations, NullableArray):
+            arr = observations.present()
+        else:
+            arr = np.asarray(observations if isinstance(observations, np.ndarray) else list(observations))
+            if arr.dtype == object:
+                arr = arr[np.asarray(arr != None, dtype=bool)].astype(np.float64)  # noqa: E711
+            if arr.dtype.kind == "f":
+                arr = arr[~np.isnan(arr)]
+                if arr.size and np.all(arr == np.floor(arr)):
+                    arr = arr.astype(np.int64)
+
+        if arr.size and arr.dtype.kind in "iub":
+            lo, hi = int(arr.min()), int(arr.max())
+            if hi - lo <= _BINCOUNT_RANGE_FACTOR * arr.size:
+                counts = np.bincount(arr.astype(np.int64) - lo)
+                values = np.flatnonzero(counts)
+                return cls(values + lo, counts[values])
+
+        values, counts = np.unique(arr, return_counts=True)
+        return cls(values, counts)
+
+    # ---------------------------------------------------------------
+    # Cached summary values
+    # ---------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        return int(self.values.size)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.total == 0
+
+    @cached_property
+    def probabilities(self) -> np.ndarray:
+        if self.total == 0:
+            return np.zeros(self.size, dtype=np.float64)
+        return self.counts / self.total
+
+    @cached_property
+    def cumulative(self) -> np.ndarray:
+        return np.cumsum(self.probabilities)
+
+    @cached_property
+    def _cum_counts(self) -> np.ndarray:
+        # Leading 0 so searchsorted positions index it directly.
+        return np.concatenate(([0], np.cumsum(self.counts)))
+
+    def _share(self, counts: np.ndarray) -> np.ndarray:
+        if self.total == 0:
+            return np.zeros(np.shape(counts), dtype=np.float64)
+        return counts / self.total
+
+    @cached_property
+    def mean(self) -> float:
+        """E[X] = Σ x · P(X = x)"""
+        if self.total == 0:
+            return float("nan")
+        return float(np.dot(self.values, self.probabilities))
+
+    @cached_property
+    def variance(self) -> float:
+        """Var[X] = Σ (x − μ)² · P(X = x)"""
+        if self.total == 0:
+            return float("nan")
+        deviations = self.values - self.mean
+        return float(np.dot(deviations ** 2, self.probabilities))
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    # ---------------------------------------------------------------
+    # Vectorized evaluation
+    # ---------------------------------------------------------------
+    def pmf(self, x: Any) -> np.ndarray:
+        """P(X = x) for scalar or array x."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.size == 0:
+            return np.zeros(x.shape, dtype=np.float64)
+        idx = np.clip(np.searchsorted(self.values, x), 0, self.size - 1)
+        return np.where(self.values[idx] == x, self.probabilities[idx], 0.0)
+
+    def cdf(self, x: Any) -> np.ndarray:
+        """P(X ≤ x)"""
+        idx = np.searchsorted(self.values, np.asarray(x, dtype=np.float64), side="right")
+        return self._share(self._cum_counts[idx])
+
+    def sf(self, x: Any) -> np.ndarray:
+        """Survival function P(X > x)"""
+        idx = np.searchsorted(self.values, np.asarray(x, dtype=np.float64), side="right")
+        return self._share(self.total - self._cum_counts[idx])
+
+    def at_least(self, x: Any) -> np.ndarray:
+        """P(X ≥ x)"""
+        return self._share(self.count_at_least(x))
+
+    def below(self, x: Any) -> np.ndarray:
+        """P(X < x)"""
+        idx = np.searchsorted(self.values, np.asarray(x, dtype=np.float64), side="left")
+        return self._share(self._cum_counts[idx])
+
+    def count_at_least(self, x: Any) -> np.ndarray:
+        """Number of observations ≥ x (exact integers, for a/b style output)."""
+        idx = np.searchsorted(self.values, np.asarray(x, dtype=np.float64), side="left")
+        return self.total - self._cum_counts[idx]
+
+    def quantile(self, q: Any) -> np.ndarray:
+        """Smallest support value x with P(X ≤ x) ≥ q."""
+        q = np.asarray(q, dtype=np.float64)
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError("Quantile levels must be between 0 and 1.")
+        if self.size == 0:
+            return np.full(q.shape, np.nan)
+        # Compare in count space to avoid rounding in the cumulative shares.
+        idx = np.searchsorted(self._cum_counts[1:], q * self.total, side="left")
+        return self.values[np.minimum(idx, self.size - 1)]
+
+    def to_sampler(self) -> AliasSampler:
+        return AliasSampler(self.values, self.counts)
+
+    def __repr__(self) -> str:
+        return f"DiscreteDistribution(support={self.size}, total={self.total}, mean={self.mean:.3f})"
+
+
+def ecdf(observations: Any) -> DiscreteDistribution:
+    """Empirical CDF / survival function of in-memory observations."""
+    return DiscreteDistribution.from_observations(observations)
+
+
+def load_distribution(query: Any) -> DiscreteDistribution:
+    """Open a connection, run a (value, count) query and close it again."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            return DiscreteDistribution.from_query(cur, query)
+    finally:
+        conn.close()
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from categorical import Categorical
+from nullable import NullableArray
+
+# -------------------------------------------------------------------
+# Event expressions compiled to cached NumPy masks
+# -------------------------------------------------------------------
+# Instead of hand-writing masks such as
+#     valid_runtime & (runtime >= 100) & (runtime < 120)
+# scripts ask questions in a small expression language:
+#     space.P("rating >= 4 | genre == 'Comedy' & runtime > 100")
+#
+# Grammar (lowest to highest precedence):
+#     query      := expr [ '|' expr ]          '|' means "given"
+#     expr       := term { ('or') term }
+#     term       := factor { ('&' | 'and') factor }
+#     factor     := ('~' | 'not') factor | '(' expr ')' | predicate
+#     predicate  := column op literal
+#                 | column 'in' '(' literal {',' literal} ')'
+#                 | column 'is' ['not'] 'null'
+#
+# Each expression is parsed once (lru_cache). Every node has a canonical
+# key, and evaluated masks are memoized per key, so sub-predicates shared
+# between queries (e.g. "rating >= 4") are computed only once.
+# Missing values (NaN / None) never satisfy a comparison.
+
+Node = Tuple[Any, ...]
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<num>-?\d+(?:\.\d+)?)"
+    r"|(?P<str>'(?:[^']|'')*'|\"[^\"]*\")"
+    r"|(?P<op>==|!=|<=|>=|<|>|=)"
+    r"|(?P<punct>[()&|~,])"
+    r"|(?P<name>[A-Za-z_][A-Za-z_0-9]*)"
+    r")"
+)
+
+_KEYWORDS = {"and", "or", "not", "in", "is", "null"}
+
+
+class EventSyntaxError(ValueError):
+    pass
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    tokens: List[Tuple[str, Any]] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise EventSyntaxError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "num":
+            tokens.append(("lit", float(value) if "." in value else int(value)))
+        elif kind == "str":
+            quote = value[0]
+            tokens.append(("lit", value[1:-1].replace(quote * 2, quote)))
+        elif kind == "op":
+            tokens.append(("op", "==" if value == "=" else value))
+        elif kind == "name" and value.lower() in _KEYWORDS:
+            tokens.append(("kw", value.lower()))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self) -> Optional[Tuple[str, Any]]:
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def take(self, kind: Optional[str] = None, value: Any = None) -> Tuple[str, Any]:
+        tok = self.peek()
+        if tok is None or (kind and tok[0] != kind) or (value is not None and tok[1] != value):
+            raise EventSyntaxError(f"Expected {value or kind} in {self.text!r}, got {tok}")
+        self.i += 1
+        return tok
+
+    def accept(self, kind: str, value: Any) -> bool:
+        tok = self.peek()
+        if tok is not None and tok[0] == kind and tok[1] == value:
+            self.i += 1
+            return True
+        return False
+
+    def query(self) -> Tuple[Node, Optional[Node]]:
+        event = self.expr()
+        given = self.expr() if self.accept("punct", "|") else None
+        if self.peek() is not None:
+            raise EventSyntaxError(f"Unexpected {self.peek()} in {self.text!r}")
+        return event, given
+
+    def expr(self) -> Node:
+        node = self.term()
+        while self.accept("kw", "or"):
+            node = ("or", node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.factor()
+        while self.accept("punct", "&") or self.accept("kw", "and"):
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self) -> Node:
+        if self.accept("punct", "~") or self.accept("kw", "not"):
+            return ("not", self.factor())
+        if self.accept("punct", "("):
+            node = self.expr()
+            self.take("punct", ")")
+            return node
+        return self.predicate()
+
+    def predicate(self) -> Node:
+        column = self.take("name")[1]
+        if self.accept("kw", "in"):
+            self.take("punct", "(")
+            values = [self.take("lit")[1]]
+            while self.accept("punct", ","):
+                values.append(self.take("lit")[1])
+            self.take("punct", ")")
+            return ("in", column, tuple(values))
+        if self.accept("kw", "is"):
+            negate = self.accept("kw", "not")
+            self.take("kw", "null")
+            node: Node = ("null", column)
+            return ("not", node) if negate else node
+        op = self.take("op")[1]
+        return ("cmp", column, op, self.take("lit")[1])
+
+
+@lru_cache(maxsize=1024)
+def parse_query(text: str) -> Tuple[Node, Optional[Node]]:
+    """Parse 'A' or 'A | B' into (event, given) syntax trees."""
+    return _Parser(text).query()
+
+
+def parse_expression(text: str) -> Node:
+    event, given = parse_query(text)
+    if given is not None:
+        raise EventSyntaxError(f"'|' (given) is only allowed in probability queries: {text!r}")
+    return event
+
+
+def node_key(node: Node) -> str:
+    """Canonical text of a node; AND/OR operands are sorted so A & B == B & A."""
+    kind = node[0]
+    if kind == "cmp":
+        return f"{node[1]} {node[2]} {node[3]!r}"
+    if kind == "in":
+        return f"{node[1]} in {tuple(sorted(node[2], key=repr))!r}"
+    if kind == "null":
+        return f"{node[1]} is null"
+    if kind == "not":
+        return f"not ({node_key(node[1])})"
+    left, right = sorted((node_key(node[1]), node_key(node[2])))
+    return f"({left}) {kind} ({right})"
+
+
+_COMPARE = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+class EventSpace:
+    """
+    Columns of a fact table (one row per renting) + memoized event masks.
+
+    All columns must have the same length. Float columns use NaN and
+    object columns use None for missing values; NullableArray columns
+    carry their own validity mask. Categorical columns are compared on
+    their dictionary, then mapped to rows through the codes.
+    """
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = {
+            name: values if isinstance(values, (Categorical, NullableArray)) else np.asarray(values)
+            for name, values in columns.items()
+        }
+        sizes = {len(arr) for arr in self.columns.values()}
+        if len(sizes) > 1:
+            raise ValueError("All columns must have the same length.")
+        self.n = sizes.pop() if sizes else 0
+        self._masks: Dict[str, np.ndarray] = {}
+        self._present: Dict[str, np.ndarray] = {}
+
+    # ---------------------------------------------------------------
+    # Mask evaluation
+    # ---------------------------------------------------------------
+    def _column(self, name: str) -> Any:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError(f"Unknown column '{name}'. Available: {', '.join(self.columns)}") from None
+
+    def present(self, name: str) -> np.ndarray:
+        """Rows where the column is not NULL/NaN (cached)."""
+        if name not in self._present:
+            col = self._column(name)
+            if isinstance(col, Categorical):
+                mask = ~col.missing
+            elif isinstance(col, NullableArray):
+                mask = col.valid
+            elif col.dtype.kind == "f":
+                mask = ~np.isnan(col)
+            elif col.dtype == object:
+                mask = np.asarray(col != None, dtype=bool)  # noqa: E711
+            else:
+                mask = np.ones(col.shape, dtype=bool)
+            self._present[name] = mask
+        return self._present[name]
+
+    def _evaluate(self, node: Node) -> np.ndarray:
+        key = node_key(node)
+        cached = self._masks.get(key)
+        if cached is not None:
+            return cached
+
+        kind = node[0]
+        if kind == "cmp":
+            _, name, op, value = node
+            col = self._column(name)
+            present = self.present(name)
+            with np.errstate(invalid="ignore"):
+                if isinstance(col, Categorical):
+                    result = col.where(_COMPARE[op](col.categories, value))
+                elif isinstance(col, NullableArray):
+                    result = _COMPARE[op](col.values, value) & present
+                elif col.dtype == object:
+                    result = np.zeros(col.shape, dtype=bool)
+                    result[present] = np.asarray(_COMPARE[op](col[present], value), dtype=bool)
+                else:
+                    result = _COMPARE[op](col, value) & present
+        elif kind == "in":
+            _, name, values = node
+            col = self._column(name)
+            present = self.present(name)
+            if isinstance(col, Categorical):
+                result = col.isin(values)
+            elif isinstance(col, NullableArray):
+                result = np.isin(col.values, list(values)) & present
+            else:
+                result = np.isin(col, list(values)) & present
+        elif kind == "null":
+            result = ~self.present(node[1])
+        elif kind == "not":
+            result = ~self._evaluate(node[1])
+        elif kind == "and":
+            result = self._evaluate(node[1]) & self._evaluate(node[2])
+        else:
+            result = self._evaluate(node[1]) | self._evaluate(node[2])
+
+        self._masks[key] = result
+        return result
+
+    def mask(self, expression: Union[str, Node]) -> np.ndarray:
+        node = parse_expression(expression) if isinstance(expression, str) else expression
+        return self._evaluate(node)
+
+    def count(self, expression: str) -> int:
+        return int(np.count_nonzero(self.mask(expression)))
+
+    # ---------------------------------------------------------------
+    # Probabilities
+    # ---------------------------------------------------------------
+    def counts(self, query: str) -> Tuple[int, int]:
+        """(|A ∩ B|, |B|) for 'A | B', or (|A|, n) for 'A'."""
+        event, given = parse_query(query)
+        a = self._evaluate(event)
+        if given is None:
+            return int(np.count_nonzero(a)), self.n
+        b = self._evaluate(given)
+        return int(np.count_nonzero(a & b)), int(np.count_nonzero(b))
+
+    def P(self, query: str) -> float:
+        """P(A) or P(A | B); NaN when the conditioning event is empty."""
+        favorable, total = self.counts(query)
+        return favorable / total if total else float("nan")
+
+    def batch(self, queries: Iterable[str]) -> Dict[str, float]:
+        return {q: self.P(q) for q in queries}
+
+    def clear_cache(self) -> None:
+        self._masks.clear()
+
+    @property
+    def cached_masks(self) -> int:
+        return len(self._masks)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from categorical import Categorical
+from nullable import convert
+
+# -------------------------------------------------------------------
+# Typed DataFrame loading
+# -------------------------------------------------------------------
+# `pd.DataFrame(cursor.fetchall())` leaves NUMERIC columns as object
+# columns full of Decimal and text columns as Python strings, which is
+# why the scripts needed `pd.to_numeric(..., errors="coerce")` later.
+# Here every column is converted once with an explicit dtype:
+# category for low-cardinality text, nullable Int16/Int32 for whole
+# numbers (NULL stays <NA>, no float upcast) and float32 for ratings.
+# Prices stay float64: revenue sums in float32 drift by a few cents.
+
+DEFAULT_SCHEMA: Dict[str, str] = {
+    "movie_id": "Int32",
+    "customer_id": "Int32",
+    "renting_id": "Int32",
+    "actor_id": "Int32",
+    "genre": "category",
+    "country": "category",
+    "gender": "category",
+    "runtime": "Int16",
+    "year_of_release": "Int16",
+    "rating": "float32",
+    "avg_rating": "float32",
+    "renting_price": "float64",
+}
+
+_INT_DTYPES = {"Int8": np.int8, "Int16": np.int16, "Int32": np.int32, "Int64": np.int64}
+_FLOAT_DTYPES = {"float32": np.float32, "float64": np.float64}
+
+
+def to_series(values: Any, dtype: Optional[str], name: str) -> pd.Series:
+    """One DB column (list of Python values, None = NULL) as a typed Series."""
+    if dtype == "category":
+        cat = Categorical.from_values(values)
+        data = pd.Categorical.from_codes(cat.codes, categories=list(cat.categories))
+    elif dtype in _INT_DTYPES:
+        col = convert(values, "int")
+        data = pd.arrays.IntegerArray(col.values.astype(_INT_DTYPES[dtype]), ~col.valid)
+    elif dtype in _FLOAT_DTYPES:
+        data = convert(values, "float").to_float().astype(_FLOAT_DTYPES[dtype])
+    else:
+        data = pd.array(values, dtype=dtype) if dtype else values
+    return pd.Series(data, name=name)
+
+
+def fetch_dataframe(
+    cursor,
+    query: Any,
+    schema: Optional[Dict[str, str]] = None,
+    params: Optional[Any] = None,
+) -> pd.DataFrame:
+    """
+    Run a query and build the DataFrame column by column.
+
+    `schema` overrides/extends DEFAULT_SCHEMA (column name -> dtype);
+    columns not listed keep pandas' own inference.
+    """
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    names = [desc[0] for desc in cursor.description]
+    types = {**DEFAULT_SCHEMA, **(schema or {})}
+
+    columns = {
+        name: to_series([row[i] for row in rows], types.get(name), name)
+        for i, name in enumerate(names)
+    }
+    return pd.DataFrame(columns, columns=names)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True).sum()) / (1024 ** 2)
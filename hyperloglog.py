@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+from typing import Any, Iterable
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# HyperLogLog distinct counting
+# -------------------------------------------------------------------
+# `np.unique(ids).size` sorts every id to count the distinct ones.
+# A HyperLogLog sketch keeps 2**p one-byte registers instead (4 KB at
+# p=12) and estimates the distinct count with a relative standard error
+# of 1.04 / sqrt(2**p) (1.6% at p=12). Each id is hashed to 64 bits:
+# the top p bits pick a register, which remembers the longest run of
+# trailing zero bits seen in the rest. Registers only ever grow, so a
+# sketch can be updated batch by batch, saved, and merged with the
+# sketch of another segment (register-wise max = union of the sets).
+#
+# Use it where an approximate count is enough (dashboards, very large
+# tables); the scripts keep the exact np.unique path next to it.
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Vectorized 64-bit mixer for integer ids (wraps modulo 2**64)."""
+    z = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def hash64(values: Any) -> np.ndarray:
+    """uint64 hash per value; integers are mixed in NumPy, others via blake2b."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iub":
+        with np.errstate(over="ignore"):
+            return _splitmix64(arr.astype(np.int64).view(np.uint64))
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(v).encode(), digest_size=8).digest(), "little") for v in arr.tolist()),
+        dtype=np.uint64,
+        count=arr.size,
+    )
+
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter with 2**p registers."""
+
+    def __init__(self, p: int = 12):
+        if not 4 <= p <= 18:
+            raise ValueError("p must be between 4 and 18.")
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any], p: int = 12) -> "HyperLogLog":
+        return cls(p).update(values)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of estimate()."""
+        return 1.04 / math.sqrt(self.m)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.registers.nbytes)
+
+    def update(self, values: Iterable[Any]) -> "HyperLogLog":
+        """Add a batch of values (NULLs should be removed beforehand)."""
+        h = hash64(values if isinstance(values, np.ndarray) else list(values))
+        if h.size == 0:
+            return self
+        q = 64 - self.p
+        index = (h >> np.uint64(q)).astype(np.intp)
+        rest = h & np.uint64((1 << q) - 1)
+        # Lowest set bit isolated (an exact power of two), then its position.
+        lowest = rest & (~rest + np.uint64(1))
+        rank = np.where(rest == 0, q + 1, np.log2(np.maximum(lowest, 1).astype(np.float64)) + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Union with another sketch of the same precision (in place)."""
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with p={self.p} and p={other.p}.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction: linear counting on the empty registers.
+            return m * math.log(m / zeros)
+        return raw
+
+    def __len__(self) -> int:
+        return int(round(self.estimate()))
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, p=np.int64(self.p), registers=self.registers)
+
+    @classmethod
+    def load(cls, path: str) -> "HyperLogLog":
+        with np.load(path) as data:
+            sketch = cls(int(data["p"]))
+            sketch.registers[:] = data["registers"]
+        return sketch
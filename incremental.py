@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import os
+import zipfile
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from frames import fetch_dataframe
+
+# -------------------------------------------------------------------
+# Incrementally refreshed rental summary
+# -------------------------------------------------------------------
+# The person7 figures are sums and counts per genre / country / gender
+# over `movies LEFT JOIN rentings LEFT JOIN customers` (the same measures
+# as cube.rental_cube()). Only the renting side is kept between runs:
+# rows, rated rows and rating sum per (movie_id, country, gender) cell.
+# A refresh applies the log_activity entries for rentings written since
+# the last run (the Part 2 triggers log the old / new row of every
+# insert, update and delete), so it reads O(changes), not O(rentings).
+#
+# Movie attributes (genre, avg_rating, renting_price) are not stored:
+# avg_rating is rewritten by the review triggers, so movies are read and
+# joined to the cells on every refresh. Customer attributes are resolved
+# when a change is applied and assumed not to change afterwards.
+#
+# Without a log_activity table every refresh is a full rebuild. Use
+# rebuild=True (person7 --full) after editing customers or when the log
+# was trimmed past the last refresh.
+
+MEASURES = ["rows", "total_rentals", "rating_sum", "movie_rating_sum", "movie_rating_n", "total_revenue"]
+DIMENSIONS = ["genre", "country", "gender"]
+
+CELL_KEYS = ["movie_id", "country", "gender"]
+CELL_MEASURES = ["rows", "total_rentals", "rating_sum"]
+
+# log_id comes from a sequence, handed out at insert rather than at
+# commit, so a transaction can commit an id below the mark after the
+# last run. Entries this far below the mark are re-read and the ones
+# already applied are skipped.
+LOOKBACK = 1000
+
+# Bumped when the saved layout changes; older files are rebuilt.
+STATE_VERSION = 2
+
+# Values that are summed are read as float64 (frames reads ratings as
+# float32, which drifts once thousands of them are added up).
+_SUM_SCHEMA = {"avg_rating": "float64", "renting_price": "float64"}
+
+_LOG_COLUMNS = [
+    "log_id", "action_type",
+    "old_movie_id", "old_country", "old_gender", "old_rating",
+    "new_movie_id", "new_country", "new_gender", "new_rating",
+]
+
+
+def _empty_cells() -> pd.DataFrame:
+    return pd.DataFrame({
+        "movie_id": pd.Series(dtype="int64"),
+        "country": pd.Series(dtype=object),
+        "gender": pd.Series(dtype=object),
+        "rows": pd.Series(dtype="float64"),
+        "total_rentals": pd.Series(dtype="float64"),
+        "rating_sum": pd.Series(dtype="float64"),
+    })
+
+
+def _nulls_to_none(values: pd.Series) -> pd.Series:
+    return values.astype(object).where(values.notna(), None)
+
+
+class IncrementalSummary:
+    """Persisted renting sums per (movie, country, gender) with a log_id high-water mark."""
+
+    def __init__(self):
+        self.cells = _empty_cells()
+        self.last_log_id = 0
+        self.applied_log_ids = np.empty(0, dtype="int64")
+        self.groups: Dict[str, pd.DataFrame] = {d: pd.DataFrame(columns=MEASURES, dtype="float64") for d in DIMENSIONS}
+        self.totals = pd.Series(0.0, index=MEASURES)
+        self.last_delta = {"rebuilt": False, "new_rentings": 0, "updated": 0, "deleted": 0}
+
+    # ---------------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------------
+    def save(self, path: str) -> None:
+        """Write the cells and log position as plain arrays (.npz, no pickle)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        country_codes, countries = pd.factorize(self.cells["country"])
+        gender_codes, genders = pd.factorize(self.cells["gender"])
+        with open(path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                version=np.int64(STATE_VERSION),
+                movie_id=self.cells["movie_id"].to_numpy(dtype="int64"),
+                country_code=country_codes.astype("int32"),
+                countries=np.asarray(countries, dtype=str),
+                gender_code=gender_codes.astype("int32"),
+                genders=np.asarray(genders, dtype=str),
+                rows=self.cells["rows"].to_numpy(dtype="float64"),
+                total_rentals=self.cells["total_rentals"].to_numpy(dtype="float64"),
+                rating_sum=self.cells["rating_sum"].to_numpy(dtype="float64"),
+                last_log_id=np.int64(self.last_log_id),
+                applied_log_ids=self.applied_log_ids.astype("int64"),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalSummary":
+        """Read a saved state; groups stay empty until the next refresh()."""
+        summary = cls()
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != STATE_VERSION:
+                raise ValueError(f"{path}: state version {int(data['version'])}, expected {STATE_VERSION}")
+            countries = pd.Categorical.from_codes(data["country_code"], categories=list(data["countries"]))
+            genders = pd.Categorical.from_codes(data["gender_code"], categories=list(data["genders"]))
+            summary.cells = pd.DataFrame({
+                "movie_id": data["movie_id"].astype("int64"),
+                "country": _nulls_to_none(pd.Series(countries)),
+                "gender": _nulls_to_none(pd.Series(genders)),
+                "rows": data["rows"].astype("float64"),
+                "total_rentals": data["total_rentals"].astype("float64"),
+                "rating_sum": data["rating_sum"].astype("float64"),
+            })
+            summary.last_log_id = int(data["last_log_id"])
+            summary.applied_log_ids = data["applied_log_ids"].astype("int64")
+        return summary
+
+    @classmethod
+    def load_or_build(cls, cursor, path: str, rebuild: bool = False) -> "IncrementalSummary":
+        """Load the saved state (or start empty), refresh it and save it again."""
+        summary = None
+        if not rebuild and os.path.exists(path):
+            try:
+                summary = cls.load(path)
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+                summary = None
+        if summary is None:
+            summary = cls()
+            summary.rebuild(cursor)
+        else:
+            summary.refresh(cursor)
+        summary.save(path)
+        return summary
+
+    # ---------------------------------------------------------------
+    # Renting cells
+    # ---------------------------------------------------------------
+    @staticmethod
+    def _has_log(cursor) -> bool:
+        cursor.execute("SELECT to_regclass('public.log_activity') IS NOT NULL;")
+        return bool(cursor.fetchone()[0])
+
+    def _add_cells(self, delta: pd.DataFrame) -> None:
+        """Add signed cell rows; cells whose row count drops to 0 are removed."""
+        if delta.empty:
+            return
+        merged = pd.concat([self.cells, delta], ignore_index=True) if not self.cells.empty else delta
+        merged = merged.groupby(CELL_KEYS, dropna=False, sort=False)[CELL_MEASURES].sum().reset_index()
+        merged = merged[merged["rows"].round() != 0].copy()
+        merged["movie_id"] = merged["movie_id"].astype("int64")
+        merged["country"] = _nulls_to_none(merged["country"])
+        merged["gender"] = _nulls_to_none(merged["gender"])
+        self.cells = merged.reset_index(drop=True)
+
+    def rebuild(self, cursor) -> "IncrementalSummary":
+        """Aggregate all rentings and take the log position from the same snapshot."""
+        cells_sql = """
+            SELECT r.movie_id, c.country, c.gender,
+                   count(*)::float8, count(r.rating)::float8, coalesce(sum(r.rating), 0)::float8,
+                   NULL::bigint
+            FROM public.rentings r
+            LEFT JOIN public.customers c ON c.customer_id = r.customer_id
+            WHERE r.movie_id IS NOT NULL
+            GROUP BY 1, 2, 3
+        """
+        if self._has_log(cursor):
+            # One statement, so the rentings and the log ids it already
+            # contains come from the same snapshot.
+            cursor.execute(
+                cells_sql
+                + """
+            UNION ALL
+            SELECT NULL, NULL, NULL, NULL, NULL, NULL, l.log_id
+            FROM public.log_activity l
+            WHERE l.table_name = 'rentings'
+              AND l.log_id > (SELECT coalesce(max(log_id), 0) FROM public.log_activity
+                              WHERE table_name = 'rentings') - %s;
+            """,
+                (LOOKBACK,),
+            )
+        else:
+            cursor.execute(cells_sql + ";")
+        rows = pd.DataFrame(cursor.fetchall(), columns=CELL_KEYS + CELL_MEASURES + ["log_id"])
+
+        is_log = rows["log_id"].notna()
+        seen = rows.loc[is_log, "log_id"].to_numpy(dtype="int64")
+        self.cells = _empty_cells()
+        self._add_cells(rows.loc[~is_log, CELL_KEYS + CELL_MEASURES].astype({m: "float64" for m in CELL_MEASURES}))
+        self.last_log_id = int(seen.max()) if len(seen) else 0
+        self.applied_log_ids = np.sort(seen)
+        self.last_delta = {"rebuilt": True, "new_rentings": 0, "updated": 0, "deleted": 0}
+        self._build_groups(cursor)
+        return self
+
+    def _log_entries(self, cursor) -> pd.DataFrame:
+        """Renting log entries from LOOKBACK below the mark that were not applied yet."""
+        cursor.execute(
+            """
+            SELECT l.log_id, upper(l.action_type),
+                   (l.old_row ->> 'movie_id')::int, oc.country, oc.gender, (l.old_row ->> 'rating')::float8,
+                   (l.new_row ->> 'movie_id')::int, nc.country, nc.gender, (l.new_row ->> 'rating')::float8
+            FROM public.log_activity l
+            LEFT JOIN public.customers oc ON oc.customer_id = (l.old_row ->> 'customer_id')::int
+            LEFT JOIN public.customers nc ON nc.customer_id = (l.new_row ->> 'customer_id')::int
+            WHERE l.table_name = 'rentings' AND l.log_id > %s
+            ORDER BY l.log_id;
+            """,
+            (max(self.last_log_id - LOOKBACK, 0),),
+        )
+        log = pd.DataFrame(cursor.fetchall(), columns=_LOG_COLUMNS)
+        return log[~log["log_id"].isin(self.applied_log_ids)]
+
+    @staticmethod
+    def _side(log: pd.DataFrame, prefix: str, sign: float) -> pd.DataFrame:
+        """The old (sign -1) or new (sign +1) row images as signed cell rows."""
+        side = log[log[f"{prefix}movie_id"].notna()]
+        rating = side[f"{prefix}rating"].to_numpy(dtype="float64", na_value=np.nan)
+        return pd.DataFrame({
+            "movie_id": side[f"{prefix}movie_id"].to_numpy(dtype="int64"),
+            "country": side[f"{prefix}country"].to_numpy(dtype=object),
+            "gender": side[f"{prefix}gender"].to_numpy(dtype=object),
+            "rows": sign,
+            "total_rentals": sign * (~np.isnan(rating)).astype("float64"),
+            "rating_sum": sign * np.nan_to_num(rating),
+        })
+
+    def refresh(self, cursor) -> "IncrementalSummary":
+        """Apply the renting changes logged since the last refresh."""
+        if not self._has_log(cursor):
+            return self.rebuild(cursor)
+
+        log = self._log_entries(cursor)
+        self._add_cells(pd.concat([self._side(log, "old_", -1.0), self._side(log, "new_", +1.0)], ignore_index=True))
+
+        if not log.empty:
+            self.last_log_id = max(self.last_log_id, int(log["log_id"].max()))
+        applied = np.union1d(self.applied_log_ids, log["log_id"].to_numpy(dtype="int64"))
+        self.applied_log_ids = applied[applied > self.last_log_id - LOOKBACK]
+
+        actions = log["action_type"].value_counts()
+        self.last_delta = {
+            "rebuilt": False,
+            "new_rentings": int(actions.get("INSERT", 0)),
+            "updated": int(actions.get("UPDATE", 0)),
+            "deleted": int(actions.get("DELETE", 0)),
+        }
+        self._build_groups(cursor)
+        return self
+
+    # ---------------------------------------------------------------
+    # Report-time join with movies
+    # ---------------------------------------------------------------
+    def _build_groups(self, cursor) -> None:
+        movies = fetch_dataframe(
+            cursor,
+            "SELECT movie_id, genre, avg_rating, renting_price FROM public.movies;",
+            schema=_SUM_SCHEMA,
+        )
+        movies = pd.DataFrame({
+            "movie_id": movies["movie_id"].to_numpy(dtype="int64", na_value=-1),
+            "genre": _nulls_to_none(movies["genre"].astype(object)),
+            "avg_rating": movies["avg_rating"].to_numpy(dtype="float64", na_value=np.nan),
+            "renting_price": movies["renting_price"].to_numpy(dtype="float64", na_value=np.nan),
+        })
+
+        # Rentings of movies that no longer exist drop out, as in the join.
+        rented = self.cells.merge(movies, on="movie_id", how="inner")
+        # A movie without rentings is one row with NULL rating / customer.
+        unrented = movies[~movies["movie_id"].isin(rented["movie_id"])].assign(
+            country=None, gender=None, rows=1.0, total_rentals=0.0, rating_sum=0.0,
+        )
+        rows = pd.concat([rented, unrented], ignore_index=True) if not unrented.empty else rented
+
+        avg = rows["avg_rating"].to_numpy(dtype="float64")
+        rows["movie_rating_sum"] = rows["rows"] * np.nan_to_num(avg)
+        rows["movie_rating_n"] = rows["rows"] * (~np.isnan(avg)).astype("float64")
+        rows["total_revenue"] = rows["rows"] * np.nan_to_num(rows["renting_price"].to_numpy(dtype="float64"))
+
+        self.totals = rows[MEASURES].sum().astype("float64")
+        # groupby drops NULL keys, like the cube and pandas.
+        self.groups = {dim: rows.groupby(dim)[MEASURES].sum() for dim in DIMENSIONS}
+
+    # ---------------------------------------------------------------
+    # Cube-compatible reads
+    # ---------------------------------------------------------------
+    @property
+    def high_water_mark(self) -> int:
+        return self.last_log_id
+
+    @staticmethod
+    def _report(sums: pd.DataFrame) -> pd.DataFrame:
+        out = pd.DataFrame(index=sums.index)
+        out["rows"] = sums["rows"].round().astype("int64")
+        out["total_rentals"] = sums["total_rentals"].round().astype("int64")
+        out["avg_movie_rating"] = sums["movie_rating_sum"] / sums["movie_rating_n"].where(sums["movie_rating_n"] > 0)
+        out["avg_customer_rating"] = sums["rating_sum"] / sums["total_rentals"].where(sums["total_rentals"] > 0)
+        out["total_revenue"] = sums["total_revenue"]
+        return out
+
+    def by(self, dimension: str, measures: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Same shape as Cube.by(): one row per group, groups with no rows dropped."""
+        if dimension not in self.groups:
+            raise KeyError(f"Dimension '{dimension}' is not part of the summary.")
+        sums = self.groups[dimension]
+        frame = self._report(sums[sums["rows"].round() > 0])
+        frame.index.name = dimension
+        if measures is None:
+            return frame
+        return frame[list(measures.values())].set_axis(list(measures), axis=1)
+
+    @property
+    def total(self) -> pd.Series:
+        return self._report(self.totals.to_frame().T).iloc[0]
@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import ast
+import re
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from psycopg2 import Error as PsycopgError
+
+# -------------------------------------------------------------------
+# Index advisor
+# -------------------------------------------------------------------
+# Collects the project's query workload (every literal query passed to
+# _fetch_all / run_query in server.py, plus the SELECTs in SQL/Part 5
+# and part_6_report), EXPLAINs it against the current schema and reads
+# the plans for sequential scans that filter or join on a column:
+#   - col = constant, or a range on a high-cardinality column -> B-tree,
+#   - a range on a low-cardinality column (rating >= 4) -> partial index,
+#   - a join column of a seq-scanned table -> B-tree, with the few other
+#     columns the query reads from that table as INCLUDE (covering), so
+#     the join can become an index-only scan.
+# Candidates already served by an index with the same leading column
+# (and predicate) are dropped. The proposed indexes are then created in
+# the same transaction and each query is timed before and after with
+# EXPLAIN ANALYZE. Nothing is kept unless --apply is given.
+#
+#   python index_advisor.py              dry run (rolled back)
+#   python index_advisor.py --apply      keep the proposed indexes
+#   python index_advisor.py --scale 20   dry run on 20x the rentings
+#
+# SQL/Part 7 Indexes.sql is the index pack this produced for the
+# project's workload.
+
+BASE_DIR = Path(__file__).resolve().parent
+PYTHON_SOURCES = ["server.py"]
+SQL_SOURCES = ["SQL/Part 5 Analytical Queries.sql", "SQL/part_6_report.sql"]
+QUERY_FUNCTIONS = {"_fetch_all": 0, "run_query": 1}  # name -> position of the query argument
+
+# Columns with at most this many distinct values get partial indexes for
+# range filters instead of a plain B-tree.
+LOW_CARDINALITY = 20
+# Columns rewritten by the Part 2 triggers (avg_rating on every review
+# statement). No index may contain them, as key, INCLUDE or partial
+# predicate: each one would be updated too and the updates could no
+# longer be HOT. Part 7 leaves them unindexed for the same reason.
+TRIGGER_MAINTAINED = {("movies", "avg_rating")}
+# A covering index INCLUDEs at most this many extra columns.
+MAX_INCLUDE = 3
+REPEAT = 5
+
+_OPERATOR_NAMES = {"=": "eq", "<>": "ne", ">=": "ge", "<=": "le", ">": "gt", "<": "lt"}
+_COMPARISON = re.compile(
+    r"\b(\w+)\.(\w+)\s*(=|<>|>=|<=|>|<)\s*('(?:[^']|'')*'(?:::[\w ]+)?|-?\d+(?:\.\d+)?)"
+)
+_JOIN = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)\b")
+_PARAM = re.compile(r"%s")
+
+
+class Query(NamedTuple):
+    label: str  # file:line
+    sql: str
+
+
+class IndexCandidate(NamedTuple):
+    table: str
+    columns: Tuple[str, ...]
+    include: Tuple[str, ...] = ()
+    predicate: Optional[str] = None
+    reason: str = ""
+
+    @property
+    def name(self) -> str:
+        parts = ["idx", self.table, *self.columns]
+        if self.predicate:
+            suffix = re.sub(r"\W+", "_", _named_operators(self.predicate)).strip("_")
+            parts.append(suffix[len(self.columns[-1]) + 1:] if suffix.startswith(self.columns[-1] + "_") else suffix)
+        return "_".join(parts)[:63]
+
+    def ddl(self) -> str:
+        sql = f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+        if self.include:
+            sql += f" INCLUDE ({', '.join(self.include)})"
+        if self.predicate:
+            sql += f" WHERE {self.predicate}"
+        return sql + ";"
+
+
+def _named_operators(predicate: str) -> str:
+    for op in sorted(_OPERATOR_NAMES, key=len, reverse=True):
+        predicate = predicate.replace(op, f" {_OPERATOR_NAMES[op]} ")
+    return predicate
+
+
+# ---------------------------
+# Workload collection
+# ---------------------------
+def queries_from_python(path: Path) -> List[Query]:
+    """String-literal queries passed to _fetch_all / run_query (directly or via a local variable)."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    found: List[Query] = []
+    for func in (n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)):
+        local = {
+            target.id: node.value.value
+            for node in ast.walk(func)
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+            for target in node.targets
+            if isinstance(target, ast.Name)
+        }
+        for call in (n for n in ast.walk(func) if isinstance(n, ast.Call)):
+            name = getattr(call.func, "id", None) or getattr(call.func, "attr", None)
+            pos = QUERY_FUNCTIONS.get(name)
+            if pos is None or len(call.args) <= pos:
+                continue
+            arg = call.args[pos]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                text = arg.value
+            elif isinstance(arg, ast.Name) and arg.id in local:
+                text = local[arg.id]
+            else:
+                continue
+            found.append(Query(f"{path.name}:{call.lineno}", text.strip()))
+    return found
+
+
+def queries_from_sql(path: Path) -> List[Query]:
+    """Every statement starting with SELECT / WITH (comments and report titles skipped)."""
+    text = path.read_text(encoding="utf-8")
+    # Blank out comments without moving offsets, so line numbers stay right.
+    text = re.sub(r"--[^\n]*", lambda m: " " * len(m.group()), text)
+    found: List[Query] = []
+    offset = 0
+    for chunk in text.split(";"):
+        m = re.search(r"^[ \t]*(SELECT|WITH)\b", chunk, re.IGNORECASE | re.MULTILINE)
+        if m:
+            line = text.count("\n", 0, offset + m.start()) + 1
+            found.append(Query(f"{path.name}:{line}", chunk[m.start():].strip()))
+        offset += len(chunk) + 1
+    return found
+
+
+def collect_queries(base_dir: Path = BASE_DIR) -> List[Query]:
+    queries: List[Query] = []
+    for name in PYTHON_SOURCES:
+        queries += queries_from_python(base_dir / name)
+    for name in SQL_SOURCES:
+        queries += queries_from_sql(base_dir / name)
+
+    unique: Dict[str, Query] = {}
+    for q in queries:
+        if re.match(r"(SELECT|WITH)\b", q.sql, re.IGNORECASE):
+            unique.setdefault(" ".join(q.sql.rstrip(";").split()), q)
+    return list(unique.values())
+
+
+# ---------------------------
+# EXPLAIN
+# ---------------------------
+def explain(cursor, query: Query, analyze: bool = False) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    (plan JSON, error). Queries with %s parameters get a generic plan
+    (PostgreSQL 16+) and cannot be ANALYZEd. Errors (missing tables...)
+    are rolled back to a savepoint so the transaction stays usable.
+    """
+    sql = query.sql.rstrip().rstrip(";")
+    options = ["VERBOSE", "FORMAT JSON"]
+    if _PARAM.search(sql):
+        if analyze or cursor.connection.server_version < 160000:
+            return None, "parameterized"
+        count = iter(range(1, 1000))
+        sql = _PARAM.sub(lambda _: f"${next(count)}", sql)
+        options.append("GENERIC_PLAN")
+    elif analyze:
+        options += ["ANALYZE", "TIMING OFF"]
+
+    cursor.execute("SAVEPOINT index_advisor;")
+    try:
+        cursor.execute(f"EXPLAIN ({', '.join(options)}) {sql}")
+        result = cursor.fetchone()
+    except PsycopgError as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT index_advisor;")
+        return None, (getattr(e, "pgerror", None) or str(e)).strip().splitlines()[0]
+    cursor.execute("RELEASE SAVEPOINT index_advisor;")
+    plan = result[0] if not isinstance(result, dict) else list(result.values())[0]
+    return plan[0], None
+
+
+def time_query(cursor, query: Query, repeat: int = REPEAT) -> Optional[float]:
+    """Median execution time in ms over `repeat` EXPLAIN ANALYZE runs (after one warm-up)."""
+    times = []
+    for _ in range(repeat + 1):
+        plan, error = explain(cursor, query, analyze=True)
+        if error:
+            return None
+        times.append(plan["Execution Time"])
+    return statistics.median(times[1:])
+
+
+def _walk(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def plan_indexes(plan: Dict[str, Any]) -> List[str]:
+    return sorted({n["Index Name"] for n in _walk(plan["Plan"]) if "Index Name" in n})
+
+
+# ---------------------------
+# Candidates
+# ---------------------------
+def _column_stats(cursor) -> Dict[Tuple[str, str], float]:
+    """(table, column) -> estimated distinct values (negative = fraction of rows, as in pg_stats)."""
+    cursor.execute("SELECT tablename, attname, n_distinct FROM pg_stats WHERE schemaname = 'public';")
+    return {(t, c): float(n) for t, c, n in cursor.fetchall()}
+
+
+def _existing_indexes(cursor) -> List[Tuple[str, str, Optional[str]]]:
+    """(table, leading column, normalized predicate) of every index in public."""
+    cursor.execute(
+        """
+        SELECT t.relname, a.attname, pg_get_expr(i.indpred, i.indrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+        WHERE n.nspname = 'public';
+        """
+    )
+    return [(t, c, _normalize(p)) for t, c, p in cursor.fetchall()]
+
+
+def _normalize(predicate: Optional[str]) -> Optional[str]:
+    return re.sub(r"[()\s]", "", predicate) if predicate else None
+
+
+def candidates_from_plan(plan: Dict[str, Any], stats: Dict[Tuple[str, str], float]) -> List[IndexCandidate]:
+    nodes = list(_walk(plan["Plan"]))
+    aliases = {n["Alias"]: n["Relation Name"] for n in nodes if "Relation Name" in n}
+    seq_scans = {n["Alias"]: n for n in nodes if n["Node Type"] == "Seq Scan"}
+
+    join_columns: Dict[str, List[str]] = {}
+    for node in nodes:
+        for key in ("Hash Cond", "Merge Cond", "Join Filter"):
+            for a1, c1, a2, c2 in _JOIN.findall(node.get(key, "")):
+                join_columns.setdefault(a1, []).append(c1)
+                join_columns.setdefault(a2, []).append(c2)
+
+    found: List[IndexCandidate] = []
+    for alias, scan in seq_scans.items():
+        table = aliases[alias]
+        outputs = [o.split(".", 1)[1] for o in scan.get("Output", []) if o.startswith(f"{alias}.") and "(" not in o]
+        outputs = [c for c in outputs if (table, c) not in TRIGGER_MAINTAINED]
+
+        for a, column, op, value in _COMPARISON.findall(scan.get("Filter", "")):
+            if a != alias or (table, column) in TRIGGER_MAINTAINED:
+                continue
+            distinct = stats.get((table, column), 0.0)
+            if op not in ("=", "<>") and 0 < distinct <= LOW_CARDINALITY:
+                key = join_columns.get(alias, [column])[0]
+                found.append(IndexCandidate(
+                    table, (key,), predicate=f"{column} {op} {value}",
+                    reason=f"range filter on low-cardinality {column}",
+                ))
+            elif op != "<>":
+                found.append(IndexCandidate(table, (column,), reason=f"filter {column} {op} constant"))
+
+        for column in dict.fromkeys(join_columns.get(alias, [])):
+            if (table, column) in TRIGGER_MAINTAINED:
+                continue
+            include = tuple(c for c in dict.fromkeys(outputs) if c != column)
+            found.append(IndexCandidate(
+                table, (column,), include=include if 0 < len(include) <= MAX_INCLUDE else (),
+                reason="join column of a sequential scan",
+            ))
+    return found
+
+
+def merge_candidates(candidates: Sequence[IndexCandidate], existing) -> List[IndexCandidate]:
+    """One candidate per (table, columns, predicate); INCLUDE lists are unioned, existing indexes skipped."""
+    merged: Dict[Tuple[str, Tuple[str, ...], Optional[str]], IndexCandidate] = {}
+    for c in candidates:
+        key = (c.table, c.columns, c.predicate)
+        if key in merged:
+            old = merged[key]
+            include = tuple(dict.fromkeys(old.include + c.include)) if old.include and c.include else ()
+            c = old._replace(include=include if len(include) <= MAX_INCLUDE else ())
+        merged[key] = c
+
+    covered = {(t, col, p) for t, col, p in existing}
+    return [
+        c for c in merged.values()
+        if (c.table, c.columns[0], _normalize(c.predicate)) not in covered
+    ]
+
+
+def advise(cursor, queries: Sequence[Query]) -> Tuple[List[IndexCandidate], Dict[str, str]]:
+    """(proposed indexes, {label: error}) for the workload."""
+    stats = _column_stats(cursor)
+    candidates: List[IndexCandidate] = []
+    errors: Dict[str, str] = {}
+    for q in queries:
+        plan, error = explain(cursor, q)
+        if error:
+            errors[q.label] = error
+            continue
+        candidates += candidates_from_plan(plan, stats)
+    return merge_candidates(candidates, _existing_indexes(cursor)), errors
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def scale_rentings(cursor, factor: int) -> None:
+    """Appends (factor - 1) copies of rentings (dry runs only, rolled back)."""
+    cursor.execute(
+        """
+        INSERT INTO rentings (customer_id, movie_id, rating, date_renting)
+        SELECT r.customer_id, r.movie_id, r.rating, r.date_renting
+        FROM rentings r, generate_series(2, %s);
+        """,
+        (factor,),
+    )
+    cursor.execute("ANALYZE rentings;")
+
+
+def run(cursor, apply: bool = False, scale: int = 1, repeat: int = REPEAT) -> List[Dict[str, Any]]:
+    if scale > 1:
+        scale_rentings(cursor, scale)
+
+    queries = collect_queries()
+    candidates, errors = advise(cursor, queries)
+
+    print(f"\n===== INDEX ADVISOR ({len(queries)} queries) =====")
+    for label, error in errors.items():
+        print(f"skipped {label}: {error}")
+    if not candidates:
+        print("No index to propose: every filter / join column is already indexed.")
+        return []
+
+    print("\nProposed indexes:")
+    for c in candidates:
+        print(f"  {c.ddl()}  -- {c.reason}")
+
+    timed = [q for q in queries if q.label not in errors]
+    before = {q.label: time_query(cursor, q, repeat) for q in timed}
+
+    for c in candidates:
+        cursor.execute(c.ddl())
+    for table in sorted({c.table for c in candidates}):
+        cursor.execute(f"ANALYZE {table};")
+
+    names = {c.name for c in candidates}
+    report = []
+    for q in timed:
+        plan, _ = explain(cursor, q)
+        report.append({
+            "query": q.label,
+            "before_ms": before[q.label],
+            "after_ms": time_query(cursor, q, repeat),
+            "uses": ", ".join(i for i in plan_indexes(plan) if i in names) if plan else "",
+        })
+
+    print(f"\nTimings (median of {repeat} EXPLAIN ANALYZE runs, ms):")
+    print(f"  {'query':<40} {'before':>9} {'after':>9} {'speedup':>8}  new index used")
+    for r in report:
+        if r["before_ms"] is None or r["after_ms"] is None:
+            print(f"  {r['query']:<40} {'-':>9} {'-':>9} {'-':>8}  {r['uses']}")
+            continue
+        speedup = r["before_ms"] / max(r["after_ms"], 1e-3)
+        print(f"  {r['query']:<40} {r['before_ms']:>9.3f} {r['after_ms']:>9.3f} {speedup:>7.2f}x  {r['uses']}")
+
+    print("\nIndexes kept (--apply)." if apply else "\nDry run: indexes rolled back (use --apply to keep them).")
+    return report
+
+
+def main(argv: Sequence[str]) -> None:
+    from server import get_connection
+
+    apply = "--apply" in argv
+    scale = int(argv[argv.index("--scale") + 1]) if "--scale" in argv else 1
+    if apply and scale > 1:
+        print("--scale only works for dry runs (the copied rentings would be committed).")
+        return
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            run(cursor, apply=apply, scale=scale)
+        if apply:
+            conn.commit()
+        else:
+            conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
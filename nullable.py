@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from categorical import Categorical
+
+# -------------------------------------------------------------------
+# Null-aware typed columns
+# -------------------------------------------------------------------
+# psycopg2 returns Python objects with None for NULL. Instead of building
+# an object array and then running `np.where(arr == None, np.nan, arr)`,
+# each DB column is converted once into a typed array plus a validity
+# mask. Integer columns stay integers (NULL slots hold 0 and are masked
+# out), so runtime or year_of_release are not upcast to float just
+# because a few rows are NULL. Text columns become Categoricals.
+
+Column = Union["NullableArray", Categorical]
+
+KINDS = {
+    "int": np.int64,
+    "float": np.float64,
+    "bool": np.bool_,
+}
+
+
+class NullableArray:
+    """Typed values + validity mask (True = not NULL)."""
+
+    def __init__(self, values: Any, valid: Any):
+        self.values = np.asarray(values)
+        self.valid = np.asarray(valid, dtype=bool)
+        if self.values.shape != self.valid.shape:
+            raise ValueError("values and valid must have the same shape.")
+
+    def __len__(self) -> int:
+        return int(self.values.size)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.valid.nbytes)
+
+    @property
+    def null_count(self) -> int:
+        return int(self.valid.size - np.count_nonzero(self.valid))
+
+    @property
+    def valid_count(self) -> int:
+        return int(np.count_nonzero(self.valid))
+
+    def present(self) -> np.ndarray:
+        """Only the non-NULL values."""
+        return self.values[self.valid]
+
+    def to_float(self) -> np.ndarray:
+        """float64 copy with NaN for NULL (for code that expects NaN)."""
+        out = self.values.astype(np.float64)
+        out[~self.valid] = np.nan
+        return out
+
+    def __repr__(self) -> str:
+        return f"NullableArray(n={len(self)}, dtype={self.dtype}, nulls={self.null_count})"
+
+
+def convert(values: Iterable[Any], kind: str) -> NullableArray:
+    """
+    One pass over DB values into a typed NullableArray.
+
+    NULL positions are collected while NumPy fills the typed buffer, so
+    there is no intermediate object array and no second scan for None.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}'. Use one of: {', '.join(KINDS)}.")
+    dtype = KINDS[kind]
+    nulls: List[int] = []
+
+    def fill() -> Iterable[Any]:
+        for i, v in enumerate(values):
+            if v is None or (isinstance(v, float) and v != v):
+                nulls.append(i)
+                yield 0
+            else:
+                yield v
+
+    data = np.fromiter(fill(), dtype=dtype)
+    valid = np.ones(data.shape, dtype=bool)
+    valid[nulls] = False
+    return NullableArray(data, valid)
+
+
+def convert_column(values: Iterable[Any], kind: str) -> Column:
+    """Like convert(), plus kind "category" (optionally "category:lower")."""
+    if kind == "category":
+        return Categorical.from_values(values)
+    if kind == "category:lower":
+        return Categorical.from_values(values, normalize=lambda v: str(v).strip().lower())
+    return convert(values, kind)
+
+
+def fetch_columns(cursor, query: Any, kinds: Dict[str, str], params: Optional[Any] = None) -> Dict[str, Column]:
+    """
+    Run a query on a tuple cursor and return {column name: typed column}.
+
+    `kinds` maps each selected column to "int", "float", "bool",
+    "category" or "category:lower".
+    """
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    names = [d[0] for d in cursor.description]
+    missing = [n for n in names if n not in kinds]
+    if missing:
+        raise KeyError(f"No kind given for column(s): {', '.join(missing)}")
+    return {
+        name: convert_column((row[i] for row in rows), kinds[name])
+        for i, name in enumerate(names)
+    }
+
+
+def null_counts(columns: Dict[str, Column]) -> Dict[str, int]:
+    return {
+        name: col.missing_count if isinstance(col, Categorical) else col.null_count
+        for name, col in columns.items()
+    }
+
+
+def print_null_report(columns: Dict[str, Column]) -> None:
+    print("\nNULL VALUES PER COLUMN")
+    for name, nulls in null_counts(columns).items():
+        n = len(columns[name])
+        share = (nulls / n) * 100.0 if n > 0 else 0.0
+        print(f"{name:<24} {nulls:>8} ({share:.2f}%)")
@@ -1,41 +1,36 @@
 import numpy as np
-from psycopg2.extras import RealDictCursor
 
-from server import get_connection, run_query, format_probability, format_number
+from server import get_connection, format_probability, format_number
+from distributions import DiscreteDistribution, column_counts_query
 
 # =====================================================
 # PART 1: RANDOM VARIABLE X — MOVIE RATINGS (FROM DB)
 # =====================================================
 
-def load_ratings_from_db():
+def load_rating_distribution():
+    # GROUP BY pushdown: only (rating, count) pairs are transferred.
     conn = None
     try:
         conn = get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            rows = run_query(cur, """
-                SELECT rating
-                FROM public.rentings
-                WHERE rating IS NOT NULL;
-            """)
-        ratings_arr = np.fromiter((r["rating"] for r in rows), dtype=float)
-        return ratings_arr
+        with conn.cursor() as cur:
+            return DiscreteDistribution.from_query(cur, column_counts_query("rentings", "rating"))
     finally:
         if conn:
             conn.close()
 
-ratings = load_ratings_from_db()
+dist_X = load_rating_distribution()
 
-if ratings.size == 0:
+if dist_X.is_empty:
     print("No ratings found in the database (rentings.rating is empty or NULL).")
     raise SystemExit(0)
 
-print("Raw ratings sample:", ratings[:10])
+print("Rated rentings:", dist_X.total)
 
 # -----------------------------------------------------
 # Step 1: Identify support of X (unique values)
 # -----------------------------------------------------
 
-x_values, counts = np.unique(ratings, return_counts=True)
+x_values, counts = dist_X.values, dist_X.counts
 
 print("\nPossible values of X (ratings):")
 print(x_values)
@@ -48,7 +43,7 @@ print(counts)
 # PMF = counts / total observations
 # -----------------------------------------------------
 
-total_obs = ratings.size
+total_obs = dist_X.total
 pmf_X = counts / total_obs
 
 print("\nProbability Mass Function P(X = x):")
@@ -115,3 +110,9 @@ print(
     manual_check
 )
 
+print(
+    "Cached moments from DiscreteDistribution: E(X) =",
+    format_number(dist_X.mean),
+    "| Var(X) =",
+    format_number(dist_X.variance)
+)
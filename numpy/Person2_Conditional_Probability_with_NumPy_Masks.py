@@ -1,6 +1,8 @@
 import numpy as np
-from psycopg2.extras import RealDictCursor
-from server import get_connection, run_query
+from server import get_connection
+from events import EventSpace
+from nullable import fetch_columns
+from bitmap import BitmapIndex, conditional
 
 """
 Task 2 – Conditional Probability using NumPy Boolean Masks
@@ -15,8 +17,8 @@ def load_data():
     conn = None
     try:
         conn = get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            rows = run_query(cur, """
+        with conn.cursor() as cur:
+            data = fetch_columns(cur, """
                 SELECT
                     m.genre,
                     m.runtime,
@@ -24,22 +26,19 @@ def load_data():
                 FROM public.rentings r
                 JOIN public.movies m
                     ON r.movie_id = m.movie_id;
-            """)
+            """, {"genre": "category", "runtime": "int", "rating": "float"})
 
-        genres = np.array([row["genre"] for row in rows], dtype=str)
-        runtimes = np.array([row["runtime"] for row in rows], dtype=int)
-        ratings = np.array(
-            [row["rating"] if row["rating"] is not None else np.nan for row in rows],
-            dtype=float
-        )
-
-        return genres, runtimes, ratings
+        # NULL runtimes/ratings are kept out through each column's validity mask.
+        return data["genre"], data["runtime"], data["rating"]
 
     finally:
         if conn:
             conn.close()
 
 
+RUNTIME_EDGES = [90, 120]   # "> 90", "> 120"
+
+
 genres, runtimes, ratings = load_data()
 
 print("Array shapes and dtypes:")
@@ -48,35 +47,26 @@ print("runtimes:", runtimes.shape, runtimes.dtype)
 print("ratings:", ratings.shape, ratings.dtype)
 
 # --------------------------------------------------
-# Define events
+# Define events (parsed once, masks cached and shared)
 # --------------------------------------------------
 
-A = (genres == "Comedy")          
-B = (ratings >= 4)                
-C = (runtimes > 120)             
-D = np.isnan(ratings)             
-
-# --------------------------------------------------
-# Conditional probability function
-# --------------------------------------------------
+space = EventSpace({"genre": genres, "runtime": runtimes, "rating": ratings})
 
-def conditional_probability(A, B):
-    total_B = np.sum(B)
-    if total_B == 0:
-        return np.nan
-    return np.sum(A & B) / total_B
+COMEDY = "genre == 'Comedy'"
+HIGH_RATING = "rating >= 4"
+LONG_MOVIE = "runtime > 120"
+MISSING_RATING = "rating is null"
 
-# --------------------------------------------------
-# Required conditional probabilities
-# --------------------------------------------------
+QUERIES = {
+    "P(Comedy | High Rating):": f"{COMEDY} | {HIGH_RATING}",
+    "P(High Rating | Comedy):": f"{HIGH_RATING} | {COMEDY}",
+    "P(Long Movie | High Rating):": f"{LONG_MOVIE} | {HIGH_RATING}",
+    "P(High Rating | Long Movie):": f"{HIGH_RATING} | {LONG_MOVIE}",
+    "P(Missing Rating | Comedy):": f"{MISSING_RATING} | {COMEDY}",
+    "P(High Rating | Long Comedy):": f"{HIGH_RATING} | {COMEDY} & {LONG_MOVIE}",
+}
 
-p_comedy_given_high_rating = conditional_probability(A, B)
-p_high_rating_given_comedy = conditional_probability(B, A)
-
-p_long_given_high_rating = conditional_probability(C, B)
-p_high_rating_given_long = conditional_probability(B, C)
-
-p_missing_rating_given_comedy = conditional_probability(D, A)
+results = space.batch(QUERIES.values())
 
 # --------------------------------------------------
 # Output
@@ -88,10 +78,33 @@ def fmt(p):
     return f"{p * 100:.2f}%"
 
 print("\nConditional Probabilities:")
-print("P(Comedy | High Rating):", fmt(p_comedy_given_high_rating))
-print("P(High Rating | Comedy):", fmt(p_high_rating_given_comedy))
-print("P(Long Movie | High Rating):", fmt(p_long_given_high_rating))
-print("P(High Rating | Long Movie):", fmt(p_high_rating_given_long))
-print("P(Missing Rating | Comedy):", fmt(p_missing_rating_given_comedy))
+for label, query in QUERIES.items():
+    print(label, fmt(results[query]))
+
+print(f"\n({len(QUERIES)} queries answered from {space.cached_masks} cached masks)")
+
+# --------------------------------------------------
+# Packed-bitmap index over the arrays loaded above
+# --------------------------------------------------
+
+# Built from this run's data, so it always matches it (a saved copy keyed
+# on counts / max ids would miss UPDATEs to ratings, genres or runtimes).
+index = BitmapIndex.build(
+    {"genre": genres, "rating": ratings},
+    strict_thresholds={"runtime": (runtimes, RUNTIME_EDGES)},
+)
+
+high_rating = index.any_of("rating", [v for v in index.values("rating") if float(v) >= 4])
+long_movie = index.greater_than("runtime", 120)
+
+print("\nP(High Rating | Genre) from bitmaps:")
+print(f"{'Genre':<15} {'All':>8} {'> 120 min':>10}")
+for genre in index.values("genre"):
+    in_genre = index.eq("genre", genre)
+    print(f"{genre:<15} {fmt(conditional(high_rating, in_genre)):>8} "
+          f"{fmt(conditional(high_rating, in_genre & long_movie)):>10}")
+
+print(f"\nBitmap index: {len(index.bitmaps)} bitmaps, {index.nbytes} bytes "
+      f"(bool masks would take {len(index.bitmaps) * index.n} bytes)")
 
 
@@ -6,6 +6,9 @@ from typing import Tuple
 
 
 from server import get_connection, format_probability
+from sampling import AliasSampler
+from distributions import DiscreteDistribution, ecdf
+from hyperloglog import HyperLogLog
 
 
 # -----------------------------
@@ -32,43 +35,48 @@ def load_ratings_and_customers() -> Tuple[np.ndarray, np.ndarray]:
 # Theoretical results (empirical exact from DB)
 # -----------------------------
 
-def theoretical_p_rating_ge_4(ratings_obj: np.ndarray) -> Tuple[float, np.ndarray]:
+def theoretical_p_rating_ge_4(ratings_obj: np.ndarray) -> Tuple[float, DiscreteDistribution]:
 
-    mask = ratings_obj != None  # object array safe check
-    rated = ratings_obj[mask].astype(np.int16)  # compact
-    p_exact = np.mean(rated >= 4)  # NumPy numeric work
-    return float(p_exact), rated
+    rating_dist = ecdf(ratings_obj)  # NULLs dropped, one counting pass
+    p_exact = rating_dist.at_least(4)
+    return float(p_exact), rating_dist
 
 
 def theoretical_p_customer_ge_2(customer_ids: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
 
     unique_customers, counts = np.unique(customer_ids, return_counts=True)
-    p_exact = np.mean(counts >= 2)
+    p_exact = ecdf(counts).at_least(2)
     return float(p_exact), unique_customers.astype(np.int32), counts.astype(np.int32)
 
 
+def approximate_distinct_customers(customer_ids: np.ndarray, segments: int = 8) -> HyperLogLog:
+    # One sketch per chunk of rentings (as separate partitions / workers
+    # would build them), merged into one. Memory is 2**p bytes, not O(n).
+    sketch = HyperLogLog()
+    for chunk in np.array_split(customer_ids, segments):
+        sketch.merge(HyperLogLog.from_values(chunk))
+    return sketch
+
+
 # -----------------------------
 # Monte Carlo (>=500,000) using NumPy RNG
 # -----------------------------
 
-def simulate_rating_ge_4(rated_ratings: np.ndarray, n: int = 500_000, seed: int = 42) -> Tuple[float, np.ndarray]:
+def simulate_rating_ge_4(rating_sampler: AliasSampler, n: int = 500_000, seed: int = 42) -> Tuple[float, np.ndarray]:
 
     rng = np.random.default_rng(seed)
 
-    idx = rng.integers(0, rated_ratings.size, size=n, dtype=np.int32)
-    samples = rated_ratings[idx]  
-    event = samples >= 4          
+    # Event is evaluated on the distinct ratings only, then gathered per draw.
+    event = rating_sampler.sample_event(rating_sampler.values >= 4, n, rng)
     p_hat = np.mean(event)
     return float(p_hat), event
 
 
-def simulate_customer_ge_2(counts_per_customer: np.ndarray, n: int = 500_000, seed: int = 42) -> Tuple[float, np.ndarray]:
+def simulate_customer_ge_2(count_sampler: AliasSampler, n: int = 500_000, seed: int = 42) -> Tuple[float, np.ndarray]:
 
     rng = np.random.default_rng(seed)
 
-    idx = rng.integers(0, counts_per_customer.size, size=n, dtype=np.int32)
-    samples = counts_per_customer[idx]
-    event = samples >= 2
+    event = count_sampler.sample_event(count_sampler.values >= 2, n, rng)
     p_hat = np.mean(event)
     return float(p_hat), event
 
@@ -120,7 +128,7 @@ def main() -> None:
     ratings_obj, customer_ids = load_ratings_and_customers()
 
     # --- Theoretical (exact from DB data) ---
-    p_exact_rating, rated_ratings = theoretical_p_rating_ge_4(ratings_obj)
+    p_exact_rating, rating_dist = theoretical_p_rating_ge_4(ratings_obj)
     p_exact_customer, unique_customers, counts = theoretical_p_customer_ge_2(customer_ids)
 
     print("=== Task 5 – Monte Carlo Simulation (NumPy) ===")
@@ -132,9 +140,19 @@ def main() -> None:
     print(f"2) P(customer rented ≥ 2) = {format_probability(p_exact_customer)}")
     print("Explanation: This is the share of customers (who appear in rentings) that have 2+ rentals in the database.")
 
+    customers_hll = approximate_distinct_customers(customer_ids)
+    print(
+        f"Distinct customers in rentings: exact {unique_customers.size}, "
+        f"HyperLogLog ≈ {customers_hll.estimate():.0f} (±{customers_hll.relative_error * 100:.1f}%, {customers_hll.nbytes} bytes)"
+    )
+
     # --- Simulations (>=500,000) ---
-    p_sim_rating, event_rating = simulate_rating_ge_4(rated_ratings, n=500_000, seed=42)
-    p_sim_customer, event_customer = simulate_customer_ge_2(counts, n=500_000, seed=42)
+    # Alias tables hold one entry per distinct rating / rental count.
+    rating_sampler = rating_dist.to_sampler()
+    count_sampler = AliasSampler.from_observations(counts)
+
+    p_sim_rating, event_rating = simulate_rating_ge_4(rating_sampler, n=500_000, seed=42)
+    p_sim_customer, event_customer = simulate_customer_ge_2(count_sampler, n=500_000, seed=42)
 
     print("\nSimulation results (500,000 events each):")
     print(f"1) Simulated P(rating ≥ 4 | rating exists) = {format_probability(p_sim_rating)}")
@@ -161,9 +179,15 @@ def main() -> None:
 
     # --- Memory usage considerations ---
     print_memory_report(
-        rated_ratings=rated_ratings,
+        rating_support=rating_dist.values,
+        rating_counts=rating_dist.counts,
         customer_ids=customer_ids,
         counts_per_customer=counts,
+        customers_hll_registers=customers_hll.registers,
+        rating_alias_prob=rating_sampler.prob,
+        rating_alias_index=rating_sampler.alias,
+        count_alias_prob=count_sampler.prob,
+        count_alias_index=count_sampler.alias,
         event_rating=event_rating,
         event_customer=event_customer,
         running_rating=running_rating,
@@ -181,6 +205,7 @@ def main() -> None:
     print("- Customer selection: we select customers uniformly; this answers 'random customer' probability, not 'random rental' probability.")
     print("- Data is the source of truth: if the database is not representative (example: many 5-star ratings), probabilities reflect that.")
     print("- Sampling with replacement: simulations assume each draw is independent, which is standard for Monte Carlo.")
+    print("- Alias sampling: draws come from a table of distinct values and their frequencies, which is equivalent to picking a random row.")
 
 if __name__ == "__main__":
     main()
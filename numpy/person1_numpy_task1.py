@@ -1,10 +1,10 @@
 import numpy as np
 from server import get_connection
+from nullable import fetch_columns
+from binning import Binning, print_bins
 
-def fetch_array(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    return np.array(rows, dtype=object)
+RUNTIME_BINS = Binning([80, 100, 120, 150], ["< 80 min", "80-99 min", "100-119 min", "120-149 min", ">= 150 min"])
+RENTED_MOVIES = "rentings r JOIN movies m ON m.movie_id = r.movie_id"
 
 def show_info(name, arr):
     print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
@@ -13,7 +13,7 @@ def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    data = fetch_array(
+    data = fetch_columns(
         cursor,
         """
         SELECT
@@ -23,60 +23,44 @@ def main():
         FROM rentings r
         JOIN movies m
             ON m.movie_id = r.movie_id
-        """
+        """,
+        {"runtime": "int", "genre": "category", "rating": "float"},
     )
 
-    if data.size == 0:
+    if len(data["runtime"]) == 0:
         print("Not enough data to run Task 1 (no rows returned).")
         cursor.close()
         conn.close()
         return
 
-    runtime_obj = data[:, 0]
-    genre = data[:, 1].astype(str)
-    rating_obj = data[:, 2]
-
-    runtime = np.where(runtime_obj == None, np.nan, runtime_obj).astype(float)
-    rating = np.where(rating_obj == None, np.nan, rating_obj).astype(float)
+    for name, column in data.items():
+        show_info(name, column)
 
-    show_info("data", data)
-    show_info("runtime", runtime)
-    show_info("genre", genre)
-    show_info("rating", rating)
+    runtime, valid_runtime = data["runtime"].values, data["runtime"].valid
 
-    valid_runtime = ~np.isnan(runtime)
-    denom = np.count_nonzero(valid_runtime)
-
-    c1 = valid_runtime & (runtime < 80)
-    c2 = valid_runtime & (runtime >= 80) & (runtime < 100)
-    c3 = valid_runtime & (runtime >= 100) & (runtime < 120)
-    c4 = valid_runtime & (runtime >= 120) & (runtime < 150)
-    c5 = valid_runtime & (runtime >= 150)
+    # One searchsorted + bincount pass for all categories.
+    bins = RUNTIME_BINS.count(data["runtime"])
+    denom = bins.valid
 
     print("\nRUNTIME CATEGORY PROBABILITIES (based on available runtime values)")
     print(f"Denominator count (valid runtime): {int(denom)}")
+    print_bins(bins)
 
-    categories = [
-        ("< 80 min", c1),
-        ("80-99 min", c2),
-        ("100-119 min", c3),
-        ("120-149 min", c4),
-        (">= 150 min", c5),
-    ]
-
-    for label, mask in categories:
-        prob = (np.count_nonzero(mask) / denom) * 100.0 if denom > 0 else 0.0
-        print(f"{label}: {prob:.2f}%")
-
+    c3 = valid_runtime & (runtime >= 100) & (runtime < 120)
     manual_count = np.count_nonzero(c3)
     manual_prob = (manual_count / denom) * 100.0 if denom > 0 else 0.0
 
-    func_prob = (np.count_nonzero(c3[valid_runtime]) / denom) * 100.0 if denom > 0 else 0.0
+    func_prob = bins.percentages[RUNTIME_BINS.labels.index("100-119 min")]
+
+    # Same bins counted by PostgreSQL with width_bucket (only 6 rows come back).
+    sql_bins = RUNTIME_BINS.fetch(cursor, "m.runtime", RENTED_MOVIES)
+    sql_prob = sql_bins.percentages[RUNTIME_BINS.labels.index("100-119 min")]
 
     print("\nMANUAL VERIFICATION (category 100-119 min)")
     print(f"Count in category: {int(manual_count)}")
     print(f"Manual probability: {manual_prob:.2f}%")
     print(f"Vectorized probability: {func_prob:.2f}%")
+    print(f"SQL width_bucket probability: {sql_prob:.2f}%")
 
     cursor.close()
     conn.close()
@@ -1,10 +1,7 @@
 import numpy as np
 from server import get_connection
-
-def fetch_array(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    return np.array(rows, dtype=object)
+from nullable import fetch_columns
+from contingency import print_independence_table, test_all_pairs
 
 def show_info(name, arr):
     print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
@@ -16,56 +13,63 @@ def prob(mask):
         return 0.0
     return np.count_nonzero(mask) / n
 
+def bucket(values, valid, edges, labels):
+    """Object array of bucket labels, None where the value is missing."""
+    idx = np.searchsorted(np.asarray(edges, dtype=float), np.where(valid, values, 0.0), side="right")
+    out = np.asarray(labels, dtype=object)[idx]
+    out[~valid] = None
+    return out
+
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    data = fetch_array(
+    data = fetch_columns(
         cursor,
         """
         SELECT
             m.genre,
             m.runtime,
             r.rating,
-            c.gender
+            c.gender,
+            c.country
         FROM rentings r
         JOIN movies m
             ON m.movie_id = r.movie_id
         JOIN customers c
             ON c.customer_id = r.customer_id
-        """
+        """,
+        {
+            "genre": "category:lower",
+            "runtime": "int",
+            "rating": "float",
+            "gender": "category:lower",
+            "country": "category",
+        },
     )
 
-    if data.size == 0:
+    if len(data["genre"]) == 0:
         print("Not enough data to run Task 3 (no rows returned).")
         cursor.close()
         conn.close()
         return
 
-    genre = np.char.lower(data[:, 0].astype(str))
-    runtime_obj = data[:, 1]
-    rating_obj = data[:, 2]
-    gender = np.char.lower(data[:, 3].astype(str))
+    genre = data["genre"]
+    gender = data["gender"]
+    country = data["country"]
+    runtime, valid_runtime = data["runtime"].values, data["runtime"].valid
+    rating, valid_rating = data["rating"].values, data["rating"].valid
 
-    runtime = np.where(runtime_obj == None, np.nan, runtime_obj).astype(float)
-    rating = np.where(rating_obj == None, np.nan, rating_obj).astype(float)
-
-    show_info("data", data)
-    show_info("genre", genre)
-    show_info("runtime", runtime)
-    show_info("rating", rating)
-    show_info("gender", gender)
+    for name in ("genre", "runtime", "rating", "gender"):
+        show_info(name, data[name])
 
     tol = 0.01
 
-    valid_rating = ~np.isnan(rating)
-    valid_runtime = ~np.isnan(runtime)
-
-    A1 = (genre == "action")
+    A1 = genre.eq("action")
     B1 = valid_rating & (rating >= 4)
 
     A2 = valid_runtime & (runtime >= 150)
-    B2 = (genre == "drama")
+    B2 = genre.eq("drama")
 
     rated = valid_rating
     A_dep = rated & (rating >= 4)
@@ -105,6 +109,19 @@ def main():
     print(f"Tolerance used: {tol:.2f}% as a probability difference threshold.")
     print("Pair 3 is designed to be dependent because every rating >= 4 is also >= 3.")
 
+    # Full k×m crosstabs for every pair of categorical columns
+    columns = {
+        "genre": genre,
+        "gender": gender,
+        "country": country,
+        "rating bucket": bucket(rating, valid_rating, [3, 4], ["1-2", "3", "4-5"]),
+        "runtime bucket": bucket(runtime, valid_runtime, [90, 120, 150], ["<90", "90-119", "120-149", ">=150"]),
+    }
+
+    print("\nCHI-SQUARE / G-TEST FOR ALL CATEGORY PAIRS (sorted by Cramér's V)")
+    print_independence_table(test_all_pairs(columns))
+    print("Missing values are left out of each table; 'Independent?' uses the 5% level.")
+
     cursor.close()
     conn.close()
 
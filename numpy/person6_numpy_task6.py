@@ -1,116 +1,75 @@
-import numpy as np
 from server import get_connection
-
-def fetch_array(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    return np.array(rows)
+from contingency import JointCounts, bayes_table, label_index
 
 def show_info(name, arr):
     print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
 
-def safe_div(a, b):
-    return a / b if b != 0 else 0.0
+def print_example(title, likelihood_label, evidence_label, bayes, i, j):
+    print(f"\n{title}")
+    print(f"Prior P(Genre): {bayes.prior[i]*100:.2f}%")
+    print(f"Likelihood {likelihood_label}: {bayes.likelihood[i, j]*100:.2f}%")
+    print(f"Evidence {evidence_label}: {bayes.evidence[j]*100:.2f}%")
+    print(f"Posterior (Bayes): {bayes.posterior[i, j]*100:.2f}%")
+    print(f"Posterior (Direct check): {bayes.direct[i, j]*100:.2f}%")
 
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    data1 = fetch_array(
-        cursor,
-        """
-        SELECT
-            m.genre,
-            r.rating
-        FROM rentings r
-        JOIN movies m
-            ON m.movie_id = r.movie_id
-        WHERE r.rating IS NOT NULL
-          AND m.genre IS NOT NULL
-        """
-    )
-
-    genre1 = np.char.lower(data1[:, 0].astype(str))
-    rating1 = data1[:, 1].astype(float)
-
-    show_info("data1", data1)
-    show_info("genre1", genre1)
-    show_info("rating1", rating1)
-
-    target_genre = "drama"
-    if np.count_nonzero(genre1 == target_genre) == 0:
-        unique, counts = np.unique(genre1, return_counts=True)
-        target_genre = unique[np.argmax(counts)]
-
-    A = (genre1 == target_genre)
-    B = (rating1 >= 4)
-
-    prior = safe_div(np.count_nonzero(A), A.size)
-    likelihood = safe_div(np.count_nonzero(A & B), np.count_nonzero(A))
-    evidence = safe_div(np.count_nonzero(B), B.size)
-
-    posterior = safe_div(likelihood * prior, evidence)
-
-    direct = safe_div(np.count_nonzero(A & B), np.count_nonzero(B))
-
-    print(f"\nEXAMPLE 1: P(Genre={target_genre.title()} | Rating>=4)")
-    print(f"Prior P(Genre): {prior*100:.2f}%")
-    print(f"Likelihood P(Rating>=4 | Genre): {likelihood*100:.2f}%")
-    print(f"Evidence P(Rating>=4): {evidence*100:.2f}%")
-    print(f"Posterior (Bayes): {posterior*100:.2f}%")
-    print(f"Posterior (Direct check): {direct*100:.2f}%")
+    joint = JointCounts.from_rentings(cursor)
+    cursor.close()
+    conn.close()
 
-    data2 = fetch_array(
-        cursor,
-        """
-        SELECT
-            c.gender,
-            m.genre
-        FROM rentings r
-        JOIN customers c
-            ON c.customer_id = r.customer_id
-        JOIN movies m
-            ON m.movie_id = r.movie_id
-        WHERE c.gender IS NOT NULL
-          AND m.genre IS NOT NULL
-        """
+    if joint is None:
+        print("Not enough data to run Task 6 (no rentings).")
+        return
+
+    show_info("joint counts (gender × genre × rating, +1 missing slot each)", joint.counts)
+
+    # Example 1: rows = genre, columns = rating bucket (rated rentings only)
+    genre_rating = joint.marginal("genre", "rating")
+    if "high" not in genre_rating.col_labels:
+        print("Not enough data to run Task 6 (no ratings >= 4).")
+        return
+    bayes1 = bayes_table(genre_rating.table)
+    i = label_index(genre_rating.row_labels, genre_rating.table.sum(axis=1), "drama")
+    j = list(genre_rating.col_labels).index("high")
+    target_genre = genre_rating.row_labels[i]
+
+    print_example(
+        f"EXAMPLE 1: P(Genre={target_genre.title()} | Rating>=4)",
+        "P(Rating>=4 | Genre)", "P(Rating>=4)", bayes1, i, j
     )
 
-    gender2 = np.char.lower(data2[:, 0].astype(str))
-    genre2 = np.char.lower(data2[:, 1].astype(str))
-
-    show_info("data2", data2)
-    show_info("gender2", gender2)
-    show_info("genre2", genre2)
-
-    male = np.count_nonzero(gender2 == "male")
-    female = np.count_nonzero(gender2 == "female")
-    target_gender = "male" if male >= female else "female"
-
-    target_genre2 = "action"
-    if np.count_nonzero(genre2 == target_genre2) == 0:
-        unique2, counts2 = np.unique(genre2, return_counts=True)
-        target_genre2 = unique2[np.argmax(counts2)]
-
-    A2 = (genre2 == target_genre2)
-    B2 = (gender2 == target_gender)
-
-    prior2 = safe_div(np.count_nonzero(A2), A2.size)
-    likelihood2 = safe_div(np.count_nonzero(A2 & B2), np.count_nonzero(A2))
-    evidence2 = safe_div(np.count_nonzero(B2), B2.size)
-
-    posterior2 = safe_div(likelihood2 * prior2, evidence2)
-    direct2 = safe_div(np.count_nonzero(A2 & B2), np.count_nonzero(B2))
-
-    print(f"\nEXAMPLE 2: P(Genre={target_genre2.title()} | Gender={target_gender.title()})")
-    print(f"Prior P(Genre): {prior2*100:.2f}%")
-    print(f"Likelihood P(Gender | Genre): {likelihood2*100:.2f}%")
-    print(f"Evidence P(Gender): {evidence2*100:.2f}%")
-    print(f"Posterior (Bayes): {posterior2*100:.2f}%")
-    print(f"Posterior (Direct check): {direct2*100:.2f}%")
+    # Example 2: rows = genre, columns = gender
+    genre_gender = joint.marginal("genre", "gender")
+    bayes2 = bayes_table(genre_gender.table)
+    genders = list(genre_gender.col_labels)
+    gender_totals = genre_gender.table.sum(axis=0)
+    male = gender_totals[genders.index("male")] if "male" in genders else 0
+    female = gender_totals[genders.index("female")] if "female" in genders else 0
+    # Labels other than male/female (e.g. "M"/"F"): most frequent gender.
+    j2 = label_index(genders, gender_totals, "male" if male >= female else "female")
+    target_gender = genders[j2]
+    i2 = label_index(genre_gender.row_labels, genre_gender.table.sum(axis=1), "action")
+    target_genre2 = genre_gender.row_labels[i2]
+
+    print_example(
+        f"EXAMPLE 2: P(Genre={target_genre2.title()} | Gender={target_gender.title()})",
+        "P(Gender | Genre)", "P(Gender)", bayes2, i2, j2
+    )
 
-    cursor.close()
-    conn.close()
+    # All posteriors at once from the same joint table
+    print("\nALL GENRES: P(Genre | Rating>=4)")
+    for label, p in zip(genre_rating.row_labels, bayes1.posterior[:, j]):
+        print(f"{label.title()}: {p*100:.2f}%")
+
+    gender_genre = joint.marginal("gender", "genre")
+    bayes3 = bayes_table(gender_genre.table)
+    print("\nALL GENRES: P(Gender | Genre)")
+    for col, genre in enumerate(gender_genre.col_labels):
+        parts = [f"{g.title()} {bayes3.direct[row, col]*100:.2f}%" for row, g in enumerate(gender_genre.row_labels)]
+        print(f"{genre.title()}: " + ", ".join(parts))
 
 if __name__ == "__main__":
     main()
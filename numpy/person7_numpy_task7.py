@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from server import get_connection
+from sampling import AliasSampler
 
 def fetch_array(cursor, query):
     cursor.execute(query)
@@ -10,10 +11,9 @@ def fetch_array(cursor, query):
 def show_info(name, arr):
     print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
 
-def estimate_prob_rating_ge_4(ratings, sample_size, rng):
-    idx = rng.integers(0, ratings.size, size=sample_size)
-    sample = ratings[idx]
-    return np.mean(sample >= 4)
+def estimate_prob_rating_ge_4(sampler, sample_size, rng):
+    event = sampler.sample_event(sampler.values >= 4, sample_size, rng)
+    return np.mean(event)
 
 def main():
     conn = get_connection()
@@ -40,9 +40,10 @@ def main():
         return
 
     rng = np.random.default_rng()
+    sampler = AliasSampler.from_observations(ratings)
 
     sizes = np.array([100, 500, 1000, 5000, 10000, 50000, 100000], dtype=int)
-    estimates = np.array([estimate_prob_rating_ge_4(ratings, int(s), rng) for s in sizes], dtype=float)
+    estimates = np.array([estimate_prob_rating_ge_4(sampler, int(s), rng) for s in sizes], dtype=float)
 
     exact = np.mean(ratings >= 4)
 
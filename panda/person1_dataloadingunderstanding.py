@@ -1,30 +1,38 @@
 import numpy as np
 from server import get_connection
+from nullable import fetch_columns, print_null_report
+from binning import Binning, print_bins
 
-
-def fetch_array(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    return np.array(rows, dtype=object)
+RUNTIME_BINS = Binning([80, 100, 120, 150], ["< 80 min", "80-99 min", "100-119 min", "120-149 min", ">= 150 min"])
+YEAR_THRESHOLDS = Binning([2000, 2010, 2020], right=True)
+# Ratings are whole numbers, so [v, v + 1) is "rating = v".
+RATING_BINS = Binning([1, 2, 3, 4, 5, 6], ["< 1", "1", "2", "3", "4", "5", "> 5"])
 
 
 def show_info(name, arr):
     print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
 
 
-def to_float_nan(arr_obj):
-    return np.where(arr_obj == None, np.nan, arr_obj).astype(float)
-
-
 def probability(mask, denom):
     return (np.count_nonzero(mask) / denom) * 100.0 if denom > 0 else 0.0
 
 
+def print_category_probabilities(column):
+    # Denominator is every row, so missing values get their own line.
+    denom = len(column)
+    rows = column.value_counts()
+    if column.missing_count:
+        rows.append(("(missing)", column.missing_count))
+    for label, cnt in rows:
+        p = (cnt / denom) * 100.0 if denom > 0 else 0.0
+        print(f"{label}: {p:.2f}%")
+
+
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    data = fetch_array(
+    data = fetch_columns(
         cursor,
         """
         SELECT
@@ -39,102 +47,71 @@ def main():
             ON m.movie_id = r.movie_id
         JOIN customers c
             ON c.customer_id = r.customer_id
-        """
+        """,
+        {
+            "runtime": "int",
+            "genre": "category",
+            "rating": "float",
+            "year_of_release": "int",
+            "country": "category",
+            "gender": "category",
+        },
     )
 
-    if data.size == 0:
+    if len(data["runtime"]) == 0:
         print("Not enough data to run Person 1 (no rows returned).")
         cursor.close()
         conn.close()
         return
 
-    runtime_obj = data[:, 0]
-    genre = data[:, 1].astype(str)
-    rating_obj = data[:, 2]
-    year_obj = data[:, 3]
-    country = data[:, 4].astype(str)
-    gender = data[:, 5].astype(str)
-
-    runtime = to_float_nan(runtime_obj)
-    rating = to_float_nan(rating_obj)
-    year_of_release = to_float_nan(year_obj)
-
-    show_info("data", data)
-    show_info("runtime", runtime)
-    show_info("genre", genre)
-    show_info("rating", rating)
-    show_info("year_of_release", year_of_release)
-    show_info("country", country)
-    show_info("gender", gender)
-
-    valid_runtime = ~np.isnan(runtime)
-    denom_runtime = np.count_nonzero(valid_runtime)
-
-    c1 = valid_runtime & (runtime < 80)
-    c2 = valid_runtime & (runtime >= 80) & (runtime < 100)
-    c3 = valid_runtime & (runtime >= 100) & (runtime < 120)
-    c4 = valid_runtime & (runtime >= 120) & (runtime < 150)
-    c5 = valid_runtime & (runtime >= 150)
+    genre = data["genre"]
+    country = data["country"]
+    gender = data["gender"]
 
-    print("\nRUNTIME CATEGORY PROBABILITIES (based on available runtime values)")
-    print(f"Denominator count (valid runtime): {int(denom_runtime)}")
+    for name, column in data.items():
+        show_info(name, column)
+    print_null_report(data)
+
+    # Integer columns stay integers; NULL rows are excluded via .valid.
+    runtime, valid_runtime = data["runtime"].values, data["runtime"].valid
+    rating, valid_rating = data["rating"].values, data["rating"].valid
 
-    categories = [
-        ("< 80 min", c1),
-        ("80-99 min", c2),
-        ("100-119 min", c3),
-        ("120-149 min", c4),
-        (">= 150 min", c5),
-    ]
+    runtime_bins = RUNTIME_BINS.count(data["runtime"])
 
-    for label, mask in categories:
-        print(f"{label}: {probability(mask, denom_runtime):.2f}%")
+    print("\nRUNTIME CATEGORY PROBABILITIES (based on available runtime values)")
+    print(f"Denominator count (valid runtime): {runtime_bins.valid}")
+    print_bins(runtime_bins)
 
+    c3 = valid_runtime & (runtime >= 100) & (runtime < 120)
     manual_count = np.count_nonzero(c3)
-    manual_prob = probability(c3, denom_runtime)
-    func_prob = probability(c3[valid_runtime], denom_runtime)
+    manual_prob = probability(c3, runtime_bins.valid)
+    func_prob = runtime_bins.percentages[RUNTIME_BINS.labels.index("100-119 min")]
 
     print("\nMANUAL VERIFICATION (category 100-119 min)")
     print(f"Count in category: {int(manual_count)}")
     print(f"Manual probability: {manual_prob:.2f}%")
     print(f"Vectorized probability: {func_prob:.2f}%")
 
-    valid_year = ~np.isnan(year_of_release)
-    denom_year = np.count_nonzero(valid_year)
-
-    for y in (2000, 2010, 2020):
-        mask = valid_year & (year_of_release > float(y))
-        print(f"\nProbability movie released after {y}: {probability(mask, denom_year):.2f}%")
+    # One pass gives P(year > y) for every threshold.
+    year_bins = YEAR_THRESHOLDS.count(data["year_of_release"])
+    for y, p in zip(YEAR_THRESHOLDS.edges, year_bins.above()):
+        print(f"\nProbability movie released after {y:g}: {p * 100.0:.2f}%")
 
-    valid_rating = ~np.isnan(rating)
-    denom_ratings = np.count_nonzero(valid_rating)
     print(f"\nProbability a rented movie has a rating: {probability(valid_rating, len(rating)):.2f}%")
 
+    rating_bins = RATING_BINS.count(data["rating"])
     print("\nRATING VALUE PROBABILITIES (1-5, based on rated rentals)")
     for v in range(1, 6):
-        mask = valid_rating & (rating == float(v))
-        print(f"Rating = {v}: {probability(mask, denom_ratings):.2f}%")
+        print(f"Rating = {v}: {rating_bins.percentages[v]:.2f}%")
 
     print("\nGENRE PROBABILITIES (based on rented-movie rows)")
-    unique_genres, counts_genres = np.unique(genre, return_counts=True)
-    denom_genre = len(genre)
-    for g, cnt in zip(unique_genres, counts_genres):
-        p = (cnt / denom_genre) * 100.0 if denom_genre > 0 else 0.0
-        print(f"{g}: {p:.2f}%")
+    print_category_probabilities(genre)
 
     print("\nCOUNTRY PROBABILITIES (based on rental rows)")
-    unique_countries, counts_countries = np.unique(country, return_counts=True)
-    denom_country = len(country)
-    for ct, cnt in zip(unique_countries, counts_countries):
-        p = (cnt / denom_country) * 100.0 if denom_country > 0 else 0.0
-        print(f"{ct}: {p:.2f}%")
+    print_category_probabilities(country)
 
     print("\nGENDER PROBABILITIES (based on rental rows)")
-    unique_genders, counts_genders = np.unique(gender, return_counts=True)
-    denom_gender = len(gender)
-    for gd, cnt in zip(unique_genders, counts_genders):
-        p = (cnt / denom_gender) * 100.0 if denom_gender > 0 else 0.0
-        print(f"{gd}: {p:.2f}%")
+    print_category_probabilities(gender)
 
     cursor.close()
     conn.close()
@@ -1,19 +1,14 @@
 import numpy as np
 from server import get_connection
+from bitmap import BitmapIndex, conditional
+from hyperloglog import HyperLogLog
+from nullable import fetch_columns, print_null_report
 
 
-def fetch_array(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    return np.array(rows, dtype=object)
-
-
-def show_info(name, arr):
-    print(f"{name} shape: {arr.shape} dtype: {arr.dtype}")
-
-
-def to_float_nan(arr_obj):
-    return np.where(arr_obj == None, np.nan, arr_obj).astype(float)
+def show_info(name, columns):
+    n = len(next(iter(columns.values())))
+    dtypes = ", ".join(f"{col}={data.dtype}" for col, data in columns.items())
+    print(f"{name} rows: {n} ({dtypes})")
 
 
 def probability(mask):
@@ -21,6 +16,11 @@ def probability(mask):
     return (np.count_nonzero(mask) / n) * 100.0 if n > 0 else 0.0
 
 
+def percent(p):
+    """Bitmap probability as a percentage; an empty condition counts as 0%."""
+    return 0.0 if np.isnan(p) else p * 100.0
+
+
 def conditional_probability(event_mask, given_mask):
     denom = np.count_nonzero(given_mask)
     if denom == 0:
@@ -28,15 +28,11 @@ def conditional_probability(event_mask, given_mask):
     return (np.count_nonzero(event_mask & given_mask) / denom) * 100.0
 
 
-def normalize_text(arr):
-    return np.char.strip(np.char.lower(arr.astype(str)))
-
-
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    movies = fetch_array(
+    movies = fetch_columns(
         cursor,
         """
         SELECT
@@ -45,10 +41,11 @@ def main():
             runtime,
             year_of_release
         FROM movies
-        """
+        """,
+        {"movie_id": "int", "genre": "category:lower", "runtime": "int", "year_of_release": "int"},
     )
 
-    rentals = fetch_array(
+    rentals = fetch_columns(
         cursor,
         """
         SELECT
@@ -60,10 +57,17 @@ def main():
         FROM rentings r
         JOIN movies m
             ON m.movie_id = r.movie_id
-        """
+        """,
+        {
+            "renting_id": "int",
+            "customer_id": "int",
+            "genre": "category:lower",
+            "rating": "float",
+            "year_of_release": "int",
+        },
     )
 
-    cust_rent = fetch_array(
+    cust_rent = fetch_columns(
         cursor,
         """
         SELECT
@@ -72,10 +76,11 @@ def main():
         FROM customers c
         JOIN rentings r
             ON r.customer_id = c.customer_id
-        """
+        """,
+        {"customer_id": "int", "gender": "category:lower"},
     )
 
-    if movies.size == 0 or rentals.size == 0 or cust_rent.size == 0:
+    if len(movies["movie_id"]) == 0 or len(rentals["renting_id"]) == 0 or len(cust_rent["customer_id"]) == 0:
         print("Not enough data to run Person 2 (one or more queries returned no rows).")
         cursor.close()
         conn.close()
@@ -84,72 +89,102 @@ def main():
     show_info("movies", movies)
     show_info("rentals", rentals)
     show_info("cust_rent", cust_rent)
+    print_null_report({f"movies.{k}": v for k, v in movies.items()})
+
+    movie_genre = movies["genre"]
+    movie_runtime = movies["runtime"]
+    movie_year = movies["year_of_release"]
 
-    movie_genre = normalize_text(movies[:, 1])
-    movie_runtime = to_float_nan(movies[:, 2])
-    movie_year = to_float_nan(movies[:, 3])
+    rental_genre = rentals["genre"]
+    rental_rating = rentals["rating"]
+    rental_year = rentals["year_of_release"]
 
-    rental_genre = normalize_text(rentals[:, 2])
-    rental_rating = to_float_nan(rentals[:, 3])
-    rental_year = to_float_nan(rentals[:, 4])
+    cust_ids = cust_rent["customer_id"].values
+    cust_gender = cust_rent["gender"]
 
-    cust_ids = cust_rent[:, 0]
-    cust_gender = normalize_text(cust_rent[:, 1])
+    # Packed bitmaps: one per genre / rating value, range-encoded thresholds
+    # for runtime ("> 100", "> 120") and year ("< 2000").
+    movie_index = BitmapIndex.build(
+        {"genre": movie_genre},
+        {"year": (movie_year, [2000])},
+        strict_thresholds={"runtime": (movie_runtime, [100, 120])},
+    )
+    rental_index = BitmapIndex.build({"genre": rental_genre, "rating": rental_rating})
 
     print("\nPERSON 2 — Conditional Probability")
+    print(
+        f"Bitmap indexes: {movie_index.nbytes + rental_index.nbytes} bytes "
+        f"({len(movie_index.bitmaps) + len(rental_index.bitmaps)} bitmaps)"
+    )
 
-    given_runtime_gt_100 = ~np.isnan(movie_runtime) & (movie_runtime > 100.0)
-    event_genre_drama = movie_genre == "drama"
+    given_runtime_gt_100 = movie_index.greater_than("runtime", 100)
+    event_genre_drama = movie_index.eq("genre", "drama")
 
-    p_drama_given_runtime = conditional_probability(event_genre_drama, given_runtime_gt_100)
-    p_drama_uncond = probability(event_genre_drama)
+    p_drama_given_runtime = percent(conditional(event_genre_drama, given_runtime_gt_100))
+    p_drama_uncond = percent(conditional(event_genre_drama))
 
     print("\n1) P(Genre = Drama | Runtime > 100)")
     print(f"Conditional: {p_drama_given_runtime:.2f}%")
     print(f"Unconditional P(Drama): {p_drama_uncond:.2f}%")
 
-    given_genre_comedy = rental_genre == "comedy"
-    valid_rating = ~np.isnan(rental_rating)
-    event_rating_ge_4 = valid_rating & (rental_rating >= 4.0)
+    given_genre_comedy = rental_index.eq("genre", "comedy")
+    high_ratings = [v for v in rental_index.values("rating") if float(v) >= 4.0]
+    event_rating_ge_4 = rental_index.any_of("rating", high_ratings)
 
-    p_rating_ge_4_given_comedy = conditional_probability(event_rating_ge_4, given_genre_comedy)
-    p_rating_ge_4_uncond = probability(event_rating_ge_4)
+    p_rating_ge_4_given_comedy = percent(conditional(event_rating_ge_4, given_genre_comedy))
+    p_rating_ge_4_uncond = percent(conditional(event_rating_ge_4))
 
     print("\n2) P(Rating >= 4 | Genre = Comedy)")
     print(f"Conditional: {p_rating_ge_4_given_comedy:.2f}%")
     print(f"Unconditional P(Rating >= 4): {p_rating_ge_4_uncond:.2f}%")
 
-    given_was_rented = ~np.isnan(rental_year)
-    event_after_2015 = ~np.isnan(rental_year) & (rental_year > 2015.0)
+    given_was_rented = rental_year.valid
+    event_after_2015 = rental_year.valid & (rental_year.values > 2015)
 
     p_after_2015_given_rented = conditional_probability(event_after_2015, given_was_rented)
-    movie_year_valid = ~np.isnan(movie_year)
-    p_after_2015_uncond_movies = (np.count_nonzero(movie_year_valid & (movie_year > 2015.0)) / np.count_nonzero(movie_year_valid)) * 100.0 if np.count_nonzero(movie_year_valid) > 0 else 0.0
+    movie_year_valid = movie_year.valid
+    p_after_2015_uncond_movies = (np.count_nonzero(movie_year_valid & (movie_year.values > 2015)) / np.count_nonzero(movie_year_valid)) * 100.0 if np.count_nonzero(movie_year_valid) > 0 else 0.0
 
     print("\n3) P(Movie released after 2015 | Movie was rented)")
     print(f"Conditional (based on rental rows): {p_after_2015_given_rented:.2f}%")
     print(f"Unconditional (based on movies with year): {p_after_2015_uncond_movies:.2f}%")
 
     unique_customers_with_rent = np.unique(cust_ids)
-    female_mask_rows = cust_gender == "female"
+    female_mask_rows = cust_gender.eq("female")
 
     denom_unique = unique_customers_with_rent.size
     female_customers = np.unique(cust_ids[female_mask_rows])
     p_female_given_rented = (female_customers.size / denom_unique) * 100.0 if denom_unique > 0 else 0.0
 
-    all_customers = fetch_array(cursor, "SELECT customer_id, gender FROM customers")
-    all_gender = normalize_text(all_customers[:, 1])
-    p_female_uncond = probability(all_gender == "female")
+    all_customers = fetch_columns(
+        cursor, "SELECT customer_id, gender FROM customers", {"customer_id": "int", "gender": "category:lower"}
+    )
+    p_female_uncond = probability(all_customers["gender"].eq("female"))
+
+    # Approximate path: one HyperLogLog per gender segment; merging the
+    # segments (register-wise max) gives the sketch of all renters.
+    segments = {g: HyperLogLog.from_values(cust_ids[cust_gender.eq(g)]) for g in cust_gender.categories}
+    segments[None] = HyperLogLog.from_values(cust_ids[cust_gender.missing])
+    renters_hll = HyperLogLog()
+    for sketch in segments.values():
+        renters_hll.merge(sketch)
+    approx_renters = renters_hll.estimate()
+    approx_female = segments["female"].estimate() if "female" in segments else 0.0
+    p_female_given_rented_hll = (approx_female / approx_renters) * 100.0 if approx_renters > 0 else 0.0
 
     print("\n4) P(Customer is Female | Customer rented at least one movie)")
     print(f"Conditional (unique customers who rented): {p_female_given_rented:.2f}%")
+    print(
+        f"Approximate (HyperLogLog, ±{renters_hll.relative_error * 100:.1f}% per count): "
+        f"{p_female_given_rented_hll:.2f}% ({approx_renters:.0f} vs {denom_unique} distinct renters)"
+    )
     print(f"Unconditional P(Female) (all customers): {p_female_uncond:.2f}%")
 
-    given_year_lt_2000 = ~np.isnan(movie_year) & (movie_year < 2000.0)
-    event_runtime_gt_120 = ~np.isnan(movie_runtime) & (movie_runtime > 120.0)
+    given_year_lt_2000 = movie_index.below("year", 2000)
+    event_runtime_gt_120 = movie_index.greater_than("runtime", 120)
 
-    p_runtime_gt_120_given_old = conditional_probability(event_runtime_gt_120, given_year_lt_2000)
-    p_runtime_gt_120_uncond = probability(event_runtime_gt_120)
+    p_runtime_gt_120_given_old = percent(conditional(event_runtime_gt_120, given_year_lt_2000))
+    p_runtime_gt_120_uncond = percent(conditional(event_runtime_gt_120))
 
     print("\n5) P(Runtime > 120 | Year of release < 2000)")
     print(f"Conditional: {p_runtime_gt_120_given_old:.2f}%")
@@ -1,94 +1,61 @@
-import numpy as np
 import pandas as pd
 from server import get_connection
+from streaming import stream_stats
 
+# Streamed through a server-side cursor in batches: memory stays
+# bounded by BATCH_SIZE rows no matter how large rentings grows.
+BATCH_SIZE = 50_000
 
-def fetch_dataframe(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    return pd.DataFrame(rows, columns=columns)
+STATS_QUERY = """
+    SELECT
+        m.runtime,
+        m.year_of_release,
+        m.renting_price,
+        m.avg_rating,
+        r.rating
+    FROM movies m
+    LEFT JOIN rentings r
+        ON r.movie_id = m.movie_id
+"""
+NUMERIC_COLS = ["runtime", "year_of_release", "renting_price", "avg_rating", "rating"]
 
 
-def manual_mean(arr):
-    arr = arr[~np.isnan(arr)]
-    return np.sum(arr) / arr.size if arr.size > 0 else np.nan
-
-
-def manual_median(arr):
-    arr = arr[~np.isnan(arr)]
-    if arr.size == 0:
-        return np.nan
-    arr_sorted = np.sort(arr)
-    n = arr_sorted.size
-    mid = n // 2
-    if n % 2 == 0:
-        return (arr_sorted[mid - 1] + arr_sorted[mid]) / 2
-    return arr_sorted[mid]
-
-
-def manual_mode(arr):
-    arr = arr[~np.isnan(arr)]
-    if arr.size == 0:
-        return np.nan
-    values, counts = np.unique(arr, return_counts=True)
-    return values[np.argmax(counts)]
+def fmt(value):
+    return "N/A" if pd.isna(value) else f"{value:.2f}"
 
 
 def main():
     conn = get_connection()
-    cursor = conn.cursor()
 
-    df = fetch_dataframe(
-        cursor,
-        """
-        SELECT
-            m.runtime,
-            m.year_of_release,
-            m.renting_price,
-            m.avg_rating,
-            r.rating
-        FROM movies m
-        LEFT JOIN rentings r
-            ON r.movie_id = m.movie_id
-        """
-    )
+    try:
+        stats = stream_stats(conn, STATS_QUERY, NUMERIC_COLS, batch_size=BATCH_SIZE)
+    finally:
+        conn.close()
 
-    if df.empty:
+    if all(s.count + s.running.nulls == 0 for s in stats.values()):
         print("No data available for Person 3.")
-        cursor.close()
-        conn.close()
         return
 
     print("\nPERSON 3 — DESCRIPTIVE STATISTICS")
 
-    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
-
+    # Same rows as df.describe(), built from the streamed accumulators.
     print("\nDESCRIBE() OUTPUT")
-    print(df[numeric_cols].describe())
+    print(pd.DataFrame({col: s.summary() for col, s in stats.items()}))
 
-    for col in numeric_cols:
-        arr = df[col].astype(float).to_numpy()
+    for col, s in stats.items():
+        summary = s.summary()
 
         print(f"\nCOLUMN: {col}")
 
-        print(f"Mean (manual): {manual_mean(arr):.2f}")
-        print(f"Median (manual): {manual_median(arr):.2f}")
-        print(f"Mode (manual): {manual_mode(arr):.2f}")
-
-        arr_clean = arr[~np.isnan(arr)]
-
-        if arr_clean.size > 0:
-            print(f"Min: {np.min(arr_clean):.2f}")
-            print(f"Max: {np.max(arr_clean):.2f}")
-            print(f"Std Dev: {np.std(arr_clean, ddof=1):.2f}")
-        else:
-            print("Min: N/A")
-            print("Max: N/A")
-            print("Std Dev: N/A")
-
-    cursor.close()
-    conn.close()
+        # Mean from the running (Welford) accumulator; median and mode
+        # from exact value counts instead of sorting the whole column.
+        print(f"Mean (manual): {fmt(summary['mean'])}")
+        print(f"Median (manual): {fmt(summary['50%'])}")
+        print(f"Mode (manual): {fmt(s.values.mode())}")
+        print(f"Min: {fmt(summary['min'])}")
+        print(f"Max: {fmt(summary['max'])}")
+        print(f"Std Dev: {fmt(summary['std'])}")
+        print(f"NULLs: {s.running.nulls}")
 
 
 if __name__ == "__main__":
@@ -1,12 +1,5 @@
-import pandas as pd
 from server import get_connection
-
-
-def fetch_dataframe(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    return pd.DataFrame(rows, columns=columns)
+from frames import fetch_dataframe
 
 
 def main():
@@ -1,29 +1,47 @@
 import pandas as pd
-import numpy as np
 from server import get_connection
-
-
-def fetch_dataframe(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    return pd.DataFrame(rows, columns=columns)
-
-
-def as_float_series(series):
-    return pd.to_numeric(series, errors="coerce").astype(float)
-
-
-def detect_outliers_iqr(series):
-    s = as_float_series(series).dropna()
-    if s.empty:
-        return pd.Series(dtype=float)
-    q1 = s.quantile(0.25)
-    q3 = s.quantile(0.75)
-    iqr = q3 - q1
-    lower = q1 - 1.5 * iqr
-    upper = q3 + 1.5 * iqr
-    return s[(s < lower) | (s > upper)]
+from frames import fetch_dataframe
+from streaming import fetch_outliers, iqr_fences, stream_stats
+
+SOURCE = """
+    movies m
+    LEFT JOIN rentings r
+        ON r.movie_id = m.movie_id
+    LEFT JOIN customers c
+        ON c.customer_id = r.customer_id
+"""
+
+# Column name -> SQL expression over SOURCE.
+OUTLIER_COLUMNS = {
+    "runtime": "m.runtime",
+    "renting_price": "m.renting_price",
+    "avg_rating": "m.avg_rating",
+    "rating": "r.rating",
+    "year_of_release": "m.year_of_release",
+}
+
+# KLL accuracy: rank error ~1.3% at k=200, memory O(k) per column.
+SKETCH_K = 200
+
+
+def detect_outliers_iqr(conn):
+    """
+    Pass 1 streams every column once through a server-side cursor and
+    keeps quantile accumulators (exact counts, KLL sketch when a column
+    has too many distinct values). Pass 2 asks PostgreSQL only for rows
+    outside the fences. Returns {column: (count, first outliers)}.
+    """
+    query = "SELECT {} FROM {}".format(", ".join(OUTLIER_COLUMNS.values()), SOURCE)
+    stats = stream_stats(conn, query, list(OUTLIER_COLUMNS), k=SKETCH_K)
+
+    results = {}
+    with conn.cursor() as cursor:
+        for col, expr in OUTLIER_COLUMNS.items():
+            if stats[col].count == 0:
+                results[col] = (0, [])
+                continue
+            results[col] = fetch_outliers(cursor, expr, SOURCE, iqr_fences(stats[col]))
+    return results
 
 
 def main():
@@ -36,19 +54,9 @@ def main():
         SELECT
             m.title,
             m.genre,
-            m.runtime,
-            m.year_of_release,
-            m.renting_price,
-            m.avg_rating,
-            r.rating,
-            c.country,
-            c.gender
-        FROM movies m
-        LEFT JOIN rentings r
-            ON r.movie_id = m.movie_id
-        LEFT JOIN customers c
-            ON c.customer_id = r.customer_id
-        """
+            c.country
+        FROM {}
+        """.format(SOURCE)
     )
 
     if df.empty:
@@ -61,19 +69,17 @@ def main():
 
     print("\nOUTLIER DETECTION (IQR METHOD)")
 
-    for col in ["runtime", "renting_price", "avg_rating", "rating", "year_of_release"]:
-        if col in df.columns:
-            outliers = detect_outliers_iqr(df[col])
-            print(f"\nColumn: {col}")
-            print(f"Number of outliers: {len(outliers)}")
-            if not outliers.empty:
-                print(outliers.head())
+    for col, (count, head) in detect_outliers_iqr(conn).items():
+        print(f"\nColumn: {col}")
+        print(f"Number of outliers: {count}")
+        if head:
+            print(pd.Series(head, name=col))
 
     print("\nVALUE COUNTS — GENRE (Top 5)")
-    print(df["genre"].astype(str).value_counts().head(5))
+    print(df["genre"].value_counts().head(5))
 
     print("\nVALUE COUNTS — COUNTRY (Top 5)")
-    print(df["country"].astype(str).value_counts().head(5))
+    print(df["country"].value_counts().head(5))
 
     print("\nVALUE COUNTS — TITLE (Top 5 Most Frequent)")
     print(df["title"].astype(str).value_counts().head(5))
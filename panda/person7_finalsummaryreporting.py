@@ -1,19 +1,13 @@
-import pandas as pd
-from server import get_connection
-
-
-def fetch_dataframe(cursor, query):
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    return pd.DataFrame(rows, columns=columns)
+import os
+import sys
 
+from server import get_connection
+from frames import fetch_dataframe
+from incremental import IncrementalSummary
 
-def clean_numeric(df, columns):
-    for col in columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
+# Aggregate state saved between runs; only rentings added, updated or
+# deleted since the last run are read. `--full` rebuilds it from scratch.
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "person7_summary.npz")
 
 
 def main():
@@ -39,6 +33,7 @@ def main():
             ON r.movie_id = m.movie_id
         LEFT JOIN customers c
             ON c.customer_id = r.customer_id
+        LIMIT 5
         """
     )
 
@@ -48,21 +43,36 @@ def main():
         conn.close()
         return
 
-    numeric_columns = [
-        "runtime",
-        "year_of_release",
-        "renting_price",
-        "avg_rating",
-        "rating"
-    ]
-
-    df = clean_numeric(df, numeric_columns)
-
     print("\nPERSON 7 — FINAL SUMMARY & REPORTING")
 
     print("\nCLEANED DATASET PREVIEW")
     print(df.head())
 
+    # Same measures as the person5 cube, kept up to date incrementally.
+    cube = IncrementalSummary.load_or_build(cursor, STATE_PATH, rebuild="--full" in sys.argv[1:])
+    delta = cube.last_delta
+    by_genre = cube.by("genre").sort_values("total_rentals", ascending=False)
+    by_country = cube.by("country").sort_values("total_revenue", ascending=False)
+    by_gender = cube.by("gender")
+
+    print("\nKEY FIGURES")
+    if delta["rebuilt"]:
+        print(f"Rebuilt from all rentings (log_id {cube.high_water_mark})")
+    else:
+        print(
+            f"Refreshed up to log_id {cube.high_water_mark}: {delta['new_rentings']} new, "
+            f"{delta['updated']} updated, {delta['deleted']} deleted rentings"
+        )
+    print(f"Rated rentals: {int(cube.total['total_rentals'])}")
+    print(f"Average customer rating: {cube.total['avg_customer_rating']:.2f}")
+    print(f"Total revenue: {cube.total['total_revenue']:.2f}")
+    if not by_genre.empty:
+        print(f"Most rented genre: {by_genre.index[0]} ({int(by_genre['total_rentals'].iloc[0])} rated rentals)")
+    if not by_country.empty:
+        print(f"Top country by revenue: {by_country.index[0]} ({by_country['total_revenue'].iloc[0]:.2f})")
+    for gender, row in by_gender.iterrows():
+        print(f"{gender}: {int(row['total_rentals'])} rated rentals, avg rating {row['avg_customer_rating']:.2f}")
+
     print("\nFINAL CONCLUSIONS")
 
     print("1) Rental activity is concentrated in a limited number of genres and titles.")
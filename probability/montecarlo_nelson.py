@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from server import format_probability
 
-import random
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 from server import get_connection
+from sampling import AliasSampler
+from distributions import ecdf
 
 # -----------------------------
 # Optional visualization (Bonus)
@@ -46,13 +49,12 @@ def load_rentings_data() -> Tuple[List[Optional[int]], List[int]]:
 
 def exact_probability_rating_geq_k(ratings: List[Optional[int]], k: int = 4) -> Tuple[float, int, int]:
 
-    rated = [r for r in ratings if r is not None]
-    total_rated = len(rated)
-    if total_rated == 0:
+    dist = ecdf(ratings)  # NULL ratings are dropped
+    if dist.is_empty:
         return 0.0, 0, 0
 
-    favorable = sum(1 for r in rated if r >= k)
-    return favorable / total_rated, favorable, total_rated
+    favorable = int(dist.count_at_least(k))
+    return favorable / dist.total, favorable, dist.total
 
 def rentals_per_customer(customer_ids: List[int]) -> Dict[int, int]:
 
@@ -63,13 +65,12 @@ def rentals_per_customer(customer_ids: List[int]) -> Dict[int, int]:
 
 def exact_probability_customer_rents_geq_2(customer_ids: List[int]) -> Tuple[float, int, int]:
 
-    counts = rentals_per_customer(customer_ids)
-    total_customers = len(counts)
-    if total_customers == 0:
+    dist = ecdf(list(rentals_per_customer(customer_ids).values()))
+    if dist.is_empty:
         return 0.0, 0, 0
 
-    favorable = sum(1 for v in counts.values() if v >= 2)
-    return favorable / total_customers, favorable, total_customers
+    favorable = int(dist.count_at_least(2))
+    return favorable / dist.total, favorable, dist.total
 
 # -----------------------------
 # Monte Carlo simulations 
@@ -79,22 +80,26 @@ def simulate_rating_geq_k(
     ratings: List[Optional[int]],
     n_trials: int = 10_000,
     k: int = 4,
-    seed: Optional[int] = 42
+    seed: Optional[int] = 42,
+    sampler: Optional[AliasSampler] = None
 ) -> Tuple[float, int, int]:
 
-    if seed is not None:
-        random.seed(seed)
+    if not ratings:
+        return 0.0, 0, 0
 
-    favorable_sim = 0
-    total_rated_sim = 0
+    rng = np.random.default_rng(seed)
 
-    for _ in range(n_trials):
-        r = random.choice(ratings)
-        if r is None:
-            continue
-        total_rated_sim += 1
-        if r >= k:
-            favorable_sim += 1
+    # NULL ratings stay in the table as their own value: a draw that lands
+    # on NULL is skipped, exactly like picking a random renting row.
+    # Pass a sampler built once from `ratings` to skip rebuilding the table.
+    if sampler is None:
+        sampler = AliasSampler.from_observations(ratings)
+    rated = np.array([v is not None for v in sampler.values], dtype=bool)
+    favorable = np.array([v is not None and v >= k for v in sampler.values], dtype=bool)
+
+    codes = sampler.sample_codes(n_trials, rng)
+    total_rated_sim = int(np.count_nonzero(rated[codes]))
+    favorable_sim = int(np.count_nonzero(favorable[codes]))
 
     p_hat = favorable_sim / total_rated_sim if total_rated_sim else 0.0
     return p_hat, favorable_sim, total_rated_sim
@@ -105,19 +110,17 @@ def simulate_customer_rents_geq_2(
     seed: Optional[int] = 42
 ) -> Tuple[float, int, int]:
 
-    if seed is not None:
-        random.seed(seed)
+    rng = np.random.default_rng(seed)
 
     counts = rentals_per_customer(customer_ids)
-    customers = list(counts.keys())
-    if not customers:
+    if not counts:
         return 0.0, 0, 0
 
-    favorable = 0
-    for _ in range(n_trials):
-        c = random.choice(customers)
-        if counts[c] >= 2:
-            favorable += 1
+    # Picking a random customer = picking a rental count weighted by how
+    # many customers have it.
+    sampler = AliasSampler.from_observations(counts.values())
+    event = sampler.sample_event(sampler.values >= 2, n_trials, rng)
+    favorable = int(np.count_nonzero(event))
 
     return favorable / n_trials, favorable, n_trials
 
@@ -134,9 +137,12 @@ def convergence_study(
     if sizes is None:
         sizes = [100, 500, 1_000, 5_000, 10_000, 50_000]
 
+    # One alias table for every n; only the number of draws changes.
+    sampler = AliasSampler.from_observations(ratings) if ratings else None
+
     results: List[Tuple[int, float]] = []
     for n in sizes:
-        p_hat, _, _ = simulate_rating_geq_k(ratings, n_trials=n, k=k, seed=42)
+        p_hat, _, _ = simulate_rating_geq_k(ratings, n_trials=n, k=k, seed=42, sampler=sampler)
         results.append((n, p_hat))
     return results
 
@@ -184,18 +190,14 @@ def plot_cumulative_rating_probability(ratings: List[Optional[int]]) -> None:
         print("Install it with: pip install matplotlib")
         return
 
-    rated = [r for r in ratings if r is not None]
-    if not rated:
+    dist = ecdf(ratings)
+    if dist.is_empty:
         print("\nNo non-null ratings available to plot.")
         return
 
-    total = len(rated)
-    unique_ratings = sorted(set(rated))
-
-    cumulative_probs = []
-    for x in unique_ratings:
-        count = sum(1 for r in rated if r >= x)
-        cumulative_probs.append(count / total)
+    # P(rating ≥ x) for every distinct rating in one searchsorted.
+    unique_ratings = dist.values
+    cumulative_probs = dist.at_least(unique_ratings)
 
     plt.figure(figsize=(9, 5))
     plt.plot(unique_ratings, cumulative_probs, marker="o")
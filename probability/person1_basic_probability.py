@@ -1,9 +1,5 @@
 from server import get_connection
-
-
-def fetch_data(cursor, query: str):
-    cursor.execute(query)
-    return cursor.fetchall()
+from aggregates import TableCounts, as_number_keys, fetch_counts
 
 
 def probability(favorable: int, total: int) -> float:
@@ -15,17 +11,6 @@ def pct(p: float, decimals: int = 2) -> str:
     return f"{p * 100:.{decimals}f}%"
 
 
-def count_by_key(rows, key_index: int):
-    """Counts occurrences of rows[*][key_index], skipping None."""
-    counts = {}
-    for row in rows:
-        key = row[key_index]
-        if key is None:
-            continue
-        counts[key] = counts.get(key, 0) + 1
-    return counts
-
-
 def print_prob(title: str, sample_space_desc: str, event_desc: str, favorable: int, total: int):
     p = probability(favorable, total)
     print(f"\n{title}")
@@ -34,29 +19,38 @@ def print_prob(title: str, sample_space_desc: str, event_desc: str, favorable: i
     print(f"P(A) = |A| / |S| = {favorable} / {total} = {p:.6f} ({pct(p)})")
 
 
+YEAR_THRESHOLDS = [2000, 2010, 2020]
+RUNTIME_THRESHOLDS = [90, 120, 150]
+
+
+def count_specs():
+    """Everything main() needs, counted by the database in one round trip."""
+    movie_filters = {f"year>{y}": f"year_of_release > {int(y)}" for y in YEAR_THRESHOLDS}
+    movie_filters.update({f"runtime>{m}": f"runtime > {int(m)}" for m in RUNTIME_THRESHOLDS})
+    return [
+        TableCounts("movies", group_by=["genre"], filters=movie_filters),
+        TableCounts("rentings", group_by=["rating"], filters={"rated": "rating IS NOT NULL"}),
+        TableCounts("customers", group_by=["country", "gender"]),
+    ]
+
+
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    # Pull minimal raw data (SQL only for extraction)
-    movies = fetch_data(cursor, "SELECT genre, runtime, year_of_release FROM movies")
-    rentings = fetch_data(cursor, "SELECT rating FROM rentings")
-    customers = fetch_data(cursor, "SELECT country, gender FROM customers")
+    # Only aggregate rows cross the wire (SQL only for extraction/counting)
+    counts = fetch_counts(cursor, count_specs())
 
-    total_movies = len(movies)
-    total_rentings = len(rentings)
-    total_customers = len(customers)
+    total_movies = counts.total("movies")
+    total_rentings = counts.total("rentings")
+    total_customers = counts.total("customers")
 
     # 1) P(movie belongs to each genre)
     print("\n" + "=" * 60)
     print("1) MOVIE GENRE PROBABILITIES")
     print("=" * 60)
 
-    genre_counts = {}
-    for genre, _, _ in movies:
-        if genre is None:
-            continue
-        genre_counts[genre] = genre_counts.get(genre, 0) + 1
+    genre_counts = counts.groups("movies", "genre")
 
     for genre in sorted(genre_counts):
         favorable = genre_counts[genre]
@@ -73,8 +67,8 @@ def main():
     print("2) MOVIES RELEASED AFTER A YEAR")
     print("=" * 60)
 
-    for year in [2000, 2010, 2020]:
-        favorable = sum(1 for _, _, y in movies if y is not None and y > year)
+    for year in YEAR_THRESHOLDS:
+        favorable = counts.count("movies", f"year>{year}")
         print_prob(
             title=f"Release year > {year}",
             sample_space_desc="All movies",
@@ -88,12 +82,12 @@ def main():
     print("3) RENTINGS WITH A RATING (NOT NULL)")
     print("=" * 60)
 
-    rated = [r for (r,) in rentings if r is not None]
+    total_rated = counts.count("rentings", "rated")
     print_prob(
         title="Renting has a rating",
         sample_space_desc="All rentings",
         event_desc="Renting.rating is not NULL",
-        favorable=len(rated),
+        favorable=total_rated,
         total=total_rentings,
     )
 
@@ -103,13 +97,10 @@ def main():
     print("=" * 60)
 
     # Sample space here is ONLY rated rentings (since NULL isn't a 1–5 value)
-    total_rated = len(rated)
-    rating_counts = {}
-    for r in rated:
-        rating_counts[r] = rating_counts.get(r, 0) + 1
+    rating_counts = as_number_keys(counts.groups("rentings", "rating"))
 
     for k in range(1, 6):
-        favorable = rating_counts.get(k, 0)
+        favorable = rating_counts.get(float(k), 0)
         print_prob(
             title=f"Rating = {k}",
             sample_space_desc="All rated rentings (rating NOT NULL)",
@@ -123,8 +114,8 @@ def main():
     print("5) MOVIE RUNTIME THRESHOLDS")
     print("=" * 60)
 
-    for minutes in [90, 120, 150]:
-        favorable = sum(1 for _, runtime, _ in movies if runtime is not None and runtime > minutes)
+    for minutes in RUNTIME_THRESHOLDS:
+        favorable = counts.count("movies", f"runtime>{minutes}")
         print_prob(
             title=f"Runtime > {minutes} minutes",
             sample_space_desc="All movies",
@@ -138,11 +129,7 @@ def main():
     print("6) CUSTOMER COUNTRY PROBABILITIES")
     print("=" * 60)
 
-    country_counts = {}
-    for country, _ in customers:
-        if country is None:
-            continue
-        country_counts[country] = country_counts.get(country, 0) + 1
+    country_counts = counts.groups("customers", "country")
 
     for country in sorted(country_counts):
         favorable = country_counts[country]
@@ -159,11 +146,7 @@ def main():
     print("7) CUSTOMER GENDER PROBABILITIES")
     print("=" * 60)
 
-    gender_counts = {}
-    for _, gender in customers:
-        if gender is None:
-            continue
-        gender_counts[gender] = gender_counts.get(gender, 0) + 1
+    gender_counts = counts.groups("customers", "gender")
 
     for gender in sorted(gender_counts):
         favorable = gender_counts[gender]
@@ -1,9 +1,10 @@
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
 from server import format_probability
+from bootstrap import Bootstrap, format_interval, ratio
+from conditional_engine import ConditionalEngine, Event
 
 # ============================
 # Load Environment Variables
@@ -30,20 +31,60 @@ def get_connection():
     )
 
 # ============================
-# Helper Functions
-# ============================
-
-
-def run_query(query):
+# Sample spaces and events
+# ============================
+
+SOURCES = {
+    "movies": "public.movies m",
+    "rated_rentings": """
+        public.rentings r
+        JOIN public.movies m ON r.movie_id = m.movie_id
+        WHERE r.rating IS NOT NULL
+    """,
+    "rentings": "public.rentings r JOIN public.movies m ON r.movie_id = m.movie_id",
+    "renting_customers": """
+        (SELECT DISTINCT c.customer_id, c.gender
+         FROM customers c
+         JOIN rentings r ON r.customer_id = c.customer_id) rc
+    """,
+}
+
+DRAMA = Event("m.genre = 'Drama'", "Drama")
+COMEDY = Event("m.genre = 'Comedy'", "Comedy")
+RUNTIME_GT_100 = Event("m.runtime > 100", "Runtime > 100")
+RUNTIME_GT_120 = Event("m.runtime > 120", "Runtime > 120")
+YEAR_LT_2000 = Event("m.year_of_release < 2000", "Release year < 2000")
+YEAR_GT_2015 = Event("m.year_of_release > 2015", "Released after 2015")
+RATING_GE_4 = Event("r.rating >= 4", "Rating >= 4")
+FEMALE = Event("rc.gender = 'Female'", "Female")
+
+
+def build_engine():
+    """All conditionals of this script, evaluated in one SQL statement."""
+    engine = ConditionalEngine(SOURCES)
+    engine.add("drama|runtime>100", "movies", DRAMA, RUNTIME_GT_100)
+    engine.add("rating>=4|comedy", "rated_rentings", RATING_GE_4, COMEDY)
+    engine.add("after2015|rented", "rentings", YEAR_GT_2015)
+    engine.add("female|rented", "renting_customers", FEMALE)
+    engine.add("runtime>120|year<2000", "movies", RUNTIME_GT_120, YEAR_LT_2000)
+    engine.add("drama", "movies", DRAMA)
+    return engine
+
+
+def fetch_results():
     conn = get_connection()
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query)
-            return cur.fetchall()
+        with conn.cursor() as cur:
+            return build_engine().run(cur)
     finally:
         conn.close()
 
 
+# ============================
+# Helper Functions
+# ============================
+
+
 def conditional_probability(total_count, favorable_count):
     """
     P(A | B) = P(A ∩ B) / P(B)
@@ -53,108 +94,72 @@ def conditional_probability(total_count, favorable_count):
     return favorable_count / total_count
 
 
+def conditional_interval(sample_size, total_count, favorable_count, n_boot=2000):
+    """
+    Bootstrap CI for P(A | B) from three counts.
+    Cells: 0 = not B, 1 = B and not A, 2 = A and B.
+    """
+    cells = [sample_size - total_count, total_count - favorable_count, favorable_count]
+    return Bootstrap(cells, n_boot=n_boot).interval(ratio([2], [1, 2]))
+
+
+def print_conditional(label, result):
+    ci = conditional_interval(result.total, result.condition, result.favorable)
+    print(f"{label} = {format_interval(ci)}")
+
+
 # ============================
 # 1. P(Genre = Drama | Runtime > 100)
 # ============================
 
-def prob_drama_given_runtime_gt_100():
-    movies = run_query("SELECT genre, runtime FROM movies;")
-
-    condition = [m for m in movies if m["runtime"] > 100]
-    favorable = [m for m in condition if m["genre"] == "Drama"]
-
-    p = conditional_probability(len(condition), len(favorable))
-    print(f"P(Drama | Runtime > 100) = {format_probability(p)}")
+def prob_drama_given_runtime_gt_100(results):
+    print_conditional("P(Drama | Runtime > 100)", results["drama|runtime>100"])
 
 
 # ============================
 # 2. P(Rating ≥ 4 | Genre = Comedy)
 # ============================
 
-def prob_rating_ge_4_given_comedy():
-    data = run_query("""
-        SELECT m.genre, r.rating
-        FROM movies m
-        JOIN rentings r ON r.movie_id = m.movie_id
-        WHERE r.rating IS NOT NULL;
-    """)
-
-    condition = [d for d in data if d["genre"] == "Comedy"]
-    favorable = [d for d in condition if d["rating"] >= 4]
-
-    p = conditional_probability(len(condition), len(favorable))
-    print(f"P(Drama | Runtime > 100) = {format_probability(p)}")
+def prob_rating_ge_4_given_comedy(results):
+    print_conditional("P(Rating >= 4 | Comedy)", results["rating>=4|comedy"])
 
 
 # ============================
 # 3. P(Movie released after 2015 | Movie was rented)
 # ============================
 
-def prob_released_after_2015_given_rented():
-    data = run_query("""
-        SELECT m.year_of_release
-        FROM movies m
-        JOIN rentings r ON r.movie_id = m.movie_id;
-    """)
-
-    condition = data  # all rented movies
-    favorable = [d for d in condition if d["year_of_release"] > 2015]
-
-    p = conditional_probability(len(condition), len(favorable))
-    print(f"P(Released after 2015 | Movie was rented) = {format_probability(p)}")
+def prob_released_after_2015_given_rented(results):
+    # Sample space is already "rented movies", so B is every row.
+    print_conditional("P(Released after 2015 | Movie was rented)", results["after2015|rented"])
 
 
 # ============================
 # 4. P(Customer is Female | Customer rented ≥ 1 movie)
 # ============================
 
-def prob_female_given_rented():
-    data = run_query("""
-        SELECT DISTINCT c.customer_id, c.gender
-        FROM customers c
-        JOIN rentings r ON r.customer_id = c.customer_id;
-    """)
-
-    condition = data
-    favorable = [d for d in condition if d["gender"] == "Female"]
-
-    p = conditional_probability(len(condition), len(favorable))
-    print(f"P(Female | Rented at least one movie) = {format_probability(p)}")
+def prob_female_given_rented(results):
+    print_conditional("P(Female | Rented at least one movie)", results["female|rented"])
 
 
 # ============================
 # 5. P(Runtime > 120 | Year < 2000)
 # ============================
 
-def prob_runtime_gt_120_given_year_lt_2000():
-    movies = run_query("""
-        SELECT runtime, year_of_release
-        FROM movies;
-    """)
-
-    condition = [m for m in movies if m["year_of_release"] < 2000]
-    favorable = [m for m in condition if m["runtime"] > 120]
-
-    p = conditional_probability(len(condition), len(favorable))
-    print(f"P(Runtime > 120 | Release year < 2000) = {format_probability(p)}")
+def prob_runtime_gt_120_given_year_lt_2000(results):
+    print_conditional("P(Runtime > 120 | Release year < 2000)", results["runtime>120|year<2000"])
 
 
 # ============================
 # Compare Conditional vs Unconditional
 # ============================
 
-def compare_example_drama():
-    movies = run_query("SELECT genre, runtime FROM movies;")
-
+def compare_example_drama(results):
     # Unconditional P(Drama)
-    drama = [m for m in movies if m["genre"] == "Drama"]
-    p_unconditional = len(drama) / len(movies)
+    p_unconditional = results["drama"].probability
 
     # Conditional P(Drama | Runtime > 100)
-    condition = [m for m in movies if m["runtime"] > 100]
-    drama_condition = [m for m in condition if m["genre"] == "Drama"]
-    p_conditional = conditional_probability(
-        len(condition), len(drama_condition))
+    conditional = results["drama|runtime>100"]
+    p_conditional = conditional_probability(conditional.condition, conditional.favorable)
 
     print(f"P(Drama) = {format_probability(p_unconditional)}")
     print(f"P(Drama | Runtime > 100) = {format_probability(p_conditional)}")
@@ -167,12 +172,13 @@ def compare_example_drama():
 if __name__ == "__main__":
     print("\n--- Person 2: Conditional Probability ---\n")
 
-    prob_drama_given_runtime_gt_100()
-    prob_rating_ge_4_given_comedy()
-    prob_released_after_2015_given_rented()
-    prob_female_given_rented()
-    prob_runtime_gt_120_given_year_lt_2000()
+    results = fetch_results()
 
-    print("\n--- Comparison Example ---\n")
-    compare_example_drama()
+    prob_drama_given_runtime_gt_100(results)
+    prob_rating_ge_4_given_comedy(results)
+    prob_released_after_2015_given_rented(results)
+    prob_female_given_rented(results)
+    prob_runtime_gt_120_given_year_lt_2000(results)
 
+    print("\n--- Comparison Example ---\n")
+    compare_example_drama(results)
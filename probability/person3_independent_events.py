@@ -1,4 +1,8 @@
+import numpy as np
+
 from server import get_connection
+from contingency import print_independence_table, test_all_pairs
+from bootstrap import Bootstrap, format_interval, independence_gap, ratio, two_event_cells
 
 def fetch_data(cursor, query):
     cursor.execute(query)
@@ -36,6 +40,65 @@ def independence_report(title, p_a, p_b, p_a_and_b, tolerance_pct=1.0):
         print(f"Conclusion: Likely dependent (difference larger than {tolerance_pct:.2f}%)")
     print("")
 
+def bootstrap_report(a_count, b_count, a_and_b_count, total, n_boot=2000):
+    cells = two_event_cells(a_count, b_count, a_and_b_count, total)
+    boot = Bootstrap(cells, n_boot=n_boot)
+    results = boot.intervals({
+        "P(A)": ratio([1, 3]),
+        "P(B)": ratio([2, 3]),
+        "P(A and B)": ratio([3]),
+    })
+
+    print("Bootstrap 95% confidence intervals:")
+    for name, ci in results.items():
+        print(f"  {name}: {format_interval(ci)}")
+
+    gap = boot.interval(independence_gap)
+    print(f"  P(A and B) - P(A) x P(B): {gap.estimate * 100:.2f}% "
+          f"(95% CI {gap.lower * 100:.2f}% – {gap.upper * 100:.2f}%)")
+    if gap.lower <= 0 <= gap.upper:
+        print("  The interval contains 0, so the data is consistent with independence.")
+    else:
+        print("  The interval excludes 0, so the dependence is unlikely to be sampling noise.")
+    print("")
+
+def all_pairs_report(cursor):
+    rows = fetch_data(
+        cursor,
+        """
+        SELECT
+            m.genre,
+            CASE
+                WHEN r.rating IS NULL THEN NULL
+                WHEN r.rating >= 4 THEN '4+'
+                ELSE 'below 4'
+            END AS rating_bucket,
+            c.gender,
+            c.country
+        FROM rentings r
+        JOIN movies m
+            ON m.movie_id = r.movie_id
+        JOIN customers c
+            ON c.customer_id = r.customer_id
+        """
+    )
+    if not rows:
+        print("Not enough data to run the all-pairs test (no rentings).")
+        return
+
+    data = np.array(rows, dtype=object)
+    columns = {
+        "genre": data[:, 0],
+        "rating bucket": data[:, 1],
+        "gender": data[:, 2],
+        "country": data[:, 3],
+    }
+
+    print("EXPERIMENT 3: Chi-square / G-test for every pair of categories (sample: rentings)")
+    print_independence_table(test_all_pairs(columns))
+    print("Unlike the tolerance check above, the p-value accounts for sample size.")
+    print("")
+
 def main():
     conn = get_connection()
     cursor = conn.cursor()
@@ -89,6 +152,7 @@ def main():
         p_a_and_b,
         tolerance_pct=1.0
     )
+    bootstrap_report(a_count, b_count, a_and_b_count, total)
 
     customer_renting_gender = fetch_data(
         cursor,
@@ -169,6 +233,9 @@ def main():
         p_a2_and_b2,
         tolerance_pct=1.0
     )
+    bootstrap_report(a2_count, b2_count, a2_and_b2_count, total_customers)
+
+    all_pairs_report(cursor)
 
     cursor.close()
     conn.close()
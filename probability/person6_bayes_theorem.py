@@ -1,29 +1,12 @@
 from server import get_connection
-
-def fetch_data(cursor, query):
-    cursor.execute(query)
-    return cursor.fetchall()
+from contingency import JointCounts, bayes_table, label_index
+from bootstrap import Bootstrap, format_interval, ratio, two_event_cells
 
 def percentage(part, total):
     if total == 0:
         return 0
     return (part / total) * 100
 
-def normalize_text(value):
-    if value is None:
-        return None
-    return str(value).strip().lower()
-
-def most_common_non_null(values):
-    counts = {}
-    for v in values:
-        if v is None:
-            continue
-        counts[v] = counts.get(v, 0) + 1
-    if not counts:
-        return None
-    return max(counts.items(), key=lambda x: x[1])[0]
-
 def bayes_posterior_percent(prior_percent, likelihood_percent, evidence_percent):
     if evidence_percent == 0:
         return 0
@@ -40,156 +23,95 @@ def print_bayes_block(title, prior, likelihood, evidence, posterior_bayes, poste
     print(f"Difference: {diff:.2f}%")
     print("")
 
+def print_bayes_intervals(a_count, e_count, a_and_e_count, total, n_boot=2000):
+    # Cells follow event_cells(A, E): 1 = A only, 2 = E only, 3 = A and E
+    cells = two_event_cells(a_count, e_count, a_and_e_count, total)
+    results = Bootstrap(cells, n_boot=n_boot).intervals({
+        "Prior P(A)": ratio([1, 3]),
+        "Likelihood P(E | A)": ratio([3], [1, 3]),
+        "Evidence P(E)": ratio([2, 3]),
+        "Posterior P(A | E)": ratio([3], [2, 3]),
+    })
+    print("Bootstrap 95% confidence intervals:")
+    for name, ci in results.items():
+        print(f"  {name}: {format_interval(ci)}")
+    print("")
+
+def print_bayes_example(title, crosstab, hypothesis, evidence):
+    """Bayes block for one (hypothesis row, evidence column) of a crosstab."""
+    table = crosstab.table
+    i = list(crosstab.row_labels).index(hypothesis)
+    j = list(crosstab.col_labels).index(evidence)
+    total = int(table.sum())
+    a_count = int(table[i].sum())
+    e_count = int(table[:, j].sum())
+    a_and_e = int(table[i, j])
+
+    prior = percentage(a_count, total)
+    likelihood = percentage(a_and_e, a_count)
+    evidence_pct = percentage(e_count, total)
+    posterior = bayes_posterior_percent(prior, likelihood, evidence_pct)
+    direct = percentage(a_and_e, e_count)
+
+    print_bayes_block(title, prior, likelihood, evidence_pct, posterior, direct)
+    print_bayes_intervals(a_count, e_count, a_and_e, total)
+
+def print_posterior_table(title, crosstab):
+    """P(row | column) for every row and column of the table."""
+    bayes = bayes_table(crosstab.table)
+    cols = [str(c) for c in crosstab.col_labels]
+    print(title)
+    print("{:<14}".format("") + "".join(f"{c:>12}" for c in cols))
+    for label, row in zip(crosstab.row_labels, bayes.posterior):
+        print(f"{str(label):<14}" + "".join(f"{p * 100:>11.2f}%" for p in row))
+    print("")
+
 def main():
     conn = get_connection()
     cursor = conn.cursor()
 
-    rated_rentings = fetch_data(
-        cursor,
-        """
-        SELECT
-            m.genre,
-            r.rating
-        FROM rentings r
-        JOIN movies m
-            ON m.movie_id = r.movie_id
-        WHERE r.rating IS NOT NULL
-        """
-    )
+    joint = JointCounts.from_rentings(cursor)
+    cursor.close()
+    conn.close()
 
-    if not rated_rentings:
-        print("Not enough data to run Person 6 (no rated rentings).")
-        cursor.close()
-        conn.close()
+    if joint is None:
+        print("Not enough data to run Person 6 (no rentings).")
         return
 
-    rated_genres = [normalize_text(g) for (g, _) in rated_rentings]
-    genre_counts = {}
-    for g in rated_genres:
-        if g is None:
-            continue
-        genre_counts[g] = genre_counts.get(g, 0) + 1
-
-    preferred_genre = "drama"
-    if preferred_genre not in genre_counts:
-        preferred_genre = most_common_non_null(rated_genres)
-
-    total_rated = len(rated_rentings)
-    total_preferred_genre = sum(1 for (g, _) in rated_rentings if normalize_text(g) == preferred_genre)
-
-    evidence_count = sum(1 for (_, rating) in rated_rentings if rating is not None and rating >= 4)
-    evidence_percent = percentage(evidence_count, total_rated)
-
-    prior_percent = percentage(total_preferred_genre, total_rated)
-
-    likelihood_count = sum(
-        1 for (g, rating) in rated_rentings
-        if normalize_text(g) == preferred_genre and rating is not None and rating >= 4
-    )
-    likelihood_percent = percentage(likelihood_count, total_preferred_genre)
-
-    posterior_bayes = bayes_posterior_percent(prior_percent, likelihood_percent, evidence_percent)
-
-    direct_numerator = sum(
-        1 for (g, rating) in rated_rentings
-        if rating is not None and rating >= 4 and normalize_text(g) == preferred_genre
-    )
-    direct_denominator = sum(
-        1 for (_, rating) in rated_rentings
-        if rating is not None and rating >= 4
-    )
-    posterior_direct = percentage(direct_numerator, direct_denominator)
+    # EXAMPLE 1 — sample space: rated rentings
+    genre_rating = joint.marginal("genre", "rating")
+    if genre_rating.table.sum() == 0 or "high" not in genre_rating.col_labels:
+        print("Not enough data to run Person 6 (no rated rentings).")
+        return
 
-    print_bayes_block(
+    genres = genre_rating.row_labels
+    preferred_genre = genres[label_index(genres, genre_rating.table.sum(axis=1), "drama")]
+    print_bayes_example(
         f"EXAMPLE 1: P(Genre = '{preferred_genre.title()}' | Rating >= 4) using rated rentings",
-        prior_percent,
-        likelihood_percent,
-        evidence_percent,
-        posterior_bayes,
-        posterior_direct
-    )
-
-    rentings_with_gender_and_genre = fetch_data(
-        cursor,
-        """
-        SELECT
-            c.gender,
-            m.genre
-        FROM rentings r
-        JOIN customers c
-            ON c.customer_id = r.customer_id
-        JOIN movies m
-            ON m.movie_id = r.movie_id
-        WHERE c.gender IS NOT NULL
-          AND m.genre IS NOT NULL
-        """
+        genre_rating,
+        preferred_genre,
+        "high",
     )
 
-    if not rentings_with_gender_and_genre:
+    # EXAMPLE 2 — sample space: rentings with both gender and genre
+    genre_gender = joint.marginal("genre", "gender")
+    if genre_gender.table.sum() == 0:
         print("Not enough data to run Example 2 (missing gender or genre in rentings).")
-        cursor.close()
-        conn.close()
         return
 
-    genders = [normalize_text(g) for (g, _) in rentings_with_gender_and_genre]
-    chosen_gender = most_common_non_null(genders)
-
-    all_genres = [normalize_text(g) for (_, g) in rentings_with_gender_and_genre]
-    genre_counts2 = {}
-    for g in all_genres:
-        if g is None:
-            continue
-        genre_counts2[g] = genre_counts2.get(g, 0) + 1
-
-    preferred_genre2 = "action"
-    if preferred_genre2 not in genre_counts2:
-        preferred_genre2 = most_common_non_null(all_genres)
-
-    total_events = len(rentings_with_gender_and_genre)
-
-    prior_count2 = sum(
-        1 for (_, genre) in rentings_with_gender_and_genre
-        if normalize_text(genre) == preferred_genre2
-    )
-    prior_percent2 = percentage(prior_count2, total_events)
-
-    evidence_count2 = sum(
-        1 for (gender, _) in rentings_with_gender_and_genre
-        if normalize_text(gender) == chosen_gender
-    )
-    evidence_percent2 = percentage(evidence_count2, total_events)
-
-    likelihood_den2 = prior_count2
-    likelihood_num2 = sum(
-        1 for (gender, genre) in rentings_with_gender_and_genre
-        if normalize_text(genre) == preferred_genre2 and normalize_text(gender) == chosen_gender
-    )
-    likelihood_percent2 = percentage(likelihood_num2, likelihood_den2)
-
-    posterior_bayes2 = bayes_posterior_percent(prior_percent2, likelihood_percent2, evidence_percent2)
-
-    direct_num2 = sum(
-        1 for (gender, genre) in rentings_with_gender_and_genre
-        if normalize_text(gender) == chosen_gender and normalize_text(genre) == preferred_genre2
-    )
-    direct_den2 = sum(
-        1 for (gender, _) in rentings_with_gender_and_genre
-        if normalize_text(gender) == chosen_gender
-    )
-    posterior_direct2 = percentage(direct_num2, direct_den2)
-
-    gender_label = chosen_gender.title() if chosen_gender is not None else "Unknown"
-    print_bayes_block(
-        f"EXAMPLE 2: P(Genre = '{preferred_genre2.title()}' | Customer gender = '{gender_label}') using rentings",
-        prior_percent2,
-        likelihood_percent2,
-        evidence_percent2,
-        posterior_bayes2,
-        posterior_direct2
+    genders, genres2 = genre_gender.col_labels, genre_gender.row_labels
+    chosen_gender = genders[label_index(genders, genre_gender.table.sum(axis=0))]
+    preferred_genre2 = genres2[label_index(genres2, genre_gender.table.sum(axis=1), "action")]
+    print_bayes_example(
+        f"EXAMPLE 2: P(Genre = '{preferred_genre2.title()}' | Customer gender = '{chosen_gender.title()}') using rentings",
+        genre_gender,
+        preferred_genre2,
+        chosen_gender,
     )
 
-    cursor.close()
-    conn.close()
+    # ALL PAIRS — every posterior from the same joint table
+    print_posterior_table("ALL GENRES: P(Genre | Rating bucket)", genre_rating)
+    print_posterior_table("ALL GENDERS: P(Gender | Genre)", joint.marginal("gender", "genre"))
 
 if __name__ == "__main__":
     main()
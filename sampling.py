@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+# -------------------------------------------------------------------
+# Alias-method sampler for empirical (categorical) distributions
+# -------------------------------------------------------------------
+# Monte Carlo scripts used to draw random indices into the full data
+# array. Ratings only take a handful of distinct values and rental counts
+# a few dozen, so we store one (prob, alias) pair per distinct value and
+# draw in O(1) per sample. Memory depends on the number of distinct
+# values, not on the number of rentings.
+
+
+def value_counts(observations: Iterable[Hashable]) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct values and their counts (None is kept as its own value)."""
+    if isinstance(observations, np.ndarray) and observations.dtype != object:
+        values, counts = np.unique(observations, return_counts=True)
+        return values, counts.astype(np.int64)
+
+    counts: Dict[Hashable, int] = {}
+    for v in observations:
+        counts[v] = counts.get(v, 0) + 1
+
+    values = np.empty(len(counts), dtype=object)
+    values[:] = list(counts.keys())
+    return values, np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+
+class AliasSampler:
+    """
+    Walker/Vose alias table built from (value, count) pairs.
+
+    Build cost is O(K) for K distinct values, each draw is O(1):
+    pick a column uniformly, then keep it or jump to its alias.
+    """
+
+    def __init__(self, values: Any, counts: Any):
+        values = np.asarray(values)
+        weights = np.asarray(counts, dtype=np.float64)
+
+        if values.ndim != 1 or weights.shape != values.shape:
+            raise ValueError("values and counts must be 1-D arrays of the same length.")
+        if values.size == 0:
+            raise ValueError("Cannot build a sampler from an empty distribution.")
+        if np.any(weights < 0) or not np.isfinite(weights).all():
+            raise ValueError("counts must be finite and non-negative.")
+
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("counts must contain at least one positive value.")
+
+        self.values = values
+        self.counts = weights
+        self.total = float(total)
+        self.pmf = weights / total
+        self.prob, self.alias = self._build_table(self.pmf)
+
+    @classmethod
+    def from_observations(cls, observations: Iterable[Hashable]) -> "AliasSampler":
+        """Build the table from raw observations (counted once, then discarded)."""
+        values, counts = value_counts(observations)
+        return cls(values, counts)
+
+    @staticmethod
+    def _build_table(pmf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        k = pmf.size
+        scaled = pmf * k
+        prob = np.ones(k, dtype=np.float64)
+        alias = np.arange(k, dtype=np.int64)
+
+        small = [i for i in range(k) if scaled[i] < 1.0]
+        large = [i for i in range(k) if scaled[i] >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] = (scaled[g] + scaled[s]) - 1.0
+            if scaled[g] < 1.0:
+                small.append(g)
+            else:
+                large.append(g)
+
+        # Leftovers are 1.0 up to floating point error.
+        for i in small + large:
+            prob[i] = 1.0
+            alias[i] = i
+
+        return prob, alias
+
+    @property
+    def size(self) -> int:
+        return int(self.values.size)
+
+    def sample_codes(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Draw n positions into `values` (cheap to combine with per-value predicates)."""
+        if rng is None:
+            rng = np.random.default_rng()
+        columns = rng.integers(0, self.size, size=n)
+        keep = rng.random(n) < self.prob[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+    def sample(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Draw n values from the empirical distribution."""
+        return self.values[self.sample_codes(n, rng)]
+
+    def sample_event(self, support_mask: Any, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Draw n samples and return a boolean event array.
+
+        `support_mask` is the event evaluated once on the K distinct values,
+        so the predicate never touches the N-sized population.
+        """
+        support_mask = np.asarray(support_mask, dtype=bool)
+        if support_mask.shape != self.values.shape:
+            raise ValueError("support_mask must have one entry per distinct value.")
+        return support_mask[self.sample_codes(n, rng)]
+
+    def probability(self, support_mask: Any) -> float:
+        """Exact P(event) under the empirical distribution."""
+        support_mask = np.asarray(support_mask, dtype=bool)
+        return float(self.pmf[support_mask].sum())
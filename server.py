@@ -2,6 +2,7 @@ import os
 import time
 import json
 import csv
+from datetime import date
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Iterable, Tuple
 
@@ -58,12 +59,12 @@ def get_connection():
 # -------------------------------------------------------
 # Task 1 – Generic Function (all queries go through here)
 # -------------------------------------------------------
-def run_query(cursor, query):
+def run_query(cursor, query, params=None):
     global _LAST_RESULT
 
     start = time.perf_counter()
     try:
-        cursor.execute(query)
+        cursor.execute(query, params)
 
         if cursor.description is not None:
             rows = cursor.fetchall()
@@ -105,12 +106,12 @@ def run_query(cursor, query):
 # ---------------------------0----------------------------
 # Generic fetch function (keeps the style used in your file)
 # -------------------------------------------------------
-def _fetch_all(query: str) -> List[Dict[str, Any]]:
+def _fetch_all(query: str, params: Optional[Iterable[Any]] = None) -> List[Dict[str, Any]]:
     conn = None
     try:
         conn = get_connection()
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            return run_query(cur, query)
+            return run_query(cur, query, params)
     finally:
         if conn:
             conn.close()
@@ -197,11 +198,43 @@ def fetch_customers():
     _print_rows("CUSTOMERS", rows)
     return rows
 
-def fetch_log_activity():
-    rows = _fetch_all("SELECT * FROM public.log_activity;")
-    _print_rows("LOG_ACTIVITY", rows)
+# log_activity is partitioned by month and only grows, so it is read one
+# page at a time, newest first. Pages are keyset-paginated on the primary
+# key (action_time, log_id): pass the last row of a page as `after` to get
+# the next one, which stays an index range scan however deep you go.
+LOG_PAGE_SIZE = 50
+
+def _log_activity_page(after: Optional[Dict[str, Any]] = None, limit: int = LOG_PAGE_SIZE) -> List[Dict[str, Any]]:
+    if after is None:
+        return _fetch_all(
+            "SELECT log_id, table_name, action_type, record_id, action_time FROM public.log_activity "
+            "ORDER BY action_time DESC, log_id DESC LIMIT %s;",
+            (limit,),
+        )
+    return _fetch_all(
+        "SELECT log_id, table_name, action_type, record_id, action_time FROM public.log_activity "
+        "WHERE (action_time, log_id) < (%s, %s) "
+        "ORDER BY action_time DESC, log_id DESC LIMIT %s;",
+        (after["action_time"], after["log_id"], limit),
+    )
+
+def fetch_log_activity(after: Optional[Dict[str, Any]] = None, limit: int = LOG_PAGE_SIZE):
+    rows = _log_activity_page(after, limit)
+    _print_rows("LOG_ACTIVITY", rows, max_rows=limit)
     return rows
 
+def iter_log_activity(page_size: int = LOG_PAGE_SIZE) -> Iterable[List[Dict[str, Any]]]:
+    """Yields log_activity pages (newest first) until the table is exhausted."""
+    after = None
+    while True:
+        rows = _log_activity_page(after, page_size)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]
+
 def fetch_movies():
     rows = _fetch_all("SELECT * FROM public.movies;")
     _print_rows("MOVIES", rows)
@@ -212,11 +245,30 @@ def fetch_rentings():
     _print_rows("RENTINGS", rows)
     return rows
 
+# The summary views read trigger-maintained tables (SQL/Part3 Views.sql),
+# so these return precomputed rows instead of re-aggregating.
 def fetch_view_actor_summary():
-    rows = _fetch_all("SELECT * FROM public.view_actor_summary;")
+    rows = _fetch_all(
+        "SELECT actor_name, number_of_movies, avg_movie_rating FROM public.view_actor_summary "
+        "ORDER BY number_of_movies DESC, actor_name;"
+    )
     _print_rows("VIEW_ACTOR_SUMMARY", rows)
     return rows
 
+def fetch_view_movie_summary():
+    rows = _fetch_all(
+        "SELECT movie_id, title, genre, avg_rating, review_count FROM public.view_movie_summary ORDER BY movie_id;"
+    )
+    _print_rows("VIEW_MOVIE_SUMMARY", rows)
+    return rows
+
+def fetch_view_genre_stats():
+    rows = _fetch_all(
+        "SELECT genre_name, total_movies, avg_genre_rating FROM public.view_genre_stats ORDER BY genre_name;"
+    )
+    _print_rows("VIEW_GENRE_STATS", rows)
+    return rows
+
 # ============================
 # Task 3 – WHERE Clause
 # ============================
@@ -512,6 +564,11 @@ def show_menu():
     print("20. Save last result as JSON")
     print("21. Save last result as CSV")
 
+    print("\n--- Stored Functions (SQL/Part 4) ---")
+    print("22. Average movie rating of every actor")
+    print("23. Top-rated movie of every genre")
+    print("24. Reviews per movie in a year / month")
+
     print("\n--- Extra ---")
     print("P. Probability Homework (run scripts)")
 
@@ -521,6 +578,9 @@ def show_menu():
     print ("\n--- Extra ---")
     print("D. Pandas DataFrames EDA (Panda folder)")
 
+    print("\n--- Database Tools ---")
+    print("I. Index advisor (dry run, see SQL/Part 7 Indexes.sql)")
+
     print("\n0. Exit")
 
 def show_pandas_menu():
@@ -577,6 +637,52 @@ def fetch_task4_avg_rating():
     _print_rows("TASK4_AVG_RATING", rows)
     return rows
 
+# Set-based stored functions (SQL/Part 4): one query for all actors /
+# genres instead of one function call per actor / genre.
+def fetch_actor_avg_ratings():
+    rows = _fetch_all(
+        "SELECT actor_id, actor_name, ROUND(avg_rating, 2) AS avg_rating FROM public.get_actor_avg_ratings() "
+        "ORDER BY avg_rating DESC, actor_name;"
+    )
+    _print_rows("ACTOR_AVG_RATINGS", rows)
+    return rows
+
+def fetch_genre_top_movies():
+    rows = _fetch_all("SELECT genre, movie_title, rating FROM public.get_genre_top_movies() ORDER BY genre;")
+    _print_rows("GENRE_TOP_MOVIES", rows)
+    return rows
+
+# Reviews in a period: always a half-open range [start, end) on
+# reviews.created_at (never EXTRACT(YEAR ...)), so the BRIN index on
+# created_at (SQL/Part 2) only reads the blocks inside the period.
+def period_bounds(year: int, month: Optional[int] = None) -> Tuple[date, date]:
+    """[start, end) of a calendar year, or of one month of it."""
+    if month is None:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    if not 1 <= month <= 12:
+        raise ValueError("month must be between 1 and 12.")
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+def fetch_reviews_in_period(start: date, end: Optional[date] = None):
+    """Reviews per movie with start <= created_at < end (end=None: up to now)."""
+    rows = _fetch_all(
+        "SELECT movie_id, title, num_reviews, avg_stars FROM public.reviews_in_period(%s, %s) "
+        "ORDER BY num_reviews DESC, movie_id;",
+        (start, end),
+    )
+    _print_rows(f"REVIEWS_FROM_{start}_TO_{end or 'NOW'}", rows)
+    return rows
+
+def _prompt_reviews_period():
+    try:
+        year = int(input("Year (e.g. 2024): ").strip())
+        month_text = input("Month 1-12 (empty = whole year): ").strip()
+        start, end = period_bounds(year, int(month_text) if month_text else None)
+    except ValueError as e:
+        print(f"Invalid period: {e}")
+        return []
+    return fetch_reviews_in_period(start, end)
+
 def _task9_invalid_query_demo():
     print("\n=== Task 9 Demo: invalid SQL (should not crash) ===")
     conn = None
@@ -734,6 +840,15 @@ def _handle_choice(choice: str) -> bool:
     elif choice == "21":
         save_last_result_csv()
 
+    elif choice == "22":
+        fetch_actor_avg_ratings()
+
+    elif choice == "23":
+        fetch_genre_top_movies()
+
+    elif choice == "24":
+        _prompt_reviews_period()
+
     elif choice == "0":
         print("Exiting...")
         return False
@@ -747,6 +862,9 @@ def _handle_choice(choice: str) -> bool:
     elif choice.upper() == "D":
         handle_pandas_menu()    
 
+    elif choice.upper() == "I":
+        _run_script("index_advisor.py")
+
     else:
         print("Invalid option, try again.")
 
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg2 import sql
+
+from nullable import convert
+
+# -------------------------------------------------------------------
+# Streaming, mergeable descriptive statistics
+# -------------------------------------------------------------------
+# Rows arrive in batches from a server-side (named) cursor, so only one
+# batch is ever in memory. Each column keeps small accumulators:
+#   - count / mean / M2 (Welford, batches combined with Chan's formula)
+#   - min / max / NULL count
+#   - exact value counts while the column has few distinct values,
+#     which give the exact mode, median and quartiles without a sort
+#   - a KLL quantile sketch (O(k) memory) for when it has many
+# Two accumulators built from different chunks (e.g. in parallel
+# workers) can be merged into the result of the whole table.
+
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_MAX_DISTINCT = 100_000
+
+
+class RunningStats:
+    """Count, mean, variance, min and max with O(1) memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.nulls = 0
+
+    def update(self, values: np.ndarray, nulls: int = 0) -> "RunningStats":
+        """Add a batch of non-NULL float values."""
+        self.nulls += nulls
+        n = int(values.size)
+        if n == 0:
+            return self
+        batch = RunningStats()
+        batch.count = n
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Chan et al. parallel combination; updates self in place."""
+        self.nulls += other.nulls
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def variance(self, ddof: int = 1) -> float:
+        return self.m2 / (self.count - ddof) if self.count > ddof else float("nan")
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+
+def _interpolated_quantile(values: np.ndarray, cum: np.ndarray, q: float) -> float:
+    """
+    Quantile of sorted `values` with cumulative weights `cum`, linearly
+    interpolated between neighbouring ranks like pandas' quantile().
+    """
+    pos = (cum[-1] - 1) * q
+    lo, hi = math.floor(pos), math.ceil(pos)
+    v_lo = values[np.searchsorted(cum, lo, side="right")]
+    v_hi = values[np.searchsorted(cum, hi, side="right")]
+    return float(v_lo + (v_hi - v_lo) * (pos - lo))
+
+
+class ValueCounter:
+    """
+    Exact value -> count table, dropped once the column has more than
+    `max_distinct` distinct values (quantiles then come from the KLL sketch).
+    """
+
+    def __init__(self, max_distinct: int = DEFAULT_MAX_DISTINCT):
+        self.max_distinct = max_distinct
+        self.counts: Optional[Dict[float, int]] = {}
+
+    @property
+    def overflowed(self) -> bool:
+        return self.counts is None
+
+    def update(self, values: np.ndarray) -> "ValueCounter":
+        if self.counts is None or values.size == 0:
+            return self
+        uniq, cnt = np.unique(values, return_counts=True)
+        for v, c in zip(uniq.tolist(), cnt.tolist()):
+            self.counts[v] = self.counts.get(v, 0) + c
+        if len(self.counts) > self.max_distinct:
+            self.counts = None
+        return self
+
+    def merge(self, other: "ValueCounter") -> "ValueCounter":
+        if self.counts is None or other.counts is None:
+            self.counts = None
+            return self
+        for v, c in other.counts.items():
+            self.counts[v] = self.counts.get(v, 0) + c
+        if len(self.counts) > self.max_distinct:
+            self.counts = None
+        return self
+
+    def _sorted(self):
+        values = np.array(sorted(self.counts), dtype=np.float64)
+        counts = np.array([self.counts[v] for v in values.tolist()], dtype=np.int64)
+        return values, counts
+
+    def mode(self) -> float:
+        """Most frequent value (smallest one on ties, like np.unique + argmax)."""
+        if not self.counts:
+            return float("nan")
+        values, counts = self._sorted()
+        return float(values[np.argmax(counts)])
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation between order statistics (pandas' default)."""
+        if not self.counts:
+            return float("nan")
+        values, counts = self._sorted()
+        return _interpolated_quantile(values, np.cumsum(counts), q)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016).
+
+    Items are kept in levels; an item on level h stands for 2**h rows.
+    When a level is over capacity it is sorted and every other item
+    (random offset) moves up one level. Memory is O(k) regardless of
+    the number of rows, and the rank error is about `rank_error` (1.3%
+    for k=200). Sketches of disjoint chunks merge level by level.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        if k < 8:
+            raise ValueError("k must be at least 8.")
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error bound (~99% confidence, DataSketches' fit)."""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        # Adding a level shrinks every lower capacity, so keep compacting
+        # the lowest over-full level until all of them fit.
+        while True:
+            level = next((h for h in range(len(self.levels)) if self.levels[h].size > self._capacity(h)), None)
+            if level is None:
+                return
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self.levels[level])
+            # Odd count: one item stays behind at this level.
+            keep, items = items[:items.size % 2], items[items.size % 2:]
+            promoted = items[int(self._rng.integers(2))::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        """Add a batch of non-NULL float values."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            self.n += int(values.size)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 1 << h, dtype=np.int64) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile; exact while nothing has been compacted."""
+        if self.n == 0:
+            return float("nan")
+        values, cum = self._weighted()
+        return _interpolated_quantile(values, cum, q)
+
+    @property
+    def size(self) -> int:
+        """Items retained (the sketch's memory footprint in values)."""
+        return sum(items.size for items in self.levels)
+
+
+class ColumnStats:
+    """RunningStats + ValueCounter + KLLSketch for one column, fed with raw DB values."""
+
+    def __init__(self, name: str, max_distinct: int = DEFAULT_MAX_DISTINCT, k: int = 200):
+        self.name = name
+        self.running = RunningStats()
+        self.values = ValueCounter(max_distinct)
+        self.sketch = KLLSketch(k)
+
+    def update(self, raw: Iterable[Any]) -> "ColumnStats":
+        col = convert(raw, "float")
+        present = col.present()
+        self.running.update(present, col.null_count)
+        self.values.update(present)
+        self.sketch.update(present)
+        return self
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        self.running.merge(other.running)
+        self.values.merge(other.values)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.running.count
+
+    def quantile(self, q: float) -> float:
+        """Exact from the value counts; from the sketch once they overflow."""
+        if self.values.overflowed:
+            return self.sketch.quantile(q)
+        return self.values.quantile(q)
+
+    def summary(self) -> Dict[str, float]:
+        """The describe() rows: count, mean, std, min, 25%, 50%, 75%, max."""
+        r = self.running
+        empty = r.count == 0
+        quant = self.quantile
+        return {
+            "count": float(r.count),
+            "mean": float("nan") if empty else r.mean,
+            "std": r.std(),
+            "min": float("nan") if empty else r.min,
+            "25%": quant(0.25),
+            "50%": quant(0.5),
+            "75%": quant(0.75),
+            "max": float("nan") if empty else r.max,
+        }
+
+
+def iter_batches(conn, query: Any, batch_size: int = DEFAULT_BATCH_SIZE, name: str = "stream_stats") -> Iterator[List[tuple]]:
+    """
+    Yield row batches from a server-side cursor, so the result set stays
+    in PostgreSQL and only `batch_size` rows are in memory at a time.
+    """
+    with conn.cursor(name=name) as cur:
+        cur.itersize = batch_size
+        cur.execute(query)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+def stream_stats(
+    conn,
+    query: Any,
+    columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_distinct: int = DEFAULT_MAX_DISTINCT,
+    k: int = 200,
+) -> Dict[str, ColumnStats]:
+    """Accumulate ColumnStats for the selected columns (in SELECT order)."""
+    stats = {name: ColumnStats(name, max_distinct, k) for name in columns}
+    for rows in iter_batches(conn, query, batch_size):
+        for i, name in enumerate(columns):
+            stats[name].update(row[i] for row in rows)
+    return stats
+
+
+def merge_stats(parts: Iterable[Dict[str, ColumnStats]]) -> Dict[str, ColumnStats]:
+    """Combine per-chunk results (e.g. one per worker) into one."""
+    merged: Dict[str, ColumnStats] = {}
+    for part in parts:
+        for name, col in part.items():
+            if name in merged:
+                merged[name].merge(col)
+            else:
+                merged[name] = col
+    return merged
+
+
+# -------------------------------------------------------------------
+# IQR outliers: fences from pass 1, outlier rows from PostgreSQL
+# -------------------------------------------------------------------
+class Fences(NamedTuple):
+    q1: float
+    q3: float
+    lower: float
+    upper: float
+
+
+def iqr_fences(stats: ColumnStats, factor: float = 1.5) -> Fences:
+    q1, q3 = stats.quantile(0.25), stats.quantile(0.75)
+    iqr = q3 - q1
+    return Fences(q1, q3, q1 - factor * iqr, q3 + factor * iqr)
+
+
+def fetch_outliers(cursor, column: str, source: str, fences: Fences, limit: int = 5) -> Tuple[int, List[float]]:
+    """
+    (number of outliers, first `limit` outlier values). The filter runs in
+    PostgreSQL, so only rows outside the fences are sent. `column` and
+    `source` are trusted SQL written in the scripts.
+    """
+    cursor.execute(
+        sql.SQL(
+            "SELECT ({col})::float8, COUNT(*) OVER () FROM {source} "
+            "WHERE {col} < %s OR {col} > %s LIMIT %s;"
+        ).format(col=sql.SQL(column), source=sql.SQL(source)),
+        (fences.lower, fences.upper, limit),
+    )
+    rows = cursor.fetchall()
+    return (int(rows[0][1]) if rows else 0), [row[0] for row in rows]